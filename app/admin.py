@@ -52,6 +52,8 @@ class CategoryAdmin(ImportExportModelAdmin, TimeStampedModelAdmin):
     list_display = ('name', 'parent', 'created_at')
     search_fields = ('name', 'description')
     prepopulated_fields = {'slug': ('name',)}
+    # Also orders the category pickers and filters of other admins
+    ordering = ('name',)
 
 
 @admin.register(Tag)
@@ -0,0 +1,254 @@
+"""
+Automatic internal links
+
+``add_internal_links`` links mentions of states and short article titles in
+an article body. Every name is compiled into one Aho-Corasick automaton, so
+a body is scanned once, character by character, however many link targets
+exist, instead of running a regex per target over the whole HTML.
+
+The automaton is built lazily per process and rebuilt when the content or
+taxonomy version stamp changes (see app/caching.py). Only text outside
+tags is scanned; text inside links, scripts, styles and code blocks is
+left alone. Matches must start and end on word boundaries, the longest of
+overlapping matches wins and each target is linked once, at its first
+mention.
+"""
+import re
+import threading
+from collections import deque
+
+from django.urls import reverse
+from django.utils.html import escape
+
+from .caching import CONTENT_VERSION, TAXONOMY_VERSION, get_version
+
+# Longer titles are rarely written out verbatim in other articles
+MAX_TITLE_WORDS = 3
+
+# Shorter names match too many ordinary words
+MIN_NAME_LENGTH = 4
+
+# Text inside these elements is never linked
+SKIPPED_TAGS = {'a', 'script', 'style', 'code', 'pre', 'textarea', 'button'}
+
+_TAG_RE = re.compile(r'(<[^>]*>)')
+_TAG_NAME_RE = re.compile(r'<\s*(/?)\s*([a-zA-Z][a-zA-Z0-9]*)')
+
+
+def _lower(text):
+    """Lowercase ``text`` without changing its length"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    # A few characters expand when lowercased ('İ'), keep them as they are
+    return ''.join(char.lower() if len(char.lower()) == 1 else char for char in text)
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == '_'
+
+
+class Automaton:
+    """
+    Aho-Corasick automaton over lowercased patterns, each mapped to a value
+    """
+
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for pattern, value in patterns.items():
+            self._add(pattern, value)
+        self._link()
+
+    def _add(self, pattern, value):
+        state = 0
+        for char in pattern:
+            following = self._goto[state].get(char)
+            if following is None:
+                following = len(self._goto)
+                self._goto[state][char] = following
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = following
+        self._output[state].append((len(pattern), value))
+
+    def _link(self):
+        # Breadth-first, so a state's failure target is always finished first
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, following in self._goto[state].items():
+                queue.append(following)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[following] = self._goto[fallback].get(char, 0)
+                self._output[following] = self._output[following] + self._output[self._fail[following]]
+
+    def __len__(self):
+        return len(self._goto)
+
+    def iter(self, text):
+        """Yield ``(start, end, value)`` for every pattern occurring in ``text``"""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length, value in output[state]:
+                yield position + 1 - length, position + 1, value
+
+
+def select_matches(text, automaton):
+    """
+    Non-overlapping, whole-word matches in ``text``, leftmost first and the
+    longest where several start at the same place
+    """
+    candidates = []
+    for start, end, value in automaton.iter(_lower(text)):
+        if start > 0 and _is_word_char(text[start - 1]):
+            continue
+        if end < len(text) and _is_word_char(text[end]):
+            continue
+        candidates.append((start, -end, value))
+    candidates.sort()
+
+    selected = []
+    covered = 0
+    for start, negative_end, value in candidates:
+        if start >= covered:
+            selected.append((start, -negative_end, value))
+            covered = -negative_end
+    return selected
+
+
+class LinkTargetIndex:
+    """
+    Automaton over state names and short article titles
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._automaton = Automaton({})
+
+    @staticmethod
+    def current_version():
+        return f'{get_version(CONTENT_VERSION)}:{get_version(TAXONOMY_VERSION)}'
+
+    def _load(self):
+        from .models import Content, State
+
+        patterns = {}
+        for pk, name in State.objects.order_by('name').values_list('pk', 'name'):
+            if len(name.strip()) >= MIN_NAME_LENGTH:
+                patterns.setdefault(_lower(name.strip()), ('state', pk))
+
+        titles = (
+            Content.objects
+            .filter(content_type='article', published=True, review_status='approved')
+            .order_by('-published_at', '-pk')
+            .values_list('pk', 'title')
+        )
+        for pk, title in titles:
+            title = ' '.join(title.split())
+            if len(title) >= MIN_NAME_LENGTH and len(title.split()) <= MAX_TITLE_WORDS:
+                # States and the most recent article keep a shared name
+                patterns.setdefault(_lower(title), ('article', pk))
+        return Automaton(patterns)
+
+    def _ensure_current(self):
+        version = self.current_version()
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            self._automaton = self._load()
+            self._version = version
+
+    @property
+    def automaton(self):
+        self._ensure_current()
+        return self._automaton
+
+    def invalidate(self):
+        """Force a rebuild on the next use in this process"""
+        self._version = None
+
+
+link_index = LinkTargetIndex()
+
+
+def _target_urls(targets):
+    """``{(kind, pk): (url, css_class)}`` for the matched targets"""
+    from .models import Content, State
+
+    state_ids = [pk for kind, pk in targets if kind == 'state']
+    article_ids = [pk for kind, pk in targets if kind == 'article']
+    urls = {}
+    if state_ids:
+        article_list = reverse('app:article-list')
+        for pk, slug in State.objects.filter(pk__in=state_ids).values_list('pk', 'slug'):
+            urls[('state', pk)] = (f'{article_list}?state={slug}', 'internal-link text-info')
+    if article_ids:
+        articles = Content.objects.filter(pk__in=article_ids).only(
+            'pk', 'slug', 'content_type', 'canonical_path', 'primary_category', 'primary_state',
+        )
+        for article in articles:
+            urls[('article', article.pk)] = (article.get_absolute_url(), 'internal-link text-primary')
+    return urls
+
+
+def add_internal_links(html, exclude=None):
+    """
+    Link the first mention of every state and short article title in
+    ``html``. ``exclude`` is the article being rendered, which never links
+    to itself.
+    """
+    if not html:
+        return html
+
+    automaton = link_index.automaton
+    excluded = ('article', exclude.pk) if exclude is not None else None
+    parts = _TAG_RE.split(html)
+
+    # First pass: find the first mention of each target in the text nodes
+    skipped_depth = 0
+    first_mentions = {}
+    linked = set()
+    for position, part in enumerate(parts):
+        if position % 2:
+            match = _TAG_NAME_RE.match(part)
+            if match and match.group(2).lower() in SKIPPED_TAGS and not part.endswith('/>'):
+                skipped_depth = max(0, skipped_depth - 1) if match.group(1) else skipped_depth + 1
+            continue
+        if skipped_depth or not part.strip():
+            continue
+        for start, end, target in select_matches(part, automaton):
+            if target != excluded and target not in linked:
+                linked.add(target)
+                first_mentions.setdefault(position, []).append((start, end, target))
+
+    if not first_mentions:
+        return html
+
+    # Second pass: rewrite only the text nodes holding a first mention
+    urls = _target_urls(linked)
+    for position, matches in first_mentions.items():
+        text = parts[position]
+        pieces = []
+        cursor = 0
+        for start, end, target in matches:
+            if target not in urls:
+                continue
+            url, css_class = urls[target]
+            pieces.append(text[cursor:start])
+            pieces.append(f'<a href="{escape(url)}" class="{css_class}">{text[start:end]}</a>')
+            cursor = end
+        pieces.append(text[cursor:])
+        parts[position] = ''.join(pieces)
+    return ''.join(parts)
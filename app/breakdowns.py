@@ -0,0 +1,71 @@
+"""
+State x category breakdowns
+
+The landing pages group a category's articles by state, and the state page
+counts a state's articles by category. Both used to run a query per state
+or per category. Here each breakdown is a constant number of queries over
+the M2M through tables, however many states and categories exist:
+
+- ``category_counts_for_state`` and ``state_counts_for_category`` read the
+  ``StateCategoryCount`` matrix maintained by app/counters.py, one query
+- ``articles_by_state`` ranks the articles of every state with
+  ``ROW_NUMBER() OVER (PARTITION BY state_id)`` on the states through
+  table, then loads the picked articles in one batch, two queries
+"""
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .counters import state_category_counts
+
+# Articles shown per state in the landing pages' "by state" sections
+ARTICLES_PER_STATE = 3
+
+
+def category_counts_for_state(state):
+    """``{Category: count}`` of published articles in ``state``, by category name"""
+    return state_category_counts(state)
+
+
+def state_counts_for_category(category):
+    """``{State: count}`` of published articles in ``category``, by state name"""
+    from .models import StateCategoryCount
+
+    cells = (
+        StateCategoryCount.objects
+        .filter(category=category, count__gt=0)
+        .select_related('state')
+        .order_by('state__name')
+    )
+    return {cell.state: cell.count for cell in cells}
+
+
+def articles_by_state(queryset, per_state=ARTICLES_PER_STATE):
+    """
+    ``{State: [article, ...]}`` with the latest ``per_state`` articles of
+    ``queryset`` in each state, states ordered by name. States without
+    articles are left out.
+    """
+    through = queryset.model.states.through
+    ranked = (
+        through.objects
+        .filter(content__in=queryset.order_by().values('pk'))
+        .annotate(rank=Window(
+            RowNumber(),
+            partition_by=F('state_id'),
+            order_by=[F('content__published_at').desc(nulls_last=True), F('content_id').desc()],
+        ))
+        .filter(rank__lte=per_state)
+        .select_related('state')
+        .order_by('state__name', 'rank')
+    )
+    rows = list(ranked)
+    if not rows:
+        return {}
+
+    articles = queryset.select_related('author').in_bulk({row.content_id for row in rows})
+    grouped = {}
+    for row in rows:
+        article = articles.get(row.content_id)
+        if article is not None:
+            grouped.setdefault(row.state, []).append(article)
+    return grouped
@@ -0,0 +1,57 @@
+"""
+Shared cache helpers
+
+Version stamps are small counters kept in the default cache. Writers bump a
+stamp when the data behind it changes; per-process structures (typeahead
+index, redirect map, ...) compare the stamp they were built from with the
+current one and rebuild lazily, so every worker converges without a restart.
+"""
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY_PREFIX = 'version:'
+
+# Global content generation counter, bumped whenever content is saved
+# (publish, unpublish, revision apply), deleted or re-categorized
+CONTENT_VERSION = 'content'
+
+# Bumped whenever a category, tag or state is created, renamed or deleted
+TAXONOMY_VERSION = 'taxonomy'
+
+
+def _version_key(name):
+    return f'{VERSION_KEY_PREFIX}{name}'
+
+
+def get_version(name):
+    """Return the current value of a version stamp"""
+    key = _version_key(name)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted stamp never repeats an old value
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(name):
+    """Invalidate everything built from a version stamp"""
+    key = _version_key(name)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = time.time_ns()
+        cache.set(key, version, timeout=None)
+        return version
+
+
+def get_versions(names):
+    """Return ``{name: version}`` for several stamps in one cache round trip"""
+    keys = {_version_key(name): name for name in names}
+    found = cache.get_many(keys)
+    versions = {keys[key]: version for key, version in found.items()}
+    for name in names:
+        if name not in versions:
+            versions[name] = get_version(name)
+    return versions
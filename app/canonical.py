@@ -0,0 +1,174 @@
+"""
+Stored canonical URLs
+
+``Content.get_absolute_url`` used to read the article's first category and
+state on every call, two queries per article on every listing, sitemap
+entry and redirect. Articles now store them as ``primary_category`` and
+``primary_state`` together with the resulting ``canonical_path``, so a URL
+is a column read.
+
+The primary category is the first linked category in tree order and the
+primary state the first linked state, as before, but they stay put while
+they remain linked, so adding a category does not move an article's URL.
+``Content.save`` recomputes the path when the slug or type changes, the
+category and state link signals (app/signals.py) pick new primaries, and
+changing the slug of a category or state rewrites the paths using it. Run
+``manage.py refresh_canonical_paths`` after bulk imports that bypass them.
+"""
+from django.apps import apps as global_apps
+from django.urls import NoReverseMatch, reverse
+
+# Content fields the canonical path is built from
+PATH_FIELDS = {'slug', 'content_type', 'primary_category', 'primary_state'}
+
+# Columns maintained by this module
+CANONICAL_FIELDS = ['primary_category', 'primary_state', 'canonical_path']
+
+# Category slugs with a state-scoped article URL
+CATEGORY_URL_NAMES = {
+    'personalities': 'app:seo-personalities-detail',
+    'culture': 'app:seo-culture-detail',
+    'festivals': 'app:seo-festivals-detail',
+    'places': 'app:seo-places-detail',
+    'heritage': 'app:seo-heritage-detail',
+    'history': 'app:seo-history-detail',
+    'traditional-crafts': 'app:seo-crafts-detail',
+    'traditional-arts': 'app:seo-crafts-detail',
+    'food': 'app:seo-food-detail',
+    'cuisine': 'app:seo-food-detail',
+    'music': 'app:seo-music-detail',
+    'folk-music': 'app:seo-music-detail',
+    'dance': 'app:seo-dance-detail',
+    'literature': 'app:seo-literature-detail',
+    'tribal-culture': 'app:seo-culture-detail',
+    'historical-sites': 'app:seo-heritage-detail',
+}
+
+# URL names of the content types with their own detail page
+CONTENT_TYPE_URL_NAMES = {
+    'personality': 'app:personality-detail',
+    'cultural': 'app:cultural-element-detail',
+}
+
+
+def build_path(content_type, slug, category_slug=None, state_slug=None):
+    """Canonical path of an article given its primary category and state slugs"""
+    url_name = CONTENT_TYPE_URL_NAMES.get(content_type)
+    if url_name:
+        try:
+            return reverse(url_name, kwargs={'slug': slug})
+        except NoReverseMatch:
+            pass
+    elif category_slug and state_slug and category_slug in CATEGORY_URL_NAMES:
+        try:
+            return reverse(CATEGORY_URL_NAMES[category_slug], kwargs={'state_slug': state_slug, 'slug': slug})
+        except NoReverseMatch:
+            pass
+    return reverse('app:article-detail', kwargs={'slug': slug})
+
+
+def content_path(content):
+    """Canonical path of ``content`` from its primary category and state"""
+    category = content.primary_category if content.primary_category_id else None
+    state = content.primary_state if content.primary_state_id else None
+    return build_path(
+        content.content_type,
+        content.slug,
+        category.slug if category else None,
+        state.slug if state else None,
+    )
+
+
+def _primary(links, current_id, ordering):
+    """``current_id`` while it is still linked, otherwise the first link"""
+    if current_id is not None and links.filter(pk=current_id).exists():
+        return current_id
+    return links.order_by(*ordering).values_list('pk', flat=True).first()
+
+
+def refresh_canonical(content, using=None):
+    """
+    Pick the primary category and state of ``content`` and store them with
+    its canonical path if anything changed, without sending save signals.
+    Returns whether anything changed.
+    """
+    db = using or content._state.db
+    current = (content.primary_category_id, content.primary_state_id, content.canonical_path)
+    content.primary_category_id = _primary(content.categories.using(db), current[0], ('tree_id', 'lft'))
+    content.primary_state_id = _primary(content.states.using(db), current[1], ('pk',))
+    content.canonical_path = content_path(content)
+    if (content.primary_category_id, content.primary_state_id, content.canonical_path) == current:
+        return False
+    type(content)._default_manager.using(db).filter(pk=content.pk).update(
+        primary_category_id=content.primary_category_id,
+        primary_state_id=content.primary_state_id,
+        canonical_path=content.canonical_path,
+    )
+    return True
+
+
+def refresh_paths(articles):
+    """Rebuild the stored paths of ``articles`` after a category or state slug changed"""
+    stale = []
+    for article in articles.select_related('primary_category', 'primary_state').only(
+        'pk', 'slug', 'content_type', 'canonical_path', 'primary_category__slug', 'primary_state__slug',
+    ):
+        path = content_path(article)
+        if path != article.canonical_path:
+            article.canonical_path = path
+            stale.append(article)
+    articles.model._default_manager.db_manager(articles.db).bulk_update(stale, ['canonical_path'])
+    return len(stale)
+
+
+def backfill(apps=global_apps, using=None, batch_size=500):
+    """
+    Store the primary category, primary state and canonical path of every
+    article in batches and return how many rows changed
+    """
+    Content = apps.get_model('app', 'Content')
+    manager = Content._default_manager.db_manager(using)
+    category_links = Content._meta.get_field('categories').remote_field.through._default_manager.db_manager(using)
+    state_links = Content._meta.get_field('states').remote_field.through._default_manager.db_manager(using)
+
+    changed = 0
+    last_pk = 0
+    while True:
+        batch = list(
+            manager.filter(pk__gt=last_pk).order_by('pk')
+            .only('pk', 'slug', 'content_type', *CANONICAL_FIELDS)[:batch_size]
+        )
+        if not batch:
+            return changed
+        ids = [article.pk for article in batch]
+
+        # First link of each article, as the relation managers order them
+        categories = {}
+        for content_id, category_id, slug in (
+            category_links.filter(content_id__in=ids)
+            .order_by('content_id', 'category__tree_id', 'category__lft')
+            .values_list('content_id', 'category_id', 'category__slug')
+        ):
+            categories.setdefault(content_id, (category_id, slug))
+        states = {}
+        for content_id, state_id, slug in (
+            state_links.filter(content_id__in=ids)
+            .order_by('content_id', 'state_id')
+            .values_list('content_id', 'state_id', 'state__slug')
+        ):
+            states.setdefault(content_id, (state_id, slug))
+
+        stale = []
+        for article in batch:
+            category_id, category_slug = categories.get(article.pk, (None, None))
+            state_id, state_slug = states.get(article.pk, (None, None))
+            path = build_path(article.content_type, article.slug, category_slug, state_slug)
+            current = (article.primary_category_id, article.primary_state_id, article.canonical_path)
+            if current != (category_id, state_id, path):
+                article.primary_category_id = category_id
+                article.primary_state_id = state_id
+                article.canonical_path = path
+                stale.append(article)
+        manager.bulk_update(stale, CANONICAL_FIELDS)
+        changed += len(stale)
+        last_pk = batch[-1].pk
@@ -0,0 +1,143 @@
+"""
+Category hierarchy queries
+
+Categories are stored as nested sets by django-mptt: every category has
+``tree_id`` (one tree per top-level category), ``level`` and a ``lft``/
+``rght`` interval that encloses the intervals of all its descendants. The
+questions the category pages ask therefore need no recursion:
+
+- articles in a category or any subcategory join on
+  ``tree_id = X AND lft BETWEEN category.lft AND category.rght``
+- breadcrumbs are the categories whose interval encloses the current one
+- parent, siblings and children share a ``parent_id`` or ``id``
+
+Each is one query backed by ``category_tree_idx`` (``tree_id, lft``) or the
+``parent_id`` foreign key index.
+
+MPTT keeps the intervals up to date on ``Category.save()`` and
+``Category.delete()``. Anything that bypasses them (``bulk_create``,
+``QuerySet.update`` of ``parent``, ``QuerySet.delete``, raw SQL) must be
+followed by ``rebuild_category_tree()``, or
+``python manage.py rebuild_category_tree``.
+"""
+from collections import defaultdict, namedtuple
+
+from django.apps import apps as global_apps
+from django.db import transaction
+from django.db.models import Q
+
+from .counters import counted_articles
+
+TREE_FIELDS = ['tree_id', 'lft', 'rght', 'level']
+
+TreeNeighbours = namedtuple('TreeNeighbours', ['parent', 'siblings', 'children'])
+
+
+def rebuild_category_tree(apps=global_apps, using=None):
+    """
+    Recompute the nested set columns of every category from the ``parent``
+    links and return how many rows changed. Siblings are ordered by name,
+    like ``MPTTMeta.order_insertion_by``.
+    """
+    Category = apps.get_model('app', 'Category')
+    manager = Category._default_manager.db_manager(using)
+
+    nodes = {obj.pk: obj for obj in manager.only('pk', 'name', 'parent_id', *TREE_FIELDS)}
+    children = defaultdict(list)
+    for node in nodes.values():
+        # A missing parent would orphan the subtree, treat it as a root
+        parent_id = node.parent_id if node.parent_id in nodes else None
+        children[parent_id].append(node)
+    for siblings in children.values():
+        siblings.sort(key=lambda node: (node.name, node.pk))
+
+    expected = {}
+    for tree_id, root in enumerate(children[None], start=1):
+        counter = 1
+        # Iterative walk, ('enter', node, level) then ('exit', node, level)
+        stack = [('enter', root, 0)]
+        while stack:
+            step, node, level = stack.pop()
+            if step == 'exit':
+                expected[node.pk]['rght'] = counter
+                counter += 1
+                continue
+            expected[node.pk] = {'tree_id': tree_id, 'lft': counter, 'level': level}
+            counter += 1
+            stack.append(('exit', node, level))
+            for child in reversed(children[node.pk]):
+                if child.pk not in expected:
+                    stack.append(('enter', child, level + 1))
+
+    stale = []
+    for pk, node in nodes.items():
+        # Nodes caught in a parent cycle are unreachable from any root
+        values = expected.get(pk)
+        if values is None:
+            continue
+        if any(getattr(node, field) != value for field, value in values.items()):
+            for field, value in values.items():
+                setattr(node, field, value)
+            stale.append(node)
+
+    with transaction.atomic(using=using):
+        manager.bulk_update(stale, TREE_FIELDS, batch_size=500)
+    return len(stale)
+
+
+def subtree_filter(category, prefix='categories__'):
+    """
+    ``Q`` matching rows linked to ``category`` or any of its descendants,
+    e.g. ``Content.objects.filter(subtree_filter(category))``
+    """
+    return Q(**{
+        f'{prefix}tree_id': category.tree_id,
+        f'{prefix}lft__gte': category.lft,
+        f'{prefix}lft__lte': category.rght,
+    })
+
+
+def subtree_articles(category, queryset=None):
+    """
+    Published articles in ``category`` or any subcategory, each listed once
+    """
+    if queryset is None:
+        queryset = counted_articles()
+    if category.is_leaf_node():
+        # No subcategories, the plain join is cheaper than the range
+        return queryset.filter(categories=category)
+    return queryset.filter(
+        pk__in=queryset.model.categories.through.objects
+        .filter(subtree_filter(category, prefix='category__'))
+        .values('content_id')
+    )
+
+
+def breadcrumbs(category):
+    """Ancestors of ``category`` from the top-level category down, one query"""
+    return list(category.get_ancestors())
+
+
+def tree_neighbours(category, limit=None):
+    """
+    Parent, siblings and children of ``category`` from one query. Top-level
+    categories have no parent and no siblings.
+    """
+    from .models import Category
+
+    condition = Q(parent_id=category.pk)
+    if category.parent_id is not None:
+        condition |= Q(pk=category.parent_id) | Q(parent_id=category.parent_id)
+    rows = Category.objects.filter(condition).exclude(pk=category.pk).order_by('name')
+
+    parent, siblings, children = None, [], []
+    for row in rows:
+        if row.pk == category.parent_id:
+            parent = row
+        elif row.parent_id == category.pk:
+            children.append(row)
+        else:
+            siblings.append(row)
+    if limit is not None:
+        siblings, children = siblings[:limit], children[:limit]
+    return TreeNeighbours(parent=parent, siblings=siblings, children=children)
@@ -0,0 +1,199 @@
+"""
+Persisted content-type classification
+
+Articles are classified as Person, Place, Event or Cultural (or plain
+Article) by counting keywords in the title, body, excerpt, category and tag
+names. Events also get a sub-type ('Festival'), cultural articles the kind
+of cultural element ('Dance', 'Cuisine', ...) and personalities a
+profession.
+
+The scan lowercases the full article HTML, so it runs once when an article
+or its categories and tags change (see app/signals.py), and the result is
+stored in ``Content.detected_type``, ``detected_subtype`` and
+``profession``. Templates and helpers read the columns, and listings can
+filter by type in SQL. An empty ``detected_type`` means the article has not
+been classified yet. The migration adding the columns classifies existing
+articles, run ``python manage.py classify_content`` after bulk imports and
+after renaming categories or tags.
+"""
+from collections import namedtuple
+
+from django.apps import apps as global_apps
+
+# Content fields the classification reads, besides category and tag names
+CLASSIFIED_FIELDS = {'title', 'content', 'excerpt'}
+
+# Content columns the classification is stored in
+CLASSIFICATION_FIELDS = ['detected_type', 'detected_subtype', 'profession']
+
+# Northeast India specific content type detection keywords
+PERSON_KEYWORDS = [
+    'biography', 'personality', 'leader', 'artist', 'writer', 'politician',
+    'musician', 'dancer', 'activist', 'freedom fighter', 'chief minister',
+    'governor', 'poet', 'author', 'singer', 'actor', 'filmmaker'
+]
+
+PLACE_KEYWORDS = [
+    'city', 'town', 'village', 'district', 'state', 'river', 'mountain',
+    'hill', 'valley', 'lake', 'park', 'sanctuary', 'temple', 'monastery',
+    'palace', 'fort', 'archaeological', 'tourist', 'destination', 'capital'
+]
+
+EVENT_KEYWORDS = [
+    'festival', 'celebration', 'ceremony', 'tradition', 'ritual', 'dance',
+    'music', 'cultural', 'harvest', 'spring', 'new year', 'religious',
+    'tribal', 'community', 'annual', 'seasonal'
+]
+
+CULTURAL_KEYWORDS = [
+    'art', 'craft', 'cuisine', 'food', 'dish', 'recipe', 'attire', 'dress',
+    'costume', 'language', 'dialect', 'literature', 'folklore', 'legend',
+    'tradition', 'custom', 'belief', 'practice', 'heritage'
+]
+
+PROFESSIONS = {
+    'politician': ['politician', 'chief minister', 'minister', 'mla', 'mp', 'leader'],
+    'artist': ['artist', 'painter', 'sculptor'],
+    'musician': ['musician', 'singer', 'composer'],
+    'writer': ['writer', 'author', 'poet', 'novelist'],
+    'actor': ['actor', 'actress', 'film'],
+    'activist': ['activist', 'social worker'],
+    'sportsperson': ['athlete', 'sports', 'player', 'boxer'],
+    'freedom fighter': ['freedom fighter', 'revolutionary'],
+    'educator': ['teacher', 'professor', 'educator']
+}
+
+FESTIVAL_KEYWORDS = ['festival', 'celebration', 'fest', 'puja', 'bihu', 'hornbill']
+
+CULTURAL_TYPES = {
+    'Tradition': ['tradition', 'custom', 'ritual'],
+    'Art': ['art', 'craft', 'handicraft', 'weaving'],
+    'Cuisine': ['food', 'dish', 'cuisine', 'recipe'],
+    'Dance': ['dance', 'dancing'],
+    'Music': ['music', 'song', 'instrument'],
+    'Attire': ['dress', 'costume', 'attire', 'clothing'],
+    'Language': ['language', 'dialect']
+}
+
+Classification = namedtuple('Classification', CLASSIFICATION_FIELDS)
+
+
+def _names(article, field):
+    return [obj.name.lower() for obj in getattr(article, field).all()]
+
+
+def detect_type(article):
+    """
+    Detect the primary content type of an article based on categories, tags, and content
+    """
+    title_lower = article.title.lower()
+    content_lower = article.content.lower() if article.content else ''
+    excerpt_lower = article.excerpt.lower() if article.excerpt else ''
+    categories = _names(article, 'categories')
+    tags = _names(article, 'tags')
+
+    # Combine all text for analysis
+    all_text = f"{title_lower} {content_lower} {excerpt_lower} {' '.join(categories)} {' '.join(tags)}"
+
+    scores = {
+        'Person': sum(1 for keyword in PERSON_KEYWORDS if keyword in all_text),
+        'Place': sum(1 for keyword in PLACE_KEYWORDS if keyword in all_text),
+        'Event': sum(1 for keyword in EVENT_KEYWORDS if keyword in all_text),
+        'Cultural': sum(1 for keyword in CULTURAL_KEYWORDS if keyword in all_text),
+    }
+
+    if max(scores.values()) > 0:
+        return max(scores, key=scores.get)
+    return 'Article'  # Default type
+
+
+def detect_profession(article):
+    """Extract profession/occupation from article content"""
+    content = article.content.lower() if article.content else ''
+    combined_text = f"{article.title.lower()} {content}"
+
+    for profession, keywords in PROFESSIONS.items():
+        if any(keyword in combined_text for keyword in keywords):
+            return profession.title()
+    return None
+
+
+def _terms(article):
+    return [article.title.lower()] + _names(article, 'categories') + _names(article, 'tags')
+
+
+def is_festival(article):
+    """Check if article is specifically about a festival"""
+    return any(keyword in term for term in _terms(article) for keyword in FESTIVAL_KEYWORDS)
+
+
+def detect_cultural_type(article):
+    """Get specific cultural element type"""
+    all_terms = _terms(article)
+    for cultural_type, keywords in CULTURAL_TYPES.items():
+        if any(keyword in term for term in all_terms for keyword in keywords):
+            return cultural_type
+    return None
+
+
+def classify(article):
+    """Classify an article, reading its categories and tags"""
+    detected_type = detect_type(article)
+    subtype = profession = ''
+    if detected_type == 'Event' and is_festival(article):
+        subtype = 'Festival'
+    elif detected_type == 'Cultural':
+        subtype = detect_cultural_type(article) or ''
+    elif detected_type == 'Person':
+        profession = detect_profession(article) or ''
+    return Classification(detected_type, subtype, profession)
+
+
+def classify_content(content, using=None):
+    """
+    Classify ``content`` and store the result if it changed, without
+    sending save signals. Returns the classification.
+    """
+    result = classify(content)
+    current = Classification(*(getattr(content, field) for field in CLASSIFICATION_FIELDS))
+    if result != current:
+        for field, value in result._asdict().items():
+            setattr(content, field, value)
+        type(content)._default_manager.using(using or content._state.db).filter(pk=content.pk).update(
+            **result._asdict()
+        )
+    return result
+
+
+def classify_all(apps=global_apps, using=None, batch_size=500, only_missing=False):
+    """
+    Classify every article (or only unclassified ones) in batches and
+    return how many rows changed
+    """
+    Content = apps.get_model('app', 'Content')
+    manager = Content._default_manager.db_manager(using)
+    articles = manager.order_by('pk')
+    if only_missing:
+        articles = articles.filter(detected_type='')
+
+    changed = 0
+    last_pk = 0
+    while True:
+        # Keyset batches, rows classified in one batch may leave the filter
+        batch = list(
+            articles.filter(pk__gt=last_pk)
+            .only('pk', 'title', 'content', 'excerpt', *CLASSIFICATION_FIELDS)
+            .prefetch_related('categories', 'tags')[:batch_size]
+        )
+        if not batch:
+            return changed
+        stale = []
+        for article in batch:
+            result = classify(article)
+            if result != Classification(*(getattr(article, field) for field in CLASSIFICATION_FIELDS)):
+                for field, value in result._asdict().items():
+                    setattr(article, field, value)
+                stale.append(article)
+        manager.bulk_update(stale, CLASSIFICATION_FIELDS)
+        changed += len(stale)
+        last_pk = batch[-1].pk
@@ -0,0 +1,108 @@
+"""
+Conditional GET for read views
+
+Read views declare a validator next to them and are wrapped with
+``@conditional(validator)``. A validator takes the view's arguments and
+returns what the page is built from, usually version stamps read with
+``stamps()`` (see app/caching.py), or None to skip validation. No query
+runs before the comparison.
+
+The wrapper turns the validator's result and the URL into a weak ETag. The
+``Last-Modified`` date is when that ETag was first served. A request whose
+``If-None-Match`` or ``If-Modified-Since`` still matches gets a
+``304 Not Modified`` without running the view, its queries or its template.
+Otherwise both headers are added to the rendered page.
+
+A revalidated article is still a page view. The article a page counts
+(``page_cache.count_view``) is remembered with its ETag and counted on
+every 304, as the page cache does when it serves the page. Until it is
+known, for instance after a cache eviction, the view runs and counts itself.
+
+Only anonymous requests without pending messages are validated, the same
+requests the full-page cache serves (app/page_cache.py), which keeps these
+validators on the pages it stores. Signed-in pages show notification counts
+and per-user controls that change without any stamp being bumped.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .caching import get_versions
+from .page_cache import is_cacheable_request
+from .popularity import is_countable, record_view
+
+# How long the first-served date of an ETag is remembered
+VALIDATOR_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def stamps(*names):
+    """Current values of the version stamps ``names``, for validators"""
+    versions = get_versions(names)
+    return [versions[name] for name in names]
+
+
+def make_etag(request, parts):
+    url = request.build_absolute_uri()
+    digest = hashlib.md5(':'.join(map(str, [url, *parts])).encode('utf-8')).hexdigest()
+    return f'W/"{digest}"'
+
+
+def first_served(etag):
+    """When ``etag`` was first served, as a timestamp"""
+    key = f'validator:{etag}'
+    timestamp = cache.get(key)
+    if timestamp is None:
+        cache.add(key, int(time.time()), VALIDATOR_TIMEOUT)
+        timestamp = cache.get(key) or int(time.time())
+    return timestamp
+
+
+def _counted_view_key(etag):
+    return f'validator-view:{etag}'
+
+
+def _add_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Revalidate on every use, the stamps may change at any moment
+    patch_cache_control(response, max_age=0, must_revalidate=True)
+    return response
+
+
+def conditional(validator):
+    """
+    Answer anonymous GET and HEAD requests for an unchanged page with a 304
+    before running the view, see the module docstring
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if not is_cacheable_request(request):
+                return view(request, *args, **kwargs)
+            parts = validator(request, *args, **kwargs)
+            if parts is None:
+                return view(request, *args, **kwargs)
+
+            etag = make_etag(request, parts)
+            last_modified = first_served(etag)
+            not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            # 0 when the page counts no views, None when not known yet
+            counted_view = cache.get(_counted_view_key(etag)) if not_modified is not None else None
+            if counted_view is not None:
+                if counted_view and is_countable(request):
+                    record_view(counted_view)
+                return _add_validators(not_modified, etag, last_modified)
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.has_header('ETag'):
+                cache.set(_counted_view_key(etag), getattr(response, 'counted_view', None) or 0, VALIDATOR_TIMEOUT)
+                if not_modified is not None:
+                    return _add_validators(not_modified, etag, last_modified)
+                _add_validators(response, etag, last_modified)
+            return response
+        return wrapped
+    return decorator
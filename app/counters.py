@@ -0,0 +1,256 @@
+"""
+Denormalized published-article counters
+
+``Category.published_count``, ``Tag.published_count``, ``State.published_count``
+and the ``StateCategoryCount`` matrix hold how many published, approved
+articles each category, tag, state and state/category pair has, so listing
+pages, sitemaps and suggestion widgets read a column instead of running a
+COUNT per row.
+
+The counters are adjusted with ``F()`` updates from the Content signals in
+``app/signals.py`` (status changes, deletes and m2m changes on categories,
+tags and states). Anything that bypasses signals (``bulk_create``,
+``QuerySet.update``, raw SQL) must be followed by ``reconcile_counts()``, or
+``python manage.py reconcile_counts``.
+"""
+from collections import Counter, defaultdict
+from itertools import product
+
+from django.apps import apps as global_apps
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+# Articles that are counted, matches the public listing pages
+COUNTED_FILTER = {'content_type': 'article', 'published': True, 'review_status': 'approved'}
+
+# Content fields that decide whether an article is counted
+COUNTED_FIELDS = set(COUNTED_FILTER)
+
+# Content m2m field -> column of the related model on the through table
+COUNTER_FIELDS = {
+    'categories': 'category_id',
+    'tags': 'tag_id',
+    'states': 'state_id',
+}
+
+
+def is_counted(content):
+    """Whether an article instance contributes to the counters"""
+    return all(getattr(content, field) == value for field, value in COUNTED_FILTER.items())
+
+
+def counted_articles(apps=global_apps, using=None):
+    """Queryset of the articles that contribute to the counters"""
+    Content = apps.get_model('app', 'Content')
+    return Content._default_manager.db_manager(using).filter(**COUNTED_FILTER)
+
+
+def _through(field, apps=global_apps):
+    Content = apps.get_model('app', 'Content')
+    return Content._meta.get_field(field).remote_field.through
+
+
+def _related_model(field, apps=global_apps):
+    Content = apps.get_model('app', 'Content')
+    return Content._meta.get_field(field).related_model
+
+
+def through_field(sender):
+    """Return the Content m2m field name for a through model, or None"""
+    for field in COUNTER_FIELDS:
+        if _through(field) is sender:
+            return field
+    return None
+
+
+def _links(field, content_ids, using):
+    """``{content_id: [related_id, ...]}`` for the given articles"""
+    column = COUNTER_FIELDS[field]
+    links = defaultdict(list)
+    rows = (
+        _through(field).objects.using(using)
+        .filter(content_id__in=content_ids)
+        .values_list('content_id', column)
+    )
+    for content_id, related_id in rows:
+        links[content_id].append(related_id)
+    return links
+
+
+def _apply(field, increments, using):
+    """Add ``increments[pk]`` to ``published_count`` of each related row"""
+    model = _related_model(field)
+    by_amount = defaultdict(list)
+    for pk, amount in increments.items():
+        if amount:
+            by_amount[amount].append(pk)
+    for amount, ids in by_amount.items():
+        model.objects.using(using).filter(pk__in=ids).update(
+            published_count=F('published_count') + amount
+        )
+
+
+def _apply_matrix(increments, using):
+    """Add ``increments[(state_id, category_id)]`` to the matrix cells"""
+    from .models import StateCategoryCount
+
+    increments = {pair: amount for pair, amount in increments.items() if amount}
+    if not increments:
+        return
+    StateCategoryCount.objects.using(using).bulk_create(
+        [StateCategoryCount(state_id=state_id, category_id=category_id) for state_id, category_id in increments],
+        ignore_conflicts=True,
+    )
+    by_amount = defaultdict(list)
+    for pair, amount in increments.items():
+        by_amount[amount].append(pair)
+    for amount, pairs in by_amount.items():
+        condition = Q()
+        for state_id, category_id in pairs:
+            condition |= Q(state_id=state_id, category_id=category_id)
+        StateCategoryCount.objects.using(using).filter(condition).update(count=F('count') + amount)
+
+
+def adjust_for_content(content_id, delta, using=None):
+    """
+    An article started (``delta=1``) or stopped (``delta=-1``) being counted:
+    adjust every category, tag, state and matrix cell it is linked to
+    """
+    with transaction.atomic(using=using):
+        links = {field: _links(field, [content_id], using)[content_id] for field in COUNTER_FIELDS}
+        for field, related_ids in links.items():
+            _apply(field, {pk: delta for pk in related_ids}, using)
+        _apply_matrix(
+            {pair: delta for pair in product(links['states'], links['categories'])},
+            using,
+        )
+
+
+def counted_link_pairs(field, instance, reverse, pk_set, using=None):
+    """
+    Resolve an m2m change to ``[(content_id, related_id), ...]`` for counted
+    articles only. ``pk_set=None`` means every current link (``clear()``).
+    """
+    column = COUNTER_FIELDS[field]
+    links = _through(field).objects.using(using)
+    if reverse:
+        content_ids = pk_set
+        if content_ids is None:
+            content_ids = links.filter(**{column: instance.pk}).values('content_id')
+        counted = counted_articles(using=using).filter(pk__in=content_ids)
+        return [(content_id, instance.pk) for content_id in counted.values_list('pk', flat=True)]
+
+    if not is_counted(instance):
+        return []
+    if pk_set is None:
+        pk_set = links.filter(content_id=instance.pk).values_list(column, flat=True)
+    return [(instance.pk, related_id) for related_id in pk_set]
+
+
+def existing_link_pairs(field, pairs, using=None):
+    """Keep only the pairs that are currently linked, for ``remove()``"""
+    if not pairs:
+        return []
+    column = COUNTER_FIELDS[field]
+    condition = Q()
+    for content_id, related_id in pairs:
+        condition |= Q(content_id=content_id, **{column: related_id})
+    return list(_through(field).objects.using(using).filter(condition).values_list('content_id', column))
+
+
+def adjust_for_links(field, pairs, delta, using=None):
+    """
+    Counted articles gained (``delta=1``) or lost (``delta=-1``) the links in
+    ``pairs``: adjust the related rows and the affected matrix cells
+    """
+    if not pairs:
+        return
+    with transaction.atomic(using=using):
+        increments = Counter()
+        for _, related_id in pairs:
+            increments[related_id] += delta
+        _apply(field, increments, using)
+
+        if field not in ('categories', 'states'):
+            return
+        other = 'states' if field == 'categories' else 'categories'
+        other_links = _links(other, {content_id for content_id, _ in pairs}, using)
+        cells = Counter()
+        for content_id, related_id in pairs:
+            for other_id in other_links[content_id]:
+                pair = (related_id, other_id) if field == 'states' else (other_id, related_id)
+                cells[pair] += delta
+        _apply_matrix(cells, using)
+
+
+def reconcile_counts(apps=global_apps, using=None):
+    """
+    Rebuild every counter from scratch and return how many rows had drifted,
+    e.g. ``{'categories': 0, 'tags': 2, 'states': 0, 'matrix': 5}``
+    """
+    counted = counted_articles(apps, using).values('pk')
+    drift = {}
+
+    with transaction.atomic(using=using):
+        for field, column in COUNTER_FIELDS.items():
+            model = _related_model(field, apps)
+            expected = dict(
+                _through(field, apps).objects.using(using)
+                .filter(content_id__in=counted)
+                .values(column)
+                .annotate(total=Count('content_id'))
+                .values_list(column, 'total')
+            )
+            stale = []
+            for obj in model._default_manager.using(using).only('pk', 'published_count'):
+                total = expected.get(obj.pk, 0)
+                if obj.published_count != total:
+                    obj.published_count = total
+                    stale.append(obj)
+            model._default_manager.using(using).bulk_update(stale, ['published_count'], batch_size=500)
+            drift[field] = len(stale)
+
+        StateCategoryCount = apps.get_model('app', 'StateCategoryCount')
+        expected = {
+            (state_id, category_id): total
+            for state_id, category_id, total in (
+                counted_articles(apps, using)
+                .filter(states__isnull=False, categories__isnull=False)
+                .values('states', 'categories')
+                .annotate(total=Count('pk', distinct=True))
+                .values_list('states', 'categories', 'total')
+            )
+        }
+        cells = StateCategoryCount._default_manager.using(using)
+        stale, obsolete = [], []
+        for cell in cells.all():
+            pair = (cell.state_id, cell.category_id)
+            total = expected.pop(pair, 0)
+            if not total:
+                obsolete.append(cell.pk)
+            elif cell.count != total:
+                cell.count = total
+                stale.append(cell)
+        cells.bulk_update(stale, ['count'], batch_size=500)
+        cells.filter(pk__in=obsolete).delete()
+        cells.bulk_create(
+            [StateCategoryCount(state_id=state_id, category_id=category_id, count=total)
+             for (state_id, category_id), total in expected.items()],
+            batch_size=500,
+        )
+        drift['matrix'] = len(stale) + len(obsolete) + len(expected)
+
+    return drift
+
+
+def state_category_counts(state):
+    """``{Category: count}`` for a state, ordered by category name"""
+    from .models import StateCategoryCount
+
+    cells = (
+        StateCategoryCount.objects
+        .filter(state=state, count__gt=0)
+        .select_related('category')
+        .order_by('category__name')
+    )
+    return {cell.category: cell.count for cell in cells}
@@ -0,0 +1,184 @@
+"""
+Category and tag directories
+
+``get_category_directory`` builds everything ``category_list`` renders (main
+categories with their subcategories and latest article, the most popular
+categories and the A-Z index) from a single query over Category, reading
+the maintained ``published_count`` column, then groups it in Python. The
+assembled directory is cached until a category changes or content is saved,
+published or re-categorized.
+
+``build_tag_cloud`` does the same for ``tag_list`` (cloud size buckets,
+alphabet index and popular tags). The tags page caches its rendered HTML
+with ``{% cache %}`` keyed on ``directory_cache_version()``, and only
+evaluates the cloud on a cache miss.
+"""
+import string
+import zlib
+from collections import defaultdict, namedtuple
+
+from django.core.cache import cache
+from django.db.models import OuterRef, Subquery
+
+from .caching import CONTENT_VERSION, TAXONOMY_VERSION, get_version
+from .counters import counted_articles
+
+DIRECTORY_CACHE_TIMEOUT = 60 * 60
+
+POPULAR_CATEGORY_LIMIT = 8
+
+POPULAR_TAG_LIMIT = 9
+
+# Bootstrap colour classes for the tag cloud, picked from the tag slug
+TAG_COLORS = ['primary', 'secondary', 'success', 'info', 'warning']
+
+ArticleLink = namedtuple('ArticleLink', ['title', 'slug'])
+
+CategoryEntry = namedtuple('CategoryEntry', [
+    'id', 'name', 'slug', 'description', 'parent_id',
+    'article_count', 'latest_article', 'subcategories',
+])
+
+CategoryDirectory = namedtuple('CategoryDirectory', [
+    'main_categories', 'popular_categories', 'categories_by_letter', 'featured_category',
+])
+
+TagEntry = namedtuple('TagEntry', ['name', 'slug', 'count', 'size', 'color'])
+
+TagCloud = namedtuple('TagCloud', ['tags', 'alphabet', 'tags_by_letter', 'popular_tags'])
+
+
+def directory_cache_version():
+    """Cache version shared by the category directory and the tag cloud"""
+    return f'{get_version(CONTENT_VERSION)}:{get_version(TAXONOMY_VERSION)}'
+
+
+def build_category_directory():
+    """
+    Build the category directory from one query
+    """
+    from .models import Category
+
+    latest = (
+        counted_articles()
+        .filter(categories=OuterRef('pk'))
+        .order_by('-published_at')
+    )
+    rows = (
+        Category.objects
+        .annotate(
+            latest_title=Subquery(latest.values('title')[:1]),
+            latest_slug=Subquery(latest.values('slug')[:1]),
+        )
+        .values_list(
+            'id', 'name', 'slug', 'description', 'parent_id',
+            'published_count', 'latest_title', 'latest_slug',
+        )
+        .order_by('name')
+    )
+
+    children = defaultdict(list)
+    entries = []
+    for pk, name, slug, description, parent_id, count, latest_title, latest_slug in rows:
+        entry = CategoryEntry(
+            id=pk,
+            name=name,
+            slug=slug,
+            description=description,
+            parent_id=parent_id,
+            article_count=count,
+            latest_article=ArticleLink(latest_title, latest_slug) if latest_slug else None,
+            subcategories=children[pk],
+        )
+        entries.append(entry)
+        if parent_id is not None:
+            children[parent_id].append(entry)
+
+    main_categories = [entry for entry in entries if entry.parent_id is None]
+
+    popular_categories = sorted(
+        (entry for entry in entries if entry.article_count > 0),
+        key=lambda entry: entry.article_count,
+        reverse=True,
+    )[:POPULAR_CATEGORY_LIMIT]
+
+    by_letter = defaultdict(list)
+    for entry in entries:
+        letter = entry.name[:1].upper()
+        if letter in string.ascii_uppercase:
+            by_letter[letter].append(entry)
+    categories_by_letter = [
+        {'letter': letter, 'categories': by_letter[letter]}
+        for letter in string.ascii_uppercase
+        if by_letter[letter]
+    ]
+
+    return CategoryDirectory(
+        main_categories=main_categories,
+        popular_categories=popular_categories,
+        categories_by_letter=categories_by_letter,
+        featured_category=popular_categories[0] if popular_categories else None,
+    )
+
+
+def get_category_directory():
+    """
+    Return the cached category directory, rebuilding it after category or
+    content changes
+    """
+    key = f'category_directory:{directory_cache_version()}'
+    directory = cache.get(key)
+    if directory is None:
+        directory = build_category_directory()
+        cache.set(key, directory, DIRECTORY_CACHE_TIMEOUT)
+    return directory
+
+
+def tag_size(count):
+    """Tag cloud size bucket (1-5) for an article count"""
+    if count == 0:
+        return 1
+    if count < 5:
+        return 2
+    if count < 10:
+        return 3
+    if count < 20:
+        return 4
+    return 5
+
+
+def tag_color(slug):
+    """Stable tag cloud colour, the same tag always gets the same colour"""
+    return TAG_COLORS[zlib.crc32(slug.encode('utf-8')) % len(TAG_COLORS)]
+
+
+def build_tag_cloud():
+    """
+    Build the tag cloud, alphabet index and popular tags from one query
+    """
+    from .models import Tag
+
+    tags = [
+        TagEntry(name=name, slug=slug, count=count, size=tag_size(count), color=tag_color(slug))
+        for name, slug, count in Tag.objects.values_list('name', 'slug', 'published_count').order_by('name')
+    ]
+
+    by_letter = defaultdict(list)
+    for tag in tags:
+        letter = tag.name[:1].upper()
+        if letter in string.ascii_uppercase:
+            by_letter[letter].append(tag)
+
+    return TagCloud(
+        tags=tags,
+        alphabet=[
+            {'letter': letter, 'has_tags': bool(by_letter[letter])}
+            for letter in string.ascii_uppercase
+        ],
+        tags_by_letter=[
+            {'letter': letter, 'tags': by_letter[letter]}
+            for letter in string.ascii_uppercase
+            if by_letter[letter]
+        ],
+        popular_tags=sorted(tags, key=lambda tag: tag.count, reverse=True)[:POPULAR_TAG_LIMIT],
+    )
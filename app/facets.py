@@ -0,0 +1,94 @@
+"""
+Faceted counts for article listings
+
+For any filtered Content queryset, ``get_facets`` returns how many of the
+matching articles fall in each category, state and tag. The three counts
+come from a single UNION ALL of grouped aggregations over the M2M through
+tables, and results are cached per normalized filter signature and content
+version, so faceted browsing costs at most one query per distinct filter.
+"""
+import hashlib
+import json
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db.models import Count, F, Value, CharField
+
+from .caching import CONTENT_VERSION, get_version
+from .typeahead import normalize
+
+FACET_CACHE_TIMEOUT = 60 * 15
+
+Facet = namedtuple('Facet', ['id', 'name', 'slug', 'count'])
+
+# Facet group -> (Content m2m field, related model field on the through table)
+FACET_FIELDS = {
+    'categories': ('categories', 'category'),
+    'states': ('states', 'state'),
+    'tags': ('tags', 'tag'),
+}
+
+
+def filter_signature(**filters):
+    """
+    Build a stable cache signature from the filters that produced a queryset.
+    Empty values are dropped and the search query is normalized, so
+    ``?q=Hornbill`` and ``?q=hornbill&tag=`` share one cache entry.
+    """
+    normalized = {}
+    for key, value in filters.items():
+        if value in (None, '', [], ()):
+            continue
+        normalized[key] = normalize(value) if key == 'q' else str(value)
+    payload = json.dumps(normalized, sort_keys=True)
+    return hashlib.md5(payload.encode('utf-8')).hexdigest()
+
+
+def compute_facets(queryset):
+    """
+    Count matching articles per category, state and tag in one query
+    """
+    from .models import Content
+
+    content_ids = queryset.order_by().values('pk')
+
+    grouped = []
+    for group, (field_name, related_name) in FACET_FIELDS.items():
+        through = Content._meta.get_field(field_name).remote_field.through
+        grouped.append(
+            through.objects
+            .filter(content__in=content_ids)
+            .values(f'{related_name}_id')
+            .annotate(
+                group=Value(group, output_field=CharField()),
+                facet_id=F(f'{related_name}_id'),
+                name=F(f'{related_name}__name'),
+                slug=F(f'{related_name}__slug'),
+                count=Count('pk'),
+            )
+            .values_list('group', 'facet_id', 'name', 'slug', 'count')
+        )
+
+    facets = {group: [] for group in FACET_FIELDS}
+    for group, facet_id, name, slug, count in grouped[0].union(*grouped[1:], all=True):
+        facets[group].append(Facet(facet_id, name, slug, count))
+
+    for items in facets.values():
+        items.sort(key=lambda facet: (-facet.count, facet.name))
+    return facets
+
+
+def get_facets(queryset, signature):
+    """
+    Return cached facet counts for ``queryset``, keyed by its filter signature.
+    ``queryset`` may be a callable so expensive querysets (e.g. full-text
+    search) are only built on a cache miss.
+    """
+    cache_key = f'facets:{get_version(CONTENT_VERSION)}:{signature}'
+    facets = cache.get(cache_key)
+    if facets is None:
+        if callable(queryset):
+            queryset = queryset()
+        facets = compute_facets(queryset)
+        cache.set(cache_key, facets, FACET_CACHE_TIMEOUT)
+    return facets
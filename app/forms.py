@@ -244,6 +244,11 @@ class ArticleForm(forms.ModelForm):
             }),
         }
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Category.objects lists the tree, the picker lists names alphabetically
+        self.fields['categories'].queryset = Category.objects.order_by('name')
+    
     def clean_title(self):
         """Ensure the title can generate a unique slug"""
         title = self.cleaned_data['title']
@@ -0,0 +1,99 @@
+"""
+Rendered article fragments
+
+The article page spends most of its render time in blocks that are the same
+for every reader: the body with its categories and metadata, the schema.org
+JSON-LD (content type detection, keywords, mentions, reading time) and the
+social tags. ``{% article_fragment %}`` (app/templatetags/fragment_tags.py)
+caches those blocks per article.
+
+A fragment is stored as ``(stamp, html)`` under a key without the stamp. The
+stamp combines the article's own version stamp, bumped by the Content
+signals on every save and category, tag or state change (so also by
+``ContentRevision.apply_to_content``), the taxonomy version stamp and
+``updated_at``. A stale entry is therefore detected on read rather than
+deleted on write.
+
+Only one request renders a given fragment at a time: the first to notice a
+missing or stale entry takes a short lock with ``cache.add``. Concurrent
+requests serve the previous version while it renders, or wait briefly for
+the new one when there is none (a newly published article), instead of all
+rendering it at once.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+
+from .caching import TAXONOMY_VERSION, bump_version, get_version
+
+FRAGMENT_TIMEOUT = 60 * 60 * 24
+
+# How long a renderer may hold the lock before another request takes over
+LOCK_TIMEOUT = 10
+
+# Requests waiting for a first render poll for up to WAIT_STEPS * WAIT_INTERVAL seconds
+WAIT_INTERVAL = 0.05
+WAIT_STEPS = 20
+
+
+def article_version_name(pk):
+    return f'content:{pk}'
+
+
+def invalidate_article(pk):
+    """Mark every cached fragment of an article as stale"""
+    bump_version(article_version_name(pk))
+
+
+def article_stamp(article):
+    """Version of an article's rendered fragments, computed once per instance"""
+    stamp = getattr(article, '_fragment_stamp', None)
+    if stamp is None:
+        updated = article.updated_at.timestamp() if article.updated_at else 0
+        stamp = f'{get_version(article_version_name(article.pk))}:{get_version(TAXONOMY_VERSION)}:{updated}'
+        article._fragment_stamp = stamp
+    return stamp
+
+
+def fragment_key(article, name, vary_on=()):
+    key = f'fragment:{name}:{article.pk}'
+    if vary_on:
+        digest = hashlib.md5(':'.join(str(value) for value in vary_on).encode('utf-8')).hexdigest()
+        key = f'{key}:{digest}'
+    return key
+
+
+def get_or_render(key, stamp, render, timeout=FRAGMENT_TIMEOUT):
+    """
+    Return the fragment cached under ``key`` if it was rendered for
+    ``stamp``, otherwise call ``render()`` under the render lock and store it
+    """
+    cached = cache.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, stamp, LOCK_TIMEOUT):
+        # Another request is rendering, serve the previous version meanwhile
+        if cached is not None:
+            return cached[1]
+        for _ in range(WAIT_STEPS):
+            time.sleep(WAIT_INTERVAL)
+            cached = cache.get(key)
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+        # The renderer is slow or gone, render without storing
+        return render()
+
+    try:
+        html = render()
+        cache.set(key, (stamp, html), timeout)
+    finally:
+        cache.delete(lock_key)
+    return html
+
+
+def article_fragment(article, name, render, vary_on=()):
+    """Cached output of ``render()`` for one named fragment of ``article``"""
+    return get_or_render(fragment_key(article, name, vary_on), article_stamp(article), render)
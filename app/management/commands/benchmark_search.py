@@ -0,0 +1,166 @@
+"""
+Management command to benchmark search and listing latency
+
+Replays a weighted query mix against article_search, article_list and
+article_search_htmx through the test client and reports p50/p95/p99
+latency, SQL query counts and rows scanned per view. Run it before and
+after a search change (ideally on a corpus from generate_search_corpus)
+to compare the two objectively.
+
+Rows scanned comes from EXPLAIN ANALYZE on PostgreSQL. SQLite has no row
+counts, so there the report shows how many queries needed a full table scan
+(from EXPLAIN QUERY PLAN) instead.
+"""
+
+import json
+import math
+import random
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+# (query, weight): popular terms, multi-word queries, prefixes and typos
+QUERY_MIX = [
+    ('hornbill', 10), ('bihu', 8), ('naga', 8), ('meghalaya', 6), ('kaziranga', 5),
+    ('hornbill festival', 5), ('living root bridges', 3), ('apatani weaving', 3),
+    ('tawang', 4), ('loktak', 3), ('chapchar kut', 2), ('muga silk', 2),
+    ('horn', 4), ('megh', 3), ('zir', 2),
+    ('hornbil', 2), ('arunachal pradash', 1), ('manipuri dnce', 1),
+]
+
+VIEWS = {
+    'article_search': ('app:article-search', 'q'),
+    'article_list': ('app:article-list', 'q'),
+    'article_search_htmx': ('app:article-search-htmx', 'q'),
+}
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def rows_scanned(queries):
+    """Estimate rows touched by the captured SELECT statements"""
+    total = 0
+    with connection.cursor() as cursor:
+        for query in queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            try:
+                if connection.vendor == 'postgresql':
+                    cursor.execute(f'EXPLAIN (ANALYZE, FORMAT JSON) {sql}')
+                    plan = cursor.fetchone()[0]
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                    total += _plan_rows(plan[0]['Plan'])
+                elif connection.vendor == 'sqlite':
+                    cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                    total += sum(1 for row in cursor.fetchall() if str(row[-1]).startswith('SCAN '))
+            except DatabaseError:
+                # Logged SQL is not always re-executable verbatim, skip it
+                continue
+    return total
+
+
+def _plan_rows(node):
+    rows = 0
+    if node.get('Node Type', '').endswith('Scan'):
+        rows += node.get('Actual Rows', 0) * node.get('Actual Loops', 1)
+    for child in node.get('Plans', []):
+        rows += _plan_rows(child)
+    return rows
+
+
+class Command(BaseCommand):
+    help = 'Benchmark search and listing latency with a replayed query mix'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per view')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for the query mix')
+        parser.add_argument(
+            '--view',
+            action='append',
+            choices=sorted(VIEWS),
+            help='Only benchmark these views (repeatable)',
+        )
+        parser.add_argument(
+            '--cold',
+            action='store_true',
+            help='Clear the cache before every request to measure uncached latency',
+        )
+        parser.add_argument(
+            '--scan-stats',
+            action='store_true',
+            help='Also report rows scanned (re-runs each query under EXPLAIN)',
+        )
+        parser.add_argument('--json', action='store_true', help='Print results as JSON')
+
+    @override_settings(ALLOWED_HOSTS=['testserver', '127.0.0.1', 'localhost'], DEBUG=False)
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        queries = [query for query, weight in QUERY_MIX for _ in range(weight)]
+        client = Client()
+        results = {}
+
+        for name in options['view'] or list(VIEWS):
+            url_name, param = VIEWS[name]
+            url = reverse(url_name)
+            latencies = []
+            query_counts = []
+            scanned = []
+
+            for _ in range(options['requests']):
+                query = rng.choice(queries)
+                if options['cold']:
+                    cache.clear()
+
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = client.get(url, {param: query})
+                    latencies.append((time.perf_counter() - started) * 1000)
+
+                if response.status_code != 200:
+                    self.stderr.write(f'{name} returned {response.status_code} for {query!r}')
+                query_counts.append(len(captured.captured_queries))
+                if options['scan_stats']:
+                    scanned.append(rows_scanned(captured.captured_queries))
+
+            results[name] = {
+                'requests': len(latencies),
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p95_ms': round(percentile(latencies, 95), 2),
+                'p99_ms': round(percentile(latencies, 99), 2),
+                'mean_queries': round(statistics.mean(query_counts), 2),
+                'max_queries': max(query_counts),
+                'mean_rows_scanned': round(statistics.mean(scanned), 1) if scanned else None,
+            }
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        scan_label = 'rows scanned' if connection.vendor == 'postgresql' else 'full scans'
+        self.stdout.write(self.style.SUCCESS(
+            f"Search benchmark ({connection.vendor}, {'cold' if options['cold'] else 'warm'} cache)\n"
+        ))
+        header = f"{'view':<22}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>10}{scan_label:>15}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for name, stats in results.items():
+            scanned = '-' if stats['mean_rows_scanned'] is None else stats['mean_rows_scanned']
+            self.stdout.write(
+                f"{name:<22}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}"
+                f"{stats['mean_queries']:>10}{scanned:>15}"
+            )
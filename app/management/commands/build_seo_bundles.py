@@ -0,0 +1,35 @@
+"""
+Management command to build the SEO metadata bundles of articles
+
+Computes the titles, descriptions, keywords, reading time, mentions and
+schema.org types of every article in batches (see app/seo_bundle.py) and
+stores them in Content.seo_bundle. Run after the migration that adds the
+field, after bulk imports that bypass the Content signals, after renaming
+categories, tags or states, and after bumping SEO_BUNDLE_VERSION.
+"""
+
+from django.core.management.base import BaseCommand
+from app.seo_bundle import build_all
+
+
+class Command(BaseCommand):
+    help = 'Precompute the SEO metadata bundle of every article'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Articles built per batch (default: 500)',
+        )
+        parser.add_argument(
+            '--only-missing',
+            action='store_true',
+            help='Only build missing or outdated bundles',
+        )
+
+    def handle(self, *args, **options):
+        changed = build_all(batch_size=options['batch_size'], only_missing=options['only_missing'])
+
+        # Pages render the same values from a bundle or on the fly, no cache to invalidate
+        self.stdout.write(self.style.SUCCESS(f'{changed} SEO bundles built'))
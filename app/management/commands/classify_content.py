@@ -0,0 +1,37 @@
+"""
+Management command to classify articles by content type
+
+Runs the keyword classifier (see app/classification.py) over every article
+in batches and stores the detected type, sub-type and profession. The
+classification migration runs it once, run it again after bulk imports that
+bypass the Content signals and after renaming categories or tags.
+"""
+
+from django.core.management.base import BaseCommand
+from app.caching import CONTENT_VERSION, bump_version
+from app.classification import classify_all
+
+
+class Command(BaseCommand):
+    help = 'Store the detected content type, sub-type and profession of every article'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Articles classified per batch (default: 500)',
+        )
+        parser.add_argument(
+            '--only-missing',
+            action='store_true',
+            help='Only classify articles that were never classified',
+        )
+
+    def handle(self, *args, **options):
+        changed = classify_all(batch_size=options['batch_size'], only_missing=options['only_missing'])
+
+        if changed:
+            # Cached pages were rendered with the old classification
+            bump_version(CONTENT_VERSION)
+        self.stdout.write(self.style.SUCCESS(f'{changed} articles classified'))
@@ -0,0 +1,221 @@
+"""
+Management command to bulk-generate a synthetic search corpus
+
+Creates a reproducible set of Northeast India articles (10k-500k rows) with
+realistic HTML bodies, categories, states and tags for benchmarking search
+and listing pages. Rows are written with bulk_create in batches, so signals
+do not fire; the classification, canonical paths, SEO bundles, related
+articles, search index, published counters and cache version stamps are
+refreshed once at the end instead.
+
+Generated articles use the ``corpus-`` slug prefix and can be removed with
+``--clear``.
+"""
+
+import random
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.text import slugify
+
+from app.caching import CONTENT_VERSION, bump_version
+from app.canonical import backfill
+from app.classification import classify_all
+from app.counters import reconcile_counts
+from app.models import Category, Content, State, Tag
+from app.related import refresh_related_content
+from app.search import rebuild_search_index
+from app.seo_bundle import build_all
+from app import redirects, suggestions, typeahead
+
+SLUG_PREFIX = 'corpus-'
+
+# Fixed reference date so the same seed always yields identical rows
+CORPUS_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+STATES = [
+    ('Arunachal Pradesh', 'Itanagar'), ('Assam', 'Dispur'), ('Manipur', 'Imphal'),
+    ('Meghalaya', 'Shillong'), ('Mizoram', 'Aizawl'), ('Nagaland', 'Kohima'),
+    ('Sikkim', 'Gangtok'), ('Tripura', 'Agartala'),
+]
+
+CATEGORIES = [
+    'Culture', 'History', 'Food', 'Travel', 'Art', 'Festivals', 'People',
+    'Places', 'Heritage', 'Wildlife', 'Music', 'Language',
+]
+
+TAGS = [
+    'Traditional', 'Heritage', 'Indigenous', 'Tribal', 'Wildlife', 'Nature',
+    'Tourism', 'Dance', 'Music', 'Cuisine', 'Craft', 'Religion', 'Language',
+    'Clothing', 'Weaving', 'Monastery', 'River', 'Tea', 'Bamboo', 'Handloom',
+]
+
+SUBJECTS = [
+    'Hornbill Festival', 'Bihu', 'Chapchar Kut', 'Sangai Festival', 'Losar',
+    'Wangala', 'Ziro Valley', 'Majuli', 'Loktak Lake', 'Kaziranga', 'Tawang Monastery',
+    'Living Root Bridges', 'Dzukou Valley', 'Ujjayanta Palace', 'Nongkhnum Island',
+    'Naga Morung', 'Manipuri Dance', 'Sattriya', 'Cheraw Dance', 'Khasi Hills',
+    'Garo Hills', 'Apatani Weaving', 'Muga Silk', 'Eri Silk', 'Bamboo Shoot Cuisine',
+    'Smoked Pork', 'Bhut Jolokia', 'Tea Gardens', 'Brahmaputra', 'Siang River',
+]
+
+PEOPLE = [
+    'Ao Naga', 'Angami', 'Khasi', 'Garo', 'Mizo', 'Meitei', 'Bodo', 'Mishing',
+    'Apatani', 'Adi', 'Nyishi', 'Lepcha', 'Bhutia', 'Tripuri', 'Reang', 'Karbi',
+]
+
+TITLE_PATTERNS = [
+    '{subject}', '{subject} of {state}', 'The {people} and the {subject}',
+    'History of {subject}', '{subject}: A Guide', 'Traditions of the {people}',
+    '{people} Festivals in {state}', 'Exploring {subject}',
+]
+
+SENTENCES = [
+    'The {people} of {state} have celebrated {subject} for generations.',
+    '{subject} draws visitors from across India every year.',
+    'Elders describe how {subject} shaped village life in {state}.',
+    'Local cuisine served during {subject} includes bamboo shoot and smoked meat.',
+    'Traditional weaving patterns of the {people} reflect stories of {subject}.',
+    'The capital, {capital}, hosts cultural programmes dedicated to {subject}.',
+    'Songs and dances of the {people} are performed with log drums and gongs.',
+    'Conservation efforts in {state} aim to protect {subject} for future generations.',
+    'Historians trace the origins of {subject} to early migrations into the hills.',
+    'Monsoon rains transform the landscape around {subject} into lush green valleys.',
+]
+
+HEADINGS = ['History', 'Culture', 'Significance', 'Celebrations', 'Getting There', 'See Also']
+
+
+class Command(BaseCommand):
+    help = 'Bulk-generate a reproducible synthetic article corpus for benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10000, help='Number of articles to create (10k-500k)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed, the same seed yields the same corpus')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per bulk insert')
+        parser.add_argument('--clear', action='store_true', help='Delete a previously generated corpus first')
+
+    def handle(self, *args, **options):
+        seed = options['seed']
+        count = options['count']
+        batch_size = options['batch_size']
+
+        if options['clear']:
+            deleted, _ = Content.objects.filter(slug__startswith=SLUG_PREFIX).delete()
+            self.stdout.write(self.style.WARNING(f'Deleted {deleted} rows from the previous corpus'))
+
+        author = self._get_author()
+        categories = self._get_or_create(Category, CATEGORIES)
+        tags = self._get_or_create(Tag, TAGS)
+        states = self._get_or_create_states()
+
+        start = Content.objects.filter(slug__startswith=SLUG_PREFIX).count()
+        created = 0
+
+        while created < count:
+            size = min(batch_size, count - created)
+            with transaction.atomic():
+                numbers = {}
+                rows = []
+                for number in range(start + created, start + created + size):
+                    row = self._build_article(random.Random(f'{seed}-{number}'), number, author, states)
+                    numbers[row.slug] = number
+                    rows.append(row)
+                Content.objects.bulk_create(rows, batch_size=batch_size)
+                rows = Content.objects.filter(slug__in=list(numbers)).only('pk', 'slug')
+                self._link(seed, numbers, rows, categories, tags, states)
+            created += size
+            self.stdout.write(f'  {created}/{count} articles')
+
+        # The bundles read the classification and the related lists the detected types
+        self.stdout.write('Classifying articles and storing canonical paths...')
+        classify_all(only_missing=True)
+        backfill()
+        self.stdout.write('Building SEO bundles and related articles...')
+        build_all(only_missing=True)
+        refresh_related_content()
+        self.stdout.write('Rebuilding search index and published counters...')
+        rebuild_search_index()
+        reconcile_counts()
+        for name in (CONTENT_VERSION, redirects.VERSION_NAME, typeahead.VERSION_NAME, suggestions.VERSION_NAME):
+            bump_version(name)
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully generated {created} articles'))
+
+    def _get_author(self):
+        author, _ = User.objects.get_or_create(
+            username='corpus-bot',
+            defaults={'email': 'corpus-bot@example.com'},
+        )
+        return author
+
+    def _get_or_create(self, model, names):
+        objects = []
+        for name in names:
+            obj, _ = model.objects.get_or_create(slug=slugify(name), defaults={'name': name})
+            objects.append(obj)
+        return objects
+
+    def _get_or_create_states(self):
+        states = []
+        for name, capital in STATES:
+            state, _ = State.objects.get_or_create(
+                slug=slugify(name),
+                defaults={'name': name, 'capital': capital, 'description': f'{name}, Northeast India'},
+            )
+            states.append(state)
+        return states
+
+    def _build_article(self, rng, number, author, states):
+        state = rng.choice(states)
+        words = {
+            'subject': rng.choice(SUBJECTS),
+            'people': rng.choice(PEOPLE),
+            'state': state.name,
+            'capital': state.capital or state.name,
+        }
+        title = f"{rng.choice(TITLE_PATTERNS).format(**words)} {number}"
+
+        paragraphs = []
+        for heading in rng.sample(HEADINGS, k=rng.randint(2, 4)):
+            paragraphs.append(f'<h2>{heading}</h2>')
+            for _ in range(rng.randint(1, 3)):
+                sentences = ' '.join(
+                    rng.choice(SENTENCES).format(**words) for _ in range(rng.randint(3, 6))
+                )
+                sentences = sentences.replace(words['subject'], f"<strong>{words['subject']}</strong>", 1)
+                paragraphs.append(f'<p>{sentences}</p>')
+
+        published_at = CORPUS_EPOCH - timedelta(minutes=number, seconds=rng.randint(0, 59))
+        return Content(
+            title=title,
+            slug=f'{SLUG_PREFIX}{slugify(title)}',
+            content='\n'.join(paragraphs),
+            excerpt=rng.choice(SENTENCES).format(**words),
+            content_type='article',
+            author=author,
+            published=True,
+            published_at=published_at,
+            review_status='approved',
+            meta_description=f"{words['subject']} in {state.name}"[:160],
+        )
+
+    def _link(self, seed, numbers, rows, categories, tags, states):
+        category_links = []
+        tag_links = []
+        state_links = []
+        for row in rows:
+            # Seeded per article so the corpus doesn't depend on batch size
+            rng = random.Random(f'{seed}-{numbers[row.slug]}-links')
+            for category in rng.sample(categories, k=rng.randint(1, 3)):
+                category_links.append(Content.categories.through(content_id=row.pk, category_id=category.pk))
+            for tag in rng.sample(tags, k=rng.randint(2, 5)):
+                tag_links.append(Content.tags.through(content_id=row.pk, tag_id=tag.pk))
+            for state in rng.sample(states, k=rng.randint(1, 2)):
+                state_links.append(Content.states.through(content_id=row.pk, state_id=state.pk))
+
+        Content.categories.through.objects.bulk_create(category_links)
+        Content.tags.through.objects.bulk_create(tag_links)
+        Content.states.through.objects.bulk_create(state_links)
@@ -0,0 +1,25 @@
+"""
+Management command to rebuild the category tree
+
+Recomputes the nested set columns (``tree_id``, ``lft``, ``rght``,
+``level``) of every category from the ``parent`` links. Run after bulk
+imports or raw SQL changes that bypass ``Category.save()``.
+"""
+
+from django.core.management.base import BaseCommand
+from app.caching import TAXONOMY_VERSION, bump_version
+from app.category_tree import rebuild_category_tree
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the category hierarchy (nested sets) from the parent links'
+
+    def handle(self, *args, **options):
+        rows = rebuild_category_tree()
+
+        if rows:
+            # Cached directories and breadcrumbs were built from the old tree
+            bump_version(TAXONOMY_VERSION)
+            self.stdout.write(self.style.WARNING(f'{rows} categories were out of place and were corrected'))
+        else:
+            self.stdout.write(self.style.SUCCESS('The category tree is in sync'))
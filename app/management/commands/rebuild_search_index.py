@@ -0,0 +1,47 @@
+"""
+Management command to rebuild the full-text search indexes
+
+Recomputes the weighted search documents for every article (title, excerpt,
+taxonomy names and body text) and every revision (title, comment, editor and
+body text). Run after bulk imports or raw SQL changes that bypass the model
+signals.
+"""
+
+from django.core.management.base import BaseCommand
+from app.models import Content, ContentRevision
+from app.search import get_search_backend, get_search_index, rebuild_search_index
+
+INDEXES = {
+    'content': (Content, 'articles'),
+    'revisions': (ContentRevision, 'revisions'),
+}
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search indexes for content and revisions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of rows to load per batch',
+        )
+        parser.add_argument(
+            '--only',
+            choices=sorted(INDEXES),
+            help='Only rebuild one of the indexes',
+        )
+
+    def handle(self, *args, **options):
+        names = [options['only']] if options['only'] else list(INDEXES)
+        for name in names:
+            model, label = INDEXES[name]
+            backend = get_search_backend(index=get_search_index(model))
+            self.stdout.write(f'Rebuilding {name} search index using the {backend.name} backend...')
+
+            count = rebuild_search_index(model, batch_size=options['batch_size'])
+
+            self.stdout.write(
+                self.style.SUCCESS(f'Indexed {count} {label}')
+            )
@@ -0,0 +1,34 @@
+"""
+Management command to refresh the stored canonical URLs of articles
+
+Picks the primary category and state of every article in batches and
+stores them with the resulting canonical path (see app/canonical.py). The
+migration that adds the columns runs it once, run it again after bulk
+imports or raw SQL changes that bypass the Content and link signals.
+"""
+
+from django.core.management.base import BaseCommand
+from app import redirects
+from app.caching import CONTENT_VERSION, bump_version
+from app.canonical import backfill
+
+
+class Command(BaseCommand):
+    help = 'Store the primary category, primary state and canonical path of every article'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Articles refreshed per batch (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        changed = backfill(batch_size=options['batch_size'])
+
+        if changed:
+            # Cached pages and the redirect map point at the old URLs
+            bump_version(CONTENT_VERSION)
+            bump_version(redirects.VERSION_NAME)
+        self.stdout.write(self.style.SUCCESS(f'{changed} canonical paths refreshed'))
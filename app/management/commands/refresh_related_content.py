@@ -0,0 +1,33 @@
+"""
+Management command to refresh the precomputed related articles
+
+Scores published articles against each other (see app/related.py) and
+stores each article's closest neighbours in RelatedContent. By default only
+articles whose states, categories, tags or detected type changed since the
+last run are recomputed, together with the articles sharing a category or
+tag with them or listing them. Schedule it frequently (server/setup.sh
+installs a cron entry every five minutes) and with ``--full`` nightly.
+"""
+
+from django.core.management.base import BaseCommand
+from app.related import refresh_related_content
+
+
+class Command(BaseCommand):
+    help = 'Refresh the precomputed related articles of changed articles'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Recompute the related articles of every published article',
+        )
+
+    def handle(self, *args, **options):
+        stats = refresh_related_content(full=options['full'])
+
+        self.stdout.write(
+            f"{stats['articles']} published articles, {stats['changed']} changed, "
+            f"{stats['refreshed']} related lists recomputed"
+        )
+        self.stdout.write(self.style.SUCCESS('Related articles are up to date'))
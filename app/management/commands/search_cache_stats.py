@@ -0,0 +1,35 @@
+"""
+Management command to report search result cache statistics
+
+Prints hit/miss totals and the hit ratio of the article search result
+cache, for monitoring how often popular queries are served from cache.
+"""
+
+from django.core.management.base import BaseCommand
+from app.caching import CONTENT_VERSION, get_version
+from app.search_cache import get_stats, reset_stats
+
+
+class Command(BaseCommand):
+    help = 'Show hit/miss statistics for the search result cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Reset the counters after printing them',
+        )
+
+    def handle(self, *args, **options):
+        stats = get_stats()
+
+        self.stdout.write(f"Content generation: {get_version(CONTENT_VERSION)}")
+        self.stdout.write(f"Hits:      {stats['hits']}")
+        self.stdout.write(f"Misses:    {stats['misses']}")
+        self.stdout.write(
+            self.style.SUCCESS(f"Hit ratio: {stats['hit_ratio']:.1%}")
+        )
+
+        if options['reset']:
+            reset_stats()
+            self.stdout.write(self.style.WARNING('Counters reset'))
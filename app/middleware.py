@@ -5,7 +5,8 @@ Handles automatic redirects from old URL structure to new SEO-optimized URLs
 from django.shortcuts import redirect, get_object_or_404
 from django.urls import resolve, Resolver404
 from django.http import Http404
-from .models import Content
+from . import page_cache
+from .redirects import ARTICLE_VIEW_NAMES, redirect_map
 import re
 
 
@@ -36,6 +37,12 @@ class SEORedirectMiddleware:
         """
         path = request.path
         
+        # Former URLs of renamed articles -> current SEO URL
+        if self.is_article_path(path):
+            moved_url = redirect_map.moved_path(path)
+            if moved_url:
+                return self.permanent_redirect(request, moved_url)
+        
         # Handle old article URLs: /articles/slug/ -> new SEO URL
         article_match = self.old_article_pattern.match(path)
         if article_match:
@@ -50,33 +57,29 @@ class SEORedirectMiddleware:
         
         return None
     
+    def is_article_path(self, path):
+        try:
+            return resolve(path).view_name in ARTICLE_VIEW_NAMES
+        except Resolver404:
+            return False
+    
+    def permanent_redirect(self, request, url):
+        # Preserve query parameters
+        if request.GET:
+            query_string = request.GET.urlencode()
+            url += f'?{query_string}'
+        
+        return redirect(url, permanent=True)
+    
     def redirect_article(self, request, slug):
         """
-        Redirect old article URL to new SEO-optimized URL
+        Redirect old article URL (by current or former slug) to the stored SEO-optimized URL
         """
-        try:
-            article = Content.objects.select_related().prefetch_related(
-                'categories', 'states'
-            ).get(slug=slug, published=True, content_type='article')
-            
-            # Get the SEO-optimized URL
-            seo_url = article.get_absolute_url()
-            
-            # Only redirect if the new URL is different from current
-            if seo_url != request.path:
-                # Preserve query parameters
-                if request.GET:
-                    query_string = request.GET.urlencode()
-                    seo_url += f'?{query_string}'
-                
-                return redirect(seo_url, permanent=True)
-                
-        except Content.DoesNotExist:
-            # Article doesn't exist, let Django handle the 404
-            pass
-        except Exception:
-            # Any other error, let the request continue normally
-            pass
+        seo_url = redirect_map.article_path(slug)
+        
+        # Only redirect if the new URL is different from current
+        if seo_url and seo_url != request.path:
+            return self.permanent_redirect(request, seo_url)
         
         return None
     
@@ -101,12 +104,7 @@ class SEORedirectMiddleware:
         
         new_url = category_redirects.get(category_slug)
         if new_url and new_url != request.path:
-            # Preserve query parameters
-            if request.GET:
-                query_string = request.GET.urlencode()
-                new_url += f'?{query_string}'
-            
-            return redirect(new_url, permanent=True)
+            return self.permanent_redirect(request, new_url)
         
         return None
 
@@ -149,4 +147,26 @@ class CanonicalURLMiddleware:
         if len(path) > 1 and path.endswith('/'):
             path = path[:-1]
         
-        return f"{scheme}://{host}{path}"
\ No newline at end of file
+        return f"{scheme}://{host}{path}"
+
+
+class PageCacheMiddleware:
+    """
+    Serve anonymous readers from the full-page cache, see app/page_cache.py
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        if not page_cache.is_cacheable_request(request):
+            return self.get_response(request)
+        
+        response = page_cache.get_cached_response(request)
+        if response is not None:
+            return response
+        
+        response = self.get_response(request)
+        if page_cache.is_cacheable_response(request, response):
+            response = page_cache.store_response(request, response)
+        return response
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:14
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from app.search import create_search_index, rebuild_search_index
+
+    create_search_index(schema_editor.connection)
+    Content = apps.get_model('app', 'Content')
+    rebuild_search_index(Content, using=schema_editor.connection.alias)
+
+
+def drop_search_index(apps, schema_editor):
+    from app.search import drop_search_index
+
+    drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0015_contentrevision_is_stable_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+def create_trigram_indexes(apps, schema_editor):
+    from app.suggestions import create_trigram_indexes
+
+    create_trigram_indexes(schema_editor.connection)
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    from app.suggestions import drop_trigram_indexes
+
+    drop_trigram_indexes(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0016_content_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
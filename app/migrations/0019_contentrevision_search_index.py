@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-17 09:02
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from app.search import REVISION_INDEX, create_search_index, rebuild_search_index
+
+    create_search_index(schema_editor.connection, REVISION_INDEX)
+    ContentRevision = apps.get_model('app', 'ContentRevision')
+    rebuild_search_index(ContentRevision, using=schema_editor.connection.alias)
+
+
+def drop_search_index(apps, schema_editor):
+    from app.search import REVISION_INDEX, drop_search_index
+
+    drop_search_index(schema_editor.connection, REVISION_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0018_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contentrevision',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
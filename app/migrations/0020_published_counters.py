@@ -0,0 +1,48 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def reconcile_counts(apps, schema_editor):
+    from app.counters import reconcile_counts
+
+    reconcile_counts(apps, using=schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0019_contentrevision_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='published_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='state',
+            name='published_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='published_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='StateCategoryCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='state_counts', to='app.category')),
+                ('state', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='category_counts', to='app.state')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('state', 'category'), name='unique_state_category_count')],
+            },
+        ),
+        migrations.RunPython(reconcile_counts, migrations.RunPython.noop),
+    ]
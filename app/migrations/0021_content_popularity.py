@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0020_published_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='popularity_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='view_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['content_type', 'published', 'review_status', '-popularity_score', '-id'], name='content_popularity_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.4 on 2026-10-17 09:12
+
+import django.db.models.deletion
+import mptt.fields
+from django.db import migrations, models
+
+
+def build_tree(apps, schema_editor):
+    from app.category_tree import rebuild_category_tree
+
+    rebuild_category_tree(apps, using=schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0021_content_popularity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='level',
+            field=models.PositiveIntegerField(default=0, editable=False),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='lft',
+            field=models.PositiveIntegerField(default=0, editable=False),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='rght',
+            field=models.PositiveIntegerField(default=0, editable=False),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='tree_id',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='category',
+            name='parent',
+            field=mptt.fields.TreeForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='children', to='app.category'),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['tree_id', 'lft'], name='category_tree_idx'),
+        ),
+        migrations.RunPython(build_tree, migrations.RunPython.noop),
+    ]
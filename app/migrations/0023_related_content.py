@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0022_category_tree'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='related_signature',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+        migrations.CreateModel(
+            name='RelatedContent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.PositiveIntegerField()),
+                ('content', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_content', to='app.content')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_from', to='app.content')),
+            ],
+            options={
+                'ordering': ['content', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('content', 'rank'), name='unique_related_content_rank')],
+            },
+        ),
+    ]
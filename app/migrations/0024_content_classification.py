@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def classify_articles(apps, schema_editor):
+    from app.classification import classify_all
+
+    classify_all(apps, using=schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0023_related_content'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='detected_subtype',
+            field=models.CharField(blank=True, editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='detected_type',
+            field=models.CharField(blank=True, editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='profession',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=30),
+        ),
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['content_type', 'published', 'review_status', 'detected_type', 'detected_subtype'], name='content_detected_type_idx'),
+        ),
+        migrations.RunPython(classify_articles, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0024_content_classification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='seo_bundle',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-17 03:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_canonical_paths(apps, schema_editor):
+    from app.canonical import backfill
+
+    backfill(apps, using=schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0025_content_seo_bundle'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='canonical_path',
+            field=models.CharField(blank=True, editable=False, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='primary_category',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='app.category'),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='primary_state',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='app.state'),
+        ),
+        migrations.RunPython(backfill_canonical_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-17 03:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0026_content_canonical_path'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlugHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('old_slug', models.SlugField(max_length=280, unique=True)),
+                ('old_path', models.CharField(blank=True, max_length=500)),
+                ('content', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slug_history', to='app.content')),
+            ],
+            options={
+                'verbose_name_plural': 'slug history',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
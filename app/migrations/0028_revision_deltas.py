@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4 on 2026-10-17 04:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0027_slug_history'),
+    ]
+
+    operations = [
+        # content_text becomes a property, its column is kept as the full body
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RenameField(
+                    model_name='contentrevision',
+                    old_name='content_text',
+                    new_name='body',
+                ),
+                migrations.AlterField(
+                    model_name='contentrevision',
+                    name='body',
+                    field=models.TextField(blank=True, db_column='content_text', editable=False),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='contentrevision',
+            name='body_delta',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='contentrevision',
+            name='delta_base',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='delta_dependents', to='app.contentrevision'),
+        ),
+        migrations.AddField(
+            model_name='contentrevision',
+            name='delta_depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -3,8 +3,11 @@ from django.contrib.auth.models import User
 from django.utils.text import slugify
 from django.urls import reverse
 from django.utils import timezone
+from django.contrib.postgres.search import SearchVectorField
 from tinymce.models import HTMLField
+from mptt.models import MPTTModel, TreeForeignKey
 from .fields import CompressedImageField
+from . import canonical, revision_storage
 
 class TimeStampedModel(models.Model):
     """
@@ -19,18 +22,35 @@ class TimeStampedModel(models.Model):
 
 
 
-class Category(TimeStampedModel):
+class Category(MPTTModel, TimeStampedModel):
     """
     Content categories for organizing articles
+    
+    The hierarchy is stored as nested sets (django-mptt ``lft``/``rght``/
+    ``tree_id``/``level``), so a category's subtree, ancestors and siblings
+    are each one indexed query. See app/category_tree.py.
+    
+    The tree manager ignores ``Meta.ordering``: ``Category.objects`` and an
+    article's ``categories`` list in tree order, each parent followed by its
+    children and siblings by name. Order by ``name`` for alphabetical lists.
     """
     name = models.CharField(max_length=100)
     slug = models.SlugField(max_length=120, unique=True)
     description = models.TextField(blank=True)
-    parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.SET_NULL, related_name='children')
+    parent = TreeForeignKey('self', null=True, blank=True, on_delete=models.SET_NULL, related_name='children')
+    
+    # Published, approved articles in this category (maintained by app/counters.py)
+    published_count = models.IntegerField(default=0, editable=False)
+    
+    class MPTTMeta:
+        order_insertion_by = ['name']
     
     class Meta:
         verbose_name_plural = 'Categories'
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['tree_id', 'lft'], name='category_tree_idx'),
+        ]
     
     def __str__(self):
         return self.name
@@ -40,6 +60,14 @@ class Category(TimeStampedModel):
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
     
+    def delete(self, *args, **kwargs):
+        # MPTT deletes a node with its whole subtree, keep the SET_NULL
+        # behaviour instead and turn the children into top-level categories
+        for child in self.get_children():
+            child.parent = None
+            child.save()
+        return super().delete(*args, **kwargs)
+    
     def get_absolute_url(self):
         return reverse('app:article-category', kwargs={'slug': self.slug})
 
@@ -51,6 +79,9 @@ class Tag(TimeStampedModel):
     name = models.CharField(max_length=50)
     slug = models.SlugField(max_length=60, unique=True)
     
+    # Published, approved articles with this tag (maintained by app/counters.py)
+    published_count = models.IntegerField(default=0, editable=False)
+    
     class Meta:
         ordering = ['name']
     
@@ -79,6 +110,9 @@ class State(TimeStampedModel):
     area = models.PositiveIntegerField(help_text="Area in square kilometers", null=True, blank=True)
     languages = models.CharField(max_length=255, help_text="Comma-separated list of major languages", blank=True)
     
+    # Published, approved articles about this state (maintained by app/counters.py)
+    published_count = models.IntegerField(default=0, editable=False)
+    
     def __str__(self):
         return self.name
     
@@ -91,6 +125,24 @@ class State(TimeStampedModel):
         return reverse('app:state-detail', kwargs={'state_slug': self.slug})
 
 
+class StateCategoryCount(models.Model):
+    """
+    Published, approved articles per state and category
+    Maintained by app/counters.py, rebuild with `manage.py reconcile_counts`
+    """
+    state = models.ForeignKey(State, on_delete=models.CASCADE, related_name='category_counts')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='state_counts')
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['state', 'category'], name='unique_state_category_count'),
+        ]
+    
+    def __str__(self):
+        return f"{self.state.name} / {self.category.name}: {self.count}"
+
+
 class ContentItem(TimeStampedModel):
     """
     Abstract base class for all content types with common fields
@@ -277,6 +329,10 @@ class Notification(TimeStampedModel):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of a user's notifications
+            models.Index(fields=['user', '-created_at', '-id'], name='notification_user_keyset_idx'),
+        ]
     
     def __str__(self):
         return f"{self.notification_type} for {self.user.username}"
@@ -349,6 +405,29 @@ class Content(TimeStampedModel):
     # Legacy support fields (will be moved to type_data eventually)
     last_edited_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name='edited_content')
     
+    # Weighted full-text document, only populated on PostgreSQL (see app/search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
+    # Page views, written in batches from the buffer in app/popularity.py
+    view_count = models.PositiveIntegerField(default=0, editable=False)
+    # Exponentially decayed views in log2 space, see app/popularity.py
+    popularity_score = models.FloatField(default=0, editable=False)
+    # Hash of the features RelatedContent was computed from, see app/related.py
+    related_signature = models.CharField(max_length=32, blank=True, editable=False)
+    
+    # Keyword classification, maintained by app/classification.py (blank until classified)
+    detected_type = models.CharField(max_length=20, blank=True, editable=False)
+    detected_subtype = models.CharField(max_length=20, blank=True, editable=False)
+    profession = models.CharField(max_length=30, blank=True, editable=False, db_index=True)
+    
+    # Titles, descriptions, keywords, reading time and mentions, see app/seo_bundle.py
+    seo_bundle = models.JSONField(default=dict, blank=True, editable=False)
+    
+    # First linked category and state and the URL built from them, see app/canonical.py
+    primary_category = models.ForeignKey(Category, null=True, blank=True, on_delete=models.SET_NULL, related_name='+', editable=False)
+    primary_state = models.ForeignKey(State, null=True, blank=True, on_delete=models.SET_NULL, related_name='+', editable=False)
+    canonical_path = models.CharField(max_length=500, blank=True, editable=False)
+    
     class Meta:
         ordering = ['-published_at', '-created_at']
         indexes = [
@@ -356,6 +435,22 @@ class Content(TimeStampedModel):
             models.Index(fields=['published_at']),
             models.Index(fields=['review_status']),
             models.Index(fields=['slug']),
+            # Keyset pagination on (published_at, id), see app/pagination.py
+            models.Index(fields=['-published_at', '-id'], name='content_published_keyset_idx'),
+            models.Index(
+                fields=['content_type', 'published', 'review_status', '-published_at', '-id'],
+                name='content_listing_keyset_idx',
+            ),
+            # "Most popular" listings, see app/popularity.py
+            models.Index(
+                fields=['content_type', 'published', 'review_status', '-popularity_score', '-id'],
+                name='content_popularity_idx',
+            ),
+            # Listings filtered by detected type, see app/classification.py
+            models.Index(
+                fields=['content_type', 'published', 'review_status', 'detected_type', 'detected_subtype'],
+                name='content_detected_type_idx',
+            ),
         ]
     
     def __str__(self):
@@ -367,74 +462,32 @@ class Content(TimeStampedModel):
         
         if self.published and not self.published_at:
             self.published_at = timezone.now()
+        
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or canonical.PATH_FIELDS.intersection(update_fields):
+            self.canonical_path = canonical.content_path(self)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'canonical_path'}
             
         super().save(*args, **kwargs)
     
     def get_absolute_url(self):
         """
-        Generate URL based on content type and context
+        Stored canonical URL, based on content type, primary category and state
         """
-        # Get primary category and state for URL generation
-        primary_category = self.categories.first()
-        primary_state = self.states.first()
-        
-        # Content type specific URL patterns
-        if self.content_type == 'personality':
-            return reverse('app:personality-detail', kwargs={'slug': self.slug})
-        elif self.content_type == 'cultural':
-            return reverse('app:cultural-element-detail', kwargs={'slug': self.slug})
-        else:  # article or default
-            # Try to generate SEO-friendly URL based on category
-            if primary_category and primary_state:
-                category_slug = primary_category.slug
-                state_slug = primary_state.slug
-                
-                # Map categories to URL patterns
-                category_url_map = {
-                    'personalities': 'app:seo-personalities-detail',
-                    'culture': 'app:seo-culture-detail',
-                    'festivals': 'app:seo-festivals-detail',
-                    'places': 'app:seo-places-detail',
-                    'heritage': 'app:seo-heritage-detail',
-                    'history': 'app:seo-history-detail',
-                    'traditional-crafts': 'app:seo-crafts-detail',
-                    'traditional-arts': 'app:seo-crafts-detail',
-                    'food': 'app:seo-food-detail',
-                    'cuisine': 'app:seo-food-detail',
-                    'music': 'app:seo-music-detail',
-                    'folk-music': 'app:seo-music-detail',
-                    'dance': 'app:seo-dance-detail',
-                    'literature': 'app:seo-literature-detail',
-                    'tribal-culture': 'app:seo-culture-detail',
-                    'historical-sites': 'app:seo-heritage-detail',
-                }
-                
-                url_name = category_url_map.get(category_slug)
-                if url_name:
-                    try:
-                        return reverse(url_name, kwargs={
-                            'state_slug': state_slug,
-                            'slug': self.slug
-                        })
-                    except:
-                        pass
-            
-            # Fallback to basic article URL
-            return reverse('app:article-detail', kwargs={'slug': self.slug})
+        return self.canonical_path or canonical.content_path(self)
     
     def get_seo_title(self):
         """Generate SEO-optimized title"""
         components = [self.title]
         
         # Add state context
-        primary_state = self.states.first()
-        if primary_state:
-            components.append(primary_state.name)
+        if self.primary_state_id:
+            components.append(self.primary_state.name)
         
         # Add category context
-        primary_category = self.categories.first()
-        if primary_category:
-            components.append(primary_category.name.title())
+        if self.primary_category_id:
+            components.append(self.primary_category.name.title())
         
         # Add regional context
         components.append('Northeast India')
@@ -597,6 +650,43 @@ class Content(TimeStampedModel):
         return (clean_content[:150] + '...') if len(clean_content) > 150 else clean_content
 
 
+class RelatedContent(models.Model):
+    """
+    Precomputed related articles, ``rank`` 0 is the closest
+    Maintained by app/related.py, refresh with `manage.py refresh_related_content`
+    """
+    content = models.ForeignKey(Content, on_delete=models.CASCADE, related_name='related_content')
+    related = models.ForeignKey(Content, on_delete=models.CASCADE, related_name='related_from')
+    rank = models.PositiveSmallIntegerField()
+    score = models.PositiveIntegerField()
+    
+    class Meta:
+        ordering = ['content', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['content', 'rank'], name='unique_related_content_rank'),
+        ]
+    
+    def __str__(self):
+        return f"{self.content.title} -> {self.related.title} (#{self.rank})"
+
+
+class SlugHistory(TimeStampedModel):
+    """
+    Former slug of an article and the canonical path it had under it
+    Recorded by app/signals.py on slug changes, served by app/redirects.py
+    """
+    content = models.ForeignKey(Content, on_delete=models.CASCADE, related_name='slug_history')
+    old_slug = models.SlugField(max_length=280, unique=True)
+    old_path = models.CharField(max_length=500, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name_plural = 'slug history'
+    
+    def __str__(self):
+        return f"{self.old_slug} -> {self.content.slug}"
+
+
 class ContentRevision(TimeStampedModel):
     """
     Model to store content revisions and pending edits
@@ -621,7 +711,6 @@ class ContentRevision(TimeStampedModel):
     
     # Content fields (snapshot of changes)
     title = models.CharField(max_length=255)
-    content_text = HTMLField()  # Using different name to avoid confusion with FK
     excerpt = models.TextField(blank=True)
     meta_description = models.CharField(max_length=160, blank=True)
     featured_image = CompressedImageField(upload_to='content/revisions/', blank=True, null=True, max_width=1200, target_size_kb=80)
@@ -645,6 +734,17 @@ class ContentRevision(TimeStampedModel):
     sighted_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name='sighted_revisions', help_text="User who sighted this revision")
     sighted_at = models.DateTimeField(null=True, blank=True)
     
+    # Full-text search document for reviewers (PostgreSQL only, see app/search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
+    # Body storage, read and write it through content_text (see app/revision_storage.py)
+    body = models.TextField(blank=True, editable=False, db_column='content_text')
+    body_delta = models.JSONField(null=True, blank=True, editable=False)
+    delta_base = models.ForeignKey('self', null=True, blank=True, on_delete=models.SET_NULL, related_name='delta_dependents', editable=False)
+    delta_depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    
+    _content_text_changed = False
+    
     class Meta:
         ordering = ['-created_at']
         indexes = [
@@ -653,9 +753,43 @@ class ContentRevision(TimeStampedModel):
             models.Index(fields=['editor']),
         ]
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Status as loaded, settling a revision re-encodes its body
+        self._stored_status = self.__dict__.get('status') if self.pk is not None else None
+    
     def __str__(self):
         return f"Revision of {self.content.title} by {self.editor.username} - {self.status}"
     
+    @property
+    def content_text(self):
+        """Full HTML of the revision, rebuilt from its delta on first access"""
+        if '_content_text' not in self.__dict__:
+            self._content_text = revision_storage.reconstruct(self)
+        return self._content_text
+    
+    @content_text.setter
+    def content_text(self, value):
+        self._content_text = value
+        self._content_text_changed = True
+    
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        # Rebuild the body from the reloaded storage columns on next access
+        self.__dict__.pop('_content_text', None)
+        self._content_text_changed = False
+        self._stored_status = self.__dict__.get('status')
+    
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or revision_storage.ENCODED_FIELDS.intersection(update_fields):
+            if revision_storage.needs_encoding(self):
+                revision_storage.prepare(self)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *revision_storage.STORAGE_FIELDS} - {'content_text'}
+        super().save(*args, **kwargs)
+        self._stored_status = self.status
+    
     def apply_to_content(self):
         """
         Apply this revision to the original content object
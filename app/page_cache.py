@@ -0,0 +1,207 @@
+"""
+Full-page cache for anonymous readers
+
+``PageCacheMiddleware`` (app/middleware.py) stores the complete response of
+anonymous GET requests for pages that declared surrogate keys, and serves
+it on the next request without running the view, the template engine or
+the context processors.
+
+Views opt in with ``add_surrogate_keys(response, ...)``, naming what the
+page shows:
+
+- ``content-<id>`` for an article rendered on the page
+- ``category-<id>``, ``state-<id>`` and ``tag-<id>`` for pages listing the
+  articles of a category, state or tag
+- ``listings`` for pages listing recent or all articles (home, lists, indexes)
+- ``taxonomy`` for pages showing category, state or tag names
+- ``popular`` for pages ordered by popularity, purged by each view flush
+
+Each key has a version stamp. A cached page remembers the versions of its
+keys, and purging a key bumps its version, so every page carrying it misses
+on the next request while unrelated pages stay cached. The Content and
+taxonomy signals (app/signals.py) purge the keys of whatever changed: an
+edited article purges its own page, ``listings`` and the pages of its
+categories, states and tags.
+
+Article views are still counted when their cached page is served, see
+``count_view``. Cached responses carry an ``ETag`` and ``Last-Modified``, so browsers and
+crawlers revalidating a page get a ``304 Not Modified``. The
+``Surrogate-Key`` header is kept for a CDN in front of the site.
+"""
+import hashlib
+import time
+
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+from .caching import bump_version, get_versions
+from .popularity import is_countable, record_view
+
+PAGE_CACHE_TIMEOUT = 60 * 15
+
+SURROGATE_KEY_HEADER = 'Surrogate-Key'
+
+LISTINGS_KEY = 'listings'
+TAXONOMY_KEY = 'taxonomy'
+POPULAR_KEY = 'popular'
+
+# Through table column and key prefix of each Content relation
+RELATION_KEYS = {
+    'categories': ('category_id', 'category'),
+    'states': ('state_id', 'state'),
+    'tags': ('tag_id', 'tag'),
+}
+
+
+def content_key(pk):
+    return f'content-{pk}'
+
+
+def category_key(pk):
+    return f'category-{pk}'
+
+
+def state_key(pk):
+    return f'state-{pk}'
+
+
+def tag_key(pk):
+    return f'tag-{pk}'
+
+
+def _version_name(key):
+    return f'surrogate:{key}'
+
+
+def add_surrogate_keys(response, *keys):
+    """Declare what ``response`` shows, making it cacheable for anonymous readers"""
+    existing = response.get(SURROGATE_KEY_HEADER, '').split()
+    for key in keys:
+        if key not in existing:
+            existing.append(key)
+    response[SURROGATE_KEY_HEADER] = ' '.join(existing)
+    return response
+
+
+def count_view(response, content_id):
+    """Count a page view of ``content_id`` whenever the cached page is served"""
+    response.counted_view = content_id
+    return response
+
+
+def article_keys(article):
+    """Keys of an article page, reading its prefetched categories, states and tags"""
+    keys = [content_key(article.pk), TAXONOMY_KEY]
+    for relation, (_, prefix) in RELATION_KEYS.items():
+        keys.extend(f'{prefix}-{obj.pk}' for obj in getattr(article, relation).all())
+    return keys
+
+
+def _bump(keys):
+    for key in keys:
+        bump_version(_version_name(key))
+
+
+def purge(*keys, using=None):
+    """Make every cached page carrying one of ``keys`` stale"""
+    keys = set(keys)
+    _bump(keys)
+    # Pages rendered from the old rows before the commit must not outlive it
+    transaction.on_commit(lambda: _bump(keys), using=using)
+
+
+def purge_content(pk, using=None):
+    """Purge an article's page, the listings and its category, state and tag pages"""
+    from .models import Content
+
+    keys = [content_key(pk), LISTINGS_KEY]
+    for relation, (column, prefix) in RELATION_KEYS.items():
+        through = getattr(Content, relation).through
+        ids = through.objects.using(using).filter(content_id=pk).values_list(column, flat=True)
+        keys.extend(f'{prefix}-{related_id}' for related_id in ids)
+    purge(*keys, using=using)
+
+
+def purge_links(relation, instance, reverse, pk_set, using=None):
+    """
+    Purge the pages affected by adding or removing ``relation`` links
+    (``'categories'``, ``'states'`` or ``'tags'``) from either side
+    """
+    column, prefix = RELATION_KEYS[relation]
+    if reverse:
+        keys = [f'{prefix}-{instance.pk}', LISTINGS_KEY]
+        keys.extend(content_key(pk) for pk in pk_set or ())
+    else:
+        keys = [content_key(instance.pk), LISTINGS_KEY]
+        keys.extend(f'{prefix}-{pk}' for pk in pk_set or ())
+    purge(*keys, using=using)
+
+
+def _page_key(request):
+    url = request.build_absolute_uri()
+    return f'page:{hashlib.md5(url.encode("utf-8")).hexdigest()}'
+
+
+def is_cacheable_request(request):
+    """Anonymous GET or HEAD request without pending flash messages"""
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if request.user.is_authenticated:
+        return False
+    return CookieStorage.cookie_name not in request.COOKIES
+
+
+def is_cacheable_response(request, response):
+    if request.method != 'GET' or response.status_code != 200:
+        return False
+    if response.streaming or response.cookies or SURROGATE_KEY_HEADER not in response:
+        return False
+    cache_control = response.get('Cache-Control', '')
+    return 'private' not in cache_control and 'no-store' not in cache_control
+
+
+def _finish(request, response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, max_age=0, must_revalidate=True)
+    return get_conditional_response(request, etag=etag, last_modified=last_modified, response=response)
+
+
+def get_cached_response(request):
+    """The cached page for ``request`` if none of its keys was purged, else None"""
+    entry = cache.get(_page_key(request))
+    if entry is None:
+        return None
+    versions = get_versions([_version_name(key) for key in entry['keys']])
+    for key, version in entry['keys'].items():
+        if versions[_version_name(key)] != version:
+            return None
+
+    if entry['counted_view'] and is_countable(request):
+        record_view(entry['counted_view'])
+
+    response = HttpResponse(entry['content'], content_type=entry['content_type'])
+    response[SURROGATE_KEY_HEADER] = ' '.join(entry['keys'])
+    return _finish(request, response, entry['etag'], entry['last_modified'])
+
+
+def store_response(request, response):
+    """Cache ``response`` under the current versions of its surrogate keys"""
+    # Keep the validators of views declaring them, see app/conditional.py
+    etag = response.get('ETag') or quote_etag(hashlib.md5(response.content).hexdigest())
+    last_modified = parse_http_date_safe(response.get('Last-Modified', '')) or int(time.time())
+    keys = response[SURROGATE_KEY_HEADER].split()
+    versions = get_versions([_version_name(key) for key in keys])
+    cache.set(_page_key(request), {
+        'content': response.content,
+        'content_type': response['Content-Type'],
+        'keys': {key: versions[_version_name(key)] for key in keys},
+        'counted_view': getattr(response, 'counted_view', None),
+        'etag': etag,
+        'last_modified': last_modified,
+    }, PAGE_CACHE_TIMEOUT)
+    return _finish(request, response, etag, last_modified)
@@ -0,0 +1,222 @@
+"""
+Keyset (cursor) pagination
+
+Django's Paginator counts the whole result set and pages with OFFSET, so
+every deeper page scans more rows. ``CursorPaginator`` instead remembers the
+sort key of the last row on a page, e.g. ``(published_at, id)``, and asks for
+the rows after it, which an index on those columns answers directly no
+matter how deep the page is.
+
+Cursors are opaque, signed tokens passed as ``?cursor=``. The sort key is
+taken from the queryset's ``order_by()`` with the primary key appended as a
+tie-breaker, and its fields must be non-null. Orderings that cannot be keyed
+(random order, expressions, related fields) fall back to signed offset tokens
+so the same templates keep working.
+"""
+import datetime
+import json
+from collections.abc import Sequence
+
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+# Ordering used by article listings, matched by the keyset indexes on Content
+PUBLISHED_ORDERING = ('-published_at', '-id')
+
+# Approximate counts stop counting rows after this many
+APPROXIMATE_COUNT_LIMIT = 1000
+
+CURSOR_SALT = 'app.pagination.cursor'
+
+_json_encoder = DjangoJSONEncoder()
+
+
+def _to_json(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        # Keep full microsecond precision, DjangoJSONEncoder truncates to ms
+        return value.isoformat()
+    return _json_encoder.default(value)
+
+
+def approximate_count(queryset, limit=APPROXIMATE_COUNT_LIMIT):
+    """
+    Cheap row count for result headers.
+
+    Returns ``(count, is_exact)``. PostgreSQL uses the planner's row estimate;
+    other databases count at most ``limit`` rows.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows']), False
+
+    count = queryset.order_by()[:limit + 1].count()
+    if count > limit:
+        return limit, False
+    return count, True
+
+
+class CursorPage(Sequence):
+    """
+    One page of results, exposing the parts of Django's Page that templates use
+    """
+
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Drop-in replacement for Paginator using keyset pagination.
+
+    ``count_mode`` controls ``paginator.count``: ``'exact'`` runs COUNT(*),
+    ``'approximate'`` uses ``approximate_count`` and sets
+    ``count_is_approximate`` when the number is an estimate.
+    """
+
+    def __init__(self, queryset, per_page, count_mode='exact'):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.count_mode = count_mode
+        self.count_is_approximate = False
+        self.keys = self._sort_keys()
+
+    def _sort_keys(self):
+        """Return ``[(field, descending), ...]`` or None when keyset paging is impossible"""
+        query = self.queryset.query
+        if query.order_by:
+            ordering = list(query.order_by)
+        elif query.default_ordering and query.get_meta().ordering:
+            ordering = list(query.get_meta().ordering)
+        else:
+            ordering = []
+
+        keys = []
+        for item in ordering:
+            if not isinstance(item, str) or item == '?' or '__' in item:
+                return None
+            descending = item.startswith('-')
+            field = item.lstrip('-+')
+            if field == 'id':
+                field = 'pk'
+            keys.append((field, descending))
+
+        if not any(field == 'pk' for field, _ in keys):
+            keys.append(('pk', keys[-1][1] if keys else False))
+        return keys
+
+    @cached_property
+    def count(self):
+        if self.count_mode == 'approximate':
+            count, is_exact = approximate_count(self.queryset)
+            self.count_is_approximate = not is_exact
+            return count
+        return self.queryset.count()
+
+    def _encode(self, payload):
+        return signing.dumps(payload, salt=CURSOR_SALT, compress=True)
+
+    def _decode(self, cursor):
+        if not cursor:
+            return None
+        try:
+            payload = signing.loads(cursor, salt=CURSOR_SALT)
+        except signing.BadSignature:
+            return None
+        return payload if isinstance(payload, dict) else None
+
+    def _key_values(self, obj):
+        return [_to_json(getattr(obj, field)) for field, _ in self.keys]
+
+    def _keyset_filter(self, values, forward):
+        condition = Q()
+        equal = Q()
+        for (field, descending), value in zip(self.keys, values):
+            lookup = 'lt' if descending == forward else 'gt'
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+        return condition
+
+    def _ordering(self, forward):
+        return [
+            f'-{field}' if descending == forward else field
+            for field, descending in self.keys
+        ]
+
+    def get_page(self, cursor=None):
+        """Return the page addressed by ``cursor``, or the first page"""
+        payload = self._decode(cursor)
+        if self.keys is None:
+            return self._offset_page(payload)
+
+        values = payload.get('k') if payload else None
+        if not isinstance(values, list) or len(values) != len(self.keys):
+            values = None
+        forward = values is None or payload.get('d') != 'p'
+
+        queryset = self.queryset.order_by(*self._ordering(forward))
+        if values is not None:
+            queryset = queryset.filter(self._keyset_filter(values, forward))
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if forward:
+            has_next, has_previous = has_more, values is not None
+        else:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self._encode({'k': self._key_values(rows[-1]), 'd': 'n'})
+        if rows and has_previous:
+            previous_cursor = self._encode({'k': self._key_values(rows[0]), 'd': 'p'})
+        return CursorPage(rows, self, next_cursor, previous_cursor)
+
+    def _offset_page(self, payload):
+        offset = payload.get('o', 0) if payload else 0
+        if not isinstance(offset, int) or offset < 0:
+            offset = 0
+
+        rows = list(self.queryset[offset:offset + self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        next_cursor = self._encode({'o': offset + self.per_page}) if has_next else None
+        previous_cursor = None
+        if offset > 0:
+            previous_cursor = self._encode({'o': max(0, offset - self.per_page)})
+        return CursorPage(rows, self, next_cursor, previous_cursor)
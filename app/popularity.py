@@ -0,0 +1,167 @@
+"""
+Buffered page-view counters and decayed popularity
+
+``record_view`` only bumps a per-process counter, so serving an article
+never waits on a database write. The worker that records a view flushes the
+buffer in batches once ``FLUSH_INTERVAL`` seconds have passed or
+``FLUSH_THRESHOLD`` views are buffered. Views still buffered when a worker
+is restarted are lost, which is an acceptable error for a popularity signal.
+A flush that fails on the request path is logged and retried later, it
+never turns the reader's page into an error.
+
+Each flush adds the views to ``Content.view_count`` and folds them into
+``Content.popularity_score``, an exponentially decayed view count kept in
+log2 space relative to ``POPULARITY_EPOCH``::
+
+    score = log2(sum(views * 2 ** ((viewed_at - POPULARITY_EPOCH) / HALF_LIFE)))
+
+Newer views weigh more, and older scores never need to be rewritten: a view
+``HALF_LIFE`` from now is worth twice a view today. Ordering by
+``-popularity_score`` is therefore ordering by views decayed to the present,
+and is backed by an index for the "popular" listings.
+"""
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import DatabaseError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .caching import bump_version
+
+# Reference point of the log-space scores, never change it once scores exist
+POPULARITY_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+# A view counts half as much after this long
+HALF_LIFE = timedelta(days=7)
+
+# Flush the buffer after this many seconds or buffered views
+FLUSH_INTERVAL = 60
+FLUSH_THRESHOLD = 500
+
+# Version stamp bumped after every flush, for pages ordered by popularity
+VERSION_NAME = 'popularity'
+
+# Ordering for "most popular" listings, matched by content_popularity_idx
+POPULAR_ORDERING = ('-popularity_score', '-id')
+
+_BOT_RE = re.compile(r'bot|crawl|spider|slurp|preview', re.IGNORECASE)
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_buffer = Counter()
+_last_flush = time.monotonic()
+
+
+def _age(moment):
+    """Half-lives elapsed between the epoch and ``moment``"""
+    return (moment - POPULARITY_EPOCH) / HALF_LIFE
+
+
+def add_views(score, views, moment):
+    """Fold ``views`` seen at ``moment`` into a log2-space popularity score"""
+    if views <= 0:
+        return score
+    value = math.log2(views) + _age(moment)
+    if not score:
+        return value
+    high, low = max(score, value), min(score, value)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def decayed_views(score, moment=None):
+    """Popularity score expressed as views decayed to ``moment`` (default now)"""
+    if not score:
+        return 0.0
+    return 2 ** (score - _age(moment or timezone.now()))
+
+
+def is_countable(request):
+    """Skip crawlers and link previews"""
+    return not _BOT_RE.search(request.META.get('HTTP_USER_AGENT', ''))
+
+
+def record_view(content_id, count=1):
+    """
+    Count a page view in the process buffer and flush it when due
+    """
+    global _last_flush
+    with _lock:
+        _buffer[content_id] += count
+        due = (
+            sum(_buffer.values()) >= FLUSH_THRESHOLD
+            or time.monotonic() - _last_flush >= FLUSH_INTERVAL
+        )
+    if due:
+        try:
+            flush_views()
+        except DatabaseError:
+            # The views are back in the buffer, serve the page and retry on a later flush
+            logger.exception('Could not flush buffered page views')
+
+
+def pending_views():
+    """Views buffered in this process and not yet written"""
+    with _lock:
+        return dict(_buffer)
+
+
+def flush_views(moment=None):
+    """
+    Write the buffered views with batched UPDATEs, return how many were flushed.
+    On a database error the views are put back in the buffer and it is raised.
+    """
+    global _last_flush
+    with _lock:
+        views = dict(_buffer)
+        _buffer.clear()
+        _last_flush = time.monotonic()
+    if not views:
+        return 0
+
+    from .models import Content
+
+    moment = moment or timezone.now()
+    try:
+        with transaction.atomic():
+            # One UPDATE per distinct view count for the totals
+            by_amount = {}
+            for content_id, amount in views.items():
+                by_amount.setdefault(amount, []).append(content_id)
+            for amount, ids in by_amount.items():
+                Content.objects.filter(pk__in=ids).update(view_count=F('view_count') + amount)
+
+            # The log-space score needs the current value, lock the rows first
+            rows = list(
+                Content.objects.select_for_update()
+                .filter(pk__in=list(views))
+                .only('pk', 'popularity_score')
+            )
+            for row in rows:
+                row.popularity_score = add_views(row.popularity_score, views[row.pk], moment)
+            Content.objects.bulk_update(rows, ['popularity_score'], batch_size=500)
+    except Exception:
+        # Put the views back so the next flush retries them
+        with _lock:
+            _buffer.update(views)
+        raise
+    bump_version(VERSION_NAME)
+    # Imported here, the page cache counts views through this module
+    from . import page_cache
+    page_cache.purge(page_cache.POPULAR_KEY)
+    return sum(views.values())
+
+
+def popular_articles(queryset=None, limit=5):
+    """Most popular published articles, for trending widgets"""
+    from .models import Content
+
+    if queryset is None:
+        queryset = Content.objects.filter(content_type='article', published=True, review_status='approved')
+    return queryset.filter(view_count__gt=0).order_by(*POPULAR_ORDERING)[:limit]
@@ -0,0 +1,109 @@
+"""
+In-memory redirect map for legacy and renamed article URLs
+
+``SEORedirectMiddleware`` answers two kinds of outdated article URLs with a
+301 to the canonical path:
+
+- legacy ``/articles/<slug>/`` URLs, by current or former slug
+- former canonical paths of renamed articles (``/wiki/<old-slug>/`` or the
+  category URL the article had), recorded in ``SlugHistory`` when a slug
+  changes (see app/signals.py)
+
+Both lookups are dictionary reads against a map built per process from the
+stored canonical paths, so the middleware never queries the database for
+them, and only article URLs are looked up at all. The map is rebuilt lazily whenever the ``redirects`` version stamp
+is bumped by the Content signals, on changes to slugs, stored paths or
+publication.
+"""
+import threading
+
+from django.urls import reverse
+
+from .caching import get_version
+from .canonical import CATEGORY_URL_NAMES
+
+VERSION_NAME = 'redirects'
+
+# Views serving article pages, the only paths a renamed article can have had
+ARTICLE_VIEW_NAMES = {'app:article-detail', *CATEGORY_URL_NAMES.values()}
+
+
+class RedirectMap:
+    """
+    ``{slug: path}`` for legacy article URLs and ``{former path: path}``
+    for renamed articles
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._data = ({}, {})
+
+    def _load(self):
+        from .models import Content, SlugHistory
+
+        slugs = {}
+        rows = Content.objects.filter(published=True, content_type='article').values_list('slug', 'canonical_path')
+        for slug, path in rows:
+            if path:
+                slugs[slug] = path
+
+        moved = {}
+        history = (
+            SlugHistory.objects
+            .filter(content__published=True)
+            .order_by('created_at')
+            .values_list('old_slug', 'old_path', 'content__content_type', 'content__canonical_path')
+        )
+        for old_slug, old_path, content_type, path in history:
+            if not path:
+                continue
+            if content_type == 'article':
+                slugs.setdefault(old_slug, path)
+            for former in (old_path, reverse('app:article-detail', kwargs={'slug': old_slug})):
+                if former and former != path:
+                    moved[former] = path
+        return slugs, moved
+
+    def _ensure_current(self):
+        version = get_version(VERSION_NAME)
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            self._data = self._load()
+            self._version = version
+
+    def article_path(self, slug):
+        """Canonical path of the published article with current or former ``slug``"""
+        self._ensure_current()
+        return self._data[0].get(slug)
+
+    def moved_path(self, path):
+        """Canonical path of the renamed article formerly at ``path``, or None"""
+        self._ensure_current()
+        return self._data[1].get(path)
+
+    def invalidate(self):
+        """Force a rebuild on the next use in this process"""
+        self._version = None
+
+
+redirect_map = RedirectMap()
+
+
+def record_slug_change(content, old_slug, old_path, using=None):
+    """Remember that ``content`` was published under ``old_slug`` at ``old_path``"""
+    from .models import SlugHistory
+
+    SlugHistory.objects.using(using or content._state.db).update_or_create(
+        old_slug=old_slug, defaults={'content': content, 'old_path': old_path},
+    )
+
+
+def release_slug(content, using=None):
+    """An article now using a former slug takes its URL back"""
+    from .models import SlugHistory
+
+    SlugHistory.objects.using(using or content._state.db).filter(old_slug=content.slug).delete()
@@ -0,0 +1,290 @@
+"""
+Precomputed related articles
+
+Related articles used to be scored on every page view by comparing the
+article with every other published article. ``refresh_related_content``
+does that work offline and stores the best ``RELATED_LIMIT`` neighbours of
+each article in ``RelatedContent``, which ``related_articles`` reads with
+one query.
+
+Each article is encoded as a sparse, weighted feature vector (its states,
+categories, tags and detected content type). The overlap of two vectors is
+the score the article pages have always used::
+
+    50 per shared state + 20 per shared category + 10 per shared tag
+    + 30 for the same detected type (other than 'Article')
+
+plus two terms that are not shared features: ``TYPE_CONNECTIONS`` between
+complementary types (a festival next to a cultural practice) and
+``RECENT_BONUS`` for candidates published in the last year. The products
+are computed row by row through an inverted index (feature -> articles),
+so only pairs that share a feature are visited. Candidates that only have a
+type connection in common are taken from the most recent articles of that
+type.
+
+Every article stores a hash of its features in
+``Content.related_signature``. A refresh only recomputes articles whose
+hash changed, the articles sharing a category or tag with them and the
+articles currently listing them, so it is cheap to run often. A state or
+detected type is shared by too many articles to recompute them all on
+every change; run it with ``full=True`` periodically to pick up those
+neighbours and newer type-connection candidates.
+
+Saves and link changes do not refresh the lists, each run reloads every
+published article's features. server/setup.sh schedules the
+``refresh_related_content`` command every five minutes and with
+``--full`` nightly.
+"""
+import hashlib
+import json
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .classification import detect_type
+from .counters import COUNTED_FILTER, counted_articles
+
+RELATED_LIMIT = 6
+
+# Score of one shared feature of each kind
+FEATURE_WEIGHTS = {
+    'states': 50,       # Same region, the strongest link on a regional wiki
+    'type': 30,         # Personalities next to personalities, etc.
+    'categories': 20,   # Strong thematic connection
+    'tags': 10,         # Moderate thematic connection
+}
+
+# Bonus between complementary content types, in either direction
+TYPE_CONNECTIONS = {
+    ('Person', 'Cultural'): 15,
+    ('Person', 'Event'): 12,
+    ('Cultural', 'Event'): 20,
+    ('Place', 'Cultural'): 18,
+    ('Place', 'Event'): 15,
+}
+
+RECENT_BONUS = 5
+RECENT_PERIOD = timedelta(days=365)
+
+# Features whose other articles are recomputed when an article changes
+REFRESH_KINDS = ('categories', 'tags')
+
+# Rows deleted or created per statement
+BATCH_SIZE = 500
+
+ArticleFeatures = namedtuple('ArticleFeatures', [
+    'id', 'published_at', 'type', 'states', 'categories', 'tags', 'signature', 'stored_signature',
+])
+
+
+def type_connection(first, second):
+    """Bonus for a pair of detected content types"""
+    return TYPE_CONNECTIONS.get((first, second)) or TYPE_CONNECTIONS.get((second, first)) or 0
+
+
+def _signature(article_type, states, categories, tags, recent):
+    payload = json.dumps([article_type, sorted(states), sorted(categories), sorted(tags), recent])
+    return hashlib.md5(payload.encode('utf-8')).hexdigest()
+
+
+def load_features(using=None):
+    """``{content_id: ArticleFeatures}`` for every published article"""
+    from .models import Content
+
+    # The body is only loaded for articles that were never classified
+    articles = (
+        counted_articles(using=using)
+        .only('pk', 'title', 'excerpt', 'published_at', 'related_signature', 'detected_type')
+        .prefetch_related('categories', 'tags')
+    )
+    states = defaultdict(set)
+    links = (
+        Content.states.through.objects.using(using)
+        .filter(content__in=counted_articles(using=using))
+        .values_list('content_id', 'state_id')
+    )
+    for content_id, state_id in links:
+        states[content_id].add(state_id)
+
+    recent_since = timezone.now() - RECENT_PERIOD
+    features = {}
+    for article in articles:
+        article_type = article.detected_type or detect_type(article)
+        categories = {category.pk for category in article.categories.all()}
+        tags = {tag.pk for tag in article.tags.all()}
+        recent = bool(article.published_at and article.published_at > recent_since)
+        features[article.pk] = ArticleFeatures(
+            id=article.pk,
+            published_at=article.published_at,
+            type=article_type,
+            states=frozenset(states[article.pk]),
+            categories=frozenset(categories),
+            tags=frozenset(tags),
+            signature=_signature(article_type, states[article.pk], categories, tags, recent),
+            stored_signature=article.related_signature,
+        )
+    return features
+
+
+def _keys(article):
+    """Non-zero entries of an article's feature vector"""
+    for kind in ('states', 'categories', 'tags'):
+        for pk in getattr(article, kind):
+            yield (kind, pk)
+    if article.type != 'Article':
+        yield ('type', article.type)
+
+
+def build_index(features):
+    """Inverted index ``{(kind, value): [content_id, ...]}``"""
+    index = defaultdict(list)
+    for article in features.values():
+        for key in _keys(article):
+            index[key].append(article.id)
+    return index
+
+
+def _recency_key(article):
+    timestamp = article.published_at.timestamp() if article.published_at else 0
+    return (-timestamp, -article.id)
+
+
+def latest_by_type(features, limit=RELATED_LIMIT):
+    """Most recent ``limit`` articles of each detected type"""
+    by_type = defaultdict(list)
+    for article in sorted(features.values(), key=_recency_key):
+        if len(by_type[article.type]) < limit:
+            by_type[article.type].append(article.id)
+    return by_type
+
+
+def score_neighbours(article, features, index, latest, recent_since):
+    """``[(score, ArticleFeatures), ...]`` best first, for one article"""
+    scores = defaultdict(int)
+    for key in _keys(article):
+        weight = FEATURE_WEIGHTS[key[0]]
+        for other in index[key]:
+            scores[other] += weight
+
+    # Complementary types rarely share features, their latest articles are candidates too
+    for other_type, ids in latest.items():
+        if type_connection(article.type, other_type):
+            for other in ids:
+                scores.setdefault(other, 0)
+
+    scores.pop(article.id, None)
+    ranked = []
+    for other, score in scores.items():
+        candidate = features[other]
+        score += type_connection(article.type, candidate.type)
+        if candidate.published_at and candidate.published_at > recent_since:
+            score += RECENT_BONUS
+        if score > 0:
+            ranked.append((score, candidate))
+    ranked.sort(key=lambda item: (-item[0],) + _recency_key(item[1]))
+    return ranked
+
+
+def diversify(ranked, limit=RELATED_LIMIT):
+    """
+    Pick ``limit`` neighbours, preferring new content types or states for
+    the first half and taking the best remaining scores after that
+    """
+    if len(ranked) <= limit:
+        return ranked
+
+    picked, picked_ids = [], set()
+    used_types, used_states = set(), set()
+    for item in ranked:
+        if len(picked) >= limit:
+            break
+        candidate = item[1]
+        if len(picked) < limit // 2:
+            if candidate.type not in used_types or not candidate.states & used_states:
+                picked.append(item)
+                picked_ids.add(candidate.id)
+                used_types.add(candidate.type)
+                used_states.update(candidate.states)
+            continue
+        picked.append(item)
+        picked_ids.add(candidate.id)
+
+    for item in ranked:
+        if len(picked) >= limit:
+            break
+        if item[1].id not in picked_ids:
+            picked.append(item)
+            picked_ids.add(item[1].id)
+    return picked[:limit]
+
+
+def _chunks(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), BATCH_SIZE):
+        yield ids[start:start + BATCH_SIZE]
+
+
+def refresh_related_content(full=False, using=None):
+    """
+    Recompute ``RelatedContent`` for articles whose features changed (or all
+    of them with ``full=True``) and return
+    ``{'articles': ..., 'changed': ..., 'refreshed': ...}``
+    """
+    from .models import Content, RelatedContent
+
+    features = load_features(using)
+    changed = {
+        pk for pk, article in features.items()
+        if full or article.signature != article.stored_signature
+    }
+    rows = RelatedContent.objects.using(using)
+
+    with transaction.atomic(using=using):
+        # Unpublished or rejected articles neither keep nor appear in lists
+        counted = counted_articles(using=using).values('pk')
+        rows.exclude(content__in=counted).delete()
+        orphaned = set(rows.exclude(related__in=counted).values_list('content_id', flat=True))
+
+        index = build_index(features)
+        affected = set(changed) | orphaned
+        for pk in changed:
+            for key in _keys(features[pk]):
+                if key[0] in REFRESH_KINDS:
+                    affected.update(index[key])
+        for ids in _chunks(changed):
+            affected.update(rows.filter(related_id__in=ids).values_list('content_id', flat=True))
+        affected &= set(features)
+
+        latest = latest_by_type(features)
+        recent_since = timezone.now() - RECENT_PERIOD
+        entries = []
+        for pk in affected:
+            ranked = score_neighbours(features[pk], features, index, latest, recent_since)
+            for rank, (score, candidate) in enumerate(diversify(ranked)):
+                entries.append(RelatedContent(content_id=pk, related_id=candidate.id, rank=rank, score=score))
+
+        for ids in _chunks(affected):
+            rows.filter(content_id__in=ids).delete()
+        rows.bulk_create(entries, batch_size=BATCH_SIZE)
+
+        # Remember what each refreshed list was computed from
+        stale = [
+            Content(pk=pk, related_signature=features[pk].signature)
+            for pk in changed
+        ]
+        Content.objects.using(using).bulk_update(stale, ['related_signature'], batch_size=BATCH_SIZE)
+
+    return {'articles': len(features), 'changed': len(changed), 'refreshed': len(affected)}
+
+
+def related_articles(article, limit=RELATED_LIMIT):
+    """Precomputed related articles of ``article``, closest first, one query"""
+    from .models import Content
+
+    return list(
+        Content.objects
+        .filter(related_from__content=article, **COUNTED_FILTER)
+        .order_by('related_from__rank')[:limit]
+    )
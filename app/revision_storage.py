@@ -0,0 +1,250 @@
+"""
+Delta-compressed revision bodies
+
+Every ContentRevision used to store the full article HTML, so the table
+grew with article size times edit count. Settled revisions (approved,
+rejected, sighted, flagged) now store their body as a delta against the
+previous approved revision of the same article:
+
+- ``body_delta`` lists the pieces of the new body in order. A ``[start,
+  end]`` pair copies that slice of the base revision's body, a string is
+  new text. Pieces are diffed over blocks, lines ending at a closing block
+  tag, ``<br>`` or a newline, which keeps the diff fast for long articles.
+- ``delta_base`` is the base revision and ``delta_depth`` the number of
+  deltas to apply from the nearest full copy.
+- ``body`` holds the full HTML of keyframes and is empty for deltas.
+
+A revision becomes a keyframe (full copy) when its base is
+``KEYFRAME_INTERVAL - 1`` deltas deep, when either body is larger than
+``MAX_DELTA_LENGTH`` or ``MAX_DELTA_BLOCKS`` or when the delta would not
+save at least half of the body. Reading a body fetches its chain in one
+query and applies at most ``KEYFRAME_INTERVAL - 1`` deltas. Drafts and pending revisions are edited
+in place and searched by reviewers, they keep full bodies until they are
+settled.
+
+``ContentRevision.content_text`` reconstructs the body on first access and
+accepts assignments as before. A revision whose body changes, or whose
+chain gets deeper when a status change re-encodes it, first stores the
+revisions based on it in full, so no chain outgrows the interval. Existing
+rows are converted with ``python manage.py compact_revisions``.
+"""
+import json
+import re
+from difflib import SequenceMatcher
+
+from django.apps import apps as global_apps
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+# Deltas applied at most to rebuild a body
+KEYFRAME_INTERVAL = 10
+
+# A delta is only kept if it is at most this fraction of the full body
+MAX_DELTA_RATIO = 0.5
+
+# Larger bodies are stored in full instead of being diffed
+MAX_DELTA_LENGTH = 500000
+MAX_DELTA_BLOCKS = 5000
+
+# Revisions that are still edited and searched, kept in full
+OPEN_STATUSES = {'draft', 'pending_review'}
+
+# Columns the body is stored in
+STORAGE_FIELDS = ['body', 'body_delta', 'delta_base', 'delta_depth']
+
+# Fields whose change re-encodes the body
+ENCODED_FIELDS = {'content_text', 'status'}
+
+_BLOCK_RE = re.compile(
+    r'.*?(?:</(?:p|div|li|h[1-6]|tr|table|ul|ol|blockquote|pre|figure)>|<br\s*/?>|\n)|.+',
+    re.DOTALL | re.IGNORECASE,
+)
+
+
+def _blocks(text):
+    return _BLOCK_RE.findall(text)
+
+
+def make_delta(base, text, base_blocks=None, blocks=None):
+    """Delta rebuilding ``text`` from ``base``, see the module docstring"""
+    base_tokens = base_blocks if base_blocks is not None else _blocks(base)
+    offsets = [0]
+    for token in base_tokens:
+        offsets.append(offsets[-1] + len(token))
+    tokens = blocks if blocks is not None else _blocks(text)
+
+    delta = []
+    matcher = SequenceMatcher(None, base_tokens, tokens)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            delta.append([offsets[i1], offsets[i2]])
+        elif j2 > j1:
+            delta.append(''.join(tokens[j1:j2]))
+    return delta
+
+
+def apply_delta(base, delta):
+    return ''.join(base[piece[0]:piece[1]] if isinstance(piece, list) else piece for piece in delta)
+
+
+def delta_size(delta):
+    return len(json.dumps(delta, ensure_ascii=False, separators=(',', ':')))
+
+
+def _chain(revision):
+    """
+    The revisions the delta of ``revision`` is based on, nearest first and
+    down to the keyframe, fetched in one query
+    """
+    model = type(revision)
+    db = revision._state.db
+    quote = connections[db].ops.quote_name
+    table = quote(model._meta.db_table)
+    pk = quote(model._meta.pk.column)
+    base = quote(model._meta.get_field('delta_base').column)
+    ids = RawSQL(
+        f'WITH RECURSIVE chain(id) AS (SELECT %s UNION '
+        f'SELECT revision.{base} FROM {table} revision JOIN chain ON revision.{pk} = chain.id '
+        f'WHERE revision.{base} IS NOT NULL) SELECT id FROM chain',
+        [revision.delta_base_id],
+    )
+    rows = model._default_manager.using(db).filter(pk__in=ids).only('pk', *STORAGE_FIELDS).in_bulk()
+
+    chain = []
+    row = rows[revision.delta_base_id]
+    while True:
+        chain.append(row)
+        if row.body_delta is None:
+            return chain
+        row = rows[row.delta_base_id]
+
+
+def reconstruct(revision):
+    """Full body of ``revision``, applying the deltas of its chain in memory"""
+    if revision.body_delta is None:
+        return revision.body
+    chain = _chain(revision)
+    text = chain[-1].body
+    for row in reversed(chain[:-1]):
+        text = apply_delta(text, row.body_delta)
+    return apply_delta(text, revision.body_delta)
+
+
+def encode(revision, text, base=None, base_text=None):
+    """
+    Store ``text`` on ``revision`` as a delta against ``base``, whose body
+    is ``base_text``, or in full when that saves too little
+    """
+    delta = None
+    if (
+        base is not None and base.delta_depth + 1 < KEYFRAME_INTERVAL and text
+        and max(len(text), len(base_text)) <= MAX_DELTA_LENGTH
+    ):
+        base_blocks, blocks = _blocks(base_text), _blocks(text)
+        if max(len(base_blocks), len(blocks)) <= MAX_DELTA_BLOCKS:
+            delta = make_delta(base_text, text, base_blocks, blocks)
+    if delta is not None and delta_size(delta) <= len(text) * MAX_DELTA_RATIO:
+        revision.body = ''
+        revision.body_delta = delta
+        revision.delta_base = base
+        revision.delta_depth = base.delta_depth + 1
+        return
+    revision.body = text
+    revision.body_delta = None
+    revision.delta_base = None
+    revision.delta_depth = 0
+
+
+def previous_approved(revision, using=None):
+    """The approved revision of the same article preceding ``revision``"""
+    revisions = type(revision)._default_manager.using(using or revision._state.db).filter(
+        content_id=revision.content_id, status='approved',
+    )
+    if revision.pk is not None:
+        revisions = revisions.filter(pk__lt=revision.pk)
+    return revisions.order_by('-pk').first()
+
+
+def materialize_dependents(revision, using=None):
+    """Store the revisions based on ``revision`` in full, before it changes or goes"""
+    db = using or revision._state.db
+    dependents = type(revision)._default_manager.using(db).filter(delta_base_id=revision.pk)
+    for dependent in dependents:
+        text = dependent.content_text
+        dependents.filter(pk=dependent.pk).update(body=text, body_delta=None, delta_base=None, delta_depth=0)
+
+
+def needs_encoding(revision):
+    """New revisions, changed bodies and status changes are encoded on save"""
+    return revision.pk is None or revision._content_text_changed or revision.status != revision._stored_status
+
+
+def prepare(revision, using=None):
+    """Encode the body of ``revision`` before it is saved"""
+    text = revision.content_text
+    stored_depth = revision.delta_depth
+
+    base = None
+    if revision.status not in OPEN_STATUSES and revision.content_id is not None:
+        base = previous_approved(revision, using)
+    encode(revision, text, base, base.content_text if base is not None else None)
+
+    # Dependents read the stored row, which has not been written yet
+    if revision.pk is not None and (revision._content_text_changed or revision.delta_depth > stored_depth):
+        materialize_dependents(revision, using)
+    revision._content_text_changed = False
+
+
+def _stored_size(revision):
+    return len(revision.body) + (delta_size(revision.body_delta) if revision.body_delta is not None else 0)
+
+
+def compact_all(apps=global_apps, using=None, batch_size=100):
+    """
+    Re-encode the revisions of every article, in batches of articles.
+    Returns ``(revisions changed, stored bytes before, stored bytes after)``.
+    """
+    ContentRevision = apps.get_model('app', 'ContentRevision')
+    manager = ContentRevision._default_manager.db_manager(using)
+
+    changed = before = after = 0
+    last_content = 0
+    while True:
+        content_ids = list(
+            manager.filter(content_id__gt=last_content).order_by('content_id')
+            .values_list('content_id', flat=True).distinct()[:batch_size]
+        )
+        if not content_ids:
+            return changed, before, after
+
+        revisions = list(
+            manager.filter(content_id__in=content_ids).order_by('content_id', 'pk')
+            .only('pk', 'content_id', 'status', *STORAGE_FIELDS)
+        )
+
+        # Rebuild every body in memory first, bases precede their dependents
+        texts = {}
+        for revision in revisions:
+            if revision.body_delta is None:
+                texts[revision.pk] = revision.body
+            else:
+                texts[revision.pk] = apply_delta(texts[revision.delta_base_id], revision.body_delta)
+            before += _stored_size(revision)
+
+        stale = []
+        previous_approved_revision = {}
+        for revision in revisions:
+            current = (revision.body, revision.body_delta, revision.delta_base_id, revision.delta_depth)
+            base = None
+            if revision.status not in OPEN_STATUSES:
+                base = previous_approved_revision.get(revision.content_id)
+            encode(revision, texts[revision.pk], base, texts[base.pk] if base is not None else None)
+            if (revision.body, revision.body_delta, revision.delta_base_id, revision.delta_depth) != current:
+                stale.append(revision)
+            if revision.status == 'approved':
+                previous_approved_revision[revision.content_id] = revision
+            after += _stored_size(revision)
+
+        manager.bulk_update(stale, STORAGE_FIELDS, batch_size=batch_size)
+        changed += len(stale)
+        last_content = content_ids[-1]
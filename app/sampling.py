@@ -0,0 +1,128 @@
+"""
+Random sampling without ORDER BY RANDOM()
+
+``order_by('?')`` sorts every matching row to return a handful. ``sample``
+instead picks random positions in a cached array of matching ids, then
+fetches only the chosen rows by primary key, so random widgets cost one
+indexed query however large the table grows.
+
+Id arrays are kept per model and filter signature under a version stamp
+(``CONTENT_VERSION`` for content, ``TAXONOMY_VERSION`` for categories, tags
+and states), so they refresh when the underlying rows change. Each process
+keeps the current arrays in memory and only reads the shared cache, or the
+database, after the stamp moved, so a pick costs O(k). Result sets
+larger than ``MAX_CACHED_IDS`` are sampled by probing random primary keys
+between the smallest and largest matching id instead, which walks the
+primary key index once per pick.
+"""
+import random
+import threading
+
+from django.core.cache import cache
+from django.db.models import Max, Min
+
+from .caching import CONTENT_VERSION, TAXONOMY_VERSION, get_version
+
+SAMPLE_CACHE_TIMEOUT = 60 * 60
+
+# Larger result sets use primary key probing instead of a cached id array
+MAX_CACHED_IDS = 50000
+
+# Models whose rows are covered by the taxonomy version stamp
+TAXONOMY_MODELS = {'app.category', 'app.tag', 'app.state'}
+
+_random = random.SystemRandom()
+
+# (model label, signature) -> (version, population), for this process
+_populations = {}
+_lock = threading.Lock()
+
+
+def _version(model):
+    if model._meta.label_lower in TAXONOMY_MODELS:
+        return get_version(TAXONOMY_VERSION)
+    return get_version(CONTENT_VERSION)
+
+
+def _load(queryset, key):
+    population = cache.get(key)
+    if population is None:
+        ids = list(queryset.order_by().values_list('pk', flat=True)[:MAX_CACHED_IDS + 1])
+        if len(ids) <= MAX_CACHED_IDS:
+            population = ('ids', ids)
+        else:
+            bounds = queryset.order_by().aggregate(low=Min('pk'), high=Max('pk'))
+            population = ('range', (bounds['low'], bounds['high']))
+        cache.set(key, population, SAMPLE_CACHE_TIMEOUT)
+    return population
+
+
+def _population(queryset, signature):
+    """
+    Return ``('ids', [pk, ...])`` or ``('range', (min_pk, max_pk))`` for a
+    filtered queryset, kept per signature
+    """
+    label = queryset.model._meta.label_lower
+    version = _version(queryset.model)
+    current = _populations.get((label, signature))
+    if current is not None and current[0] == version:
+        return current[1]
+    with _lock:
+        current = _populations.get((label, signature))
+        if current is None or current[0] != version:
+            current = (version, _load(queryset, f'sample:{label}:{version}:{signature}'))
+            _populations[(label, signature)] = current
+    return current[1]
+
+
+def _probe(queryset, low, high, k, exclude):
+    """Pick up to ``k`` ids by seeking to random primary keys"""
+    picked = []
+    for _ in range(k * 3):
+        if len(picked) >= k:
+            break
+        start = _random.randint(low, high)
+        pk = (
+            queryset.filter(pk__gte=start).order_by('pk').values_list('pk', flat=True).first()
+            or queryset.order_by('pk').values_list('pk', flat=True).first()
+        )
+        if pk is not None and pk not in exclude and pk not in picked:
+            picked.append(pk)
+    return picked
+
+
+def sample_ids(queryset, k, signature, exclude=()):
+    """
+    Return up to ``k`` distinct random primary keys from ``queryset``.
+
+    ``signature`` must uniquely describe the queryset's filters (e.g.
+    ``'published-articles'``), it is the cache key of the id array.
+    """
+    exclude = set(exclude)
+    kind, population = _population(queryset, signature)
+    if kind == 'range':
+        low, high = population
+        if low is None:
+            return []
+        return _probe(queryset, low, high, k, exclude)
+
+    size = len(population)
+    picked = []
+    for index in _random.sample(range(size), min(size, k + len(exclude))):
+        pk = population[index]
+        if pk not in exclude:
+            picked.append(pk)
+            if len(picked) == k:
+                break
+    return picked
+
+
+def sample(queryset, k, signature, exclude=()):
+    """
+    Return up to ``k`` random objects from ``queryset`` in random order
+    """
+    ids = sample_ids(queryset, k, signature, exclude=exclude)
+    if not ids:
+        return []
+    objects = queryset.in_bulk(ids)
+    return [objects[pk] for pk in ids if pk in objects]
@@ -0,0 +1,568 @@
+"""
+Full-text search backends for Northeast India Wiki
+
+Searchable models get a precomputed, weighted search document. For Content:
+
+    A - title
+    B - excerpt
+    C - category, state and tag names
+    D - article body with the HTML stripped
+
+and for ContentRevision (reviewer search in the review queue and patrol):
+
+    A - revision title
+    B - revision comment
+    C - editor username
+    D - revision body with the HTML stripped
+
+On PostgreSQL each document lives in a ``search_vector`` tsvector column
+backed by a GIN index. On SQLite it lives in an FTS5 virtual table keyed by
+the row id (``app_content_search``, ``app_contentrevision_search``). Any
+other database (or an SQLite build without FTS5) falls back to the old
+``icontains`` scan so search keeps working everywhere.
+
+Indexes are refreshed from the model signals in ``app/signals.py``; run
+``python manage.py rebuild_search_index`` to rebuild them from scratch.
+"""
+import html
+import re
+from abc import ABC, abstractmethod
+
+from django.db import connections, router
+from django.db.models import Case, F, Func, IntegerField, Q, TextField, Value, When
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape, strip_tags
+from django.utils.safestring import mark_safe
+
+SEARCH_CONFIG = 'english'
+
+# Matches ranked by relevance on SQLite, further matches follow in the index's ordering
+SEARCH_MAX_RESULTS = 500
+
+# Markers used while building snippets, swapped for <mark> after escaping
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_STOP = '\x03'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+_MAX_QUERY_TOKENS = 10
+
+
+def tokenize_query(query):
+    """Split a user query into safe, lowercase search tokens"""
+    if not query:
+        return []
+    return _TOKEN_RE.findall(query.lower())[:_MAX_QUERY_TOKENS]
+
+
+def html_to_text(value):
+    """Strip HTML tags and entities from stored article HTML"""
+    if not value:
+        return ''
+    return ' '.join(html.unescape(strip_tags(value)).split())
+
+
+def render_snippet(snippet):
+    """Escape a raw snippet and turn the highlight markers into <mark> tags"""
+    if not snippet:
+        return ''
+    escaped = escape(snippet)
+    escaped = escaped.replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_STOP, '</mark>')
+    return mark_safe(escaped)
+
+
+def _preserve_order(queryset, ids, condition=None, ordering=()):
+    """
+    Restrict a queryset to ``ids``, or to ``condition`` when given, and put
+    ``ids`` first in the given order followed by the other rows by ``ordering``
+    """
+    if condition is None:
+        if not ids:
+            return queryset.none()
+        condition = Q(pk__in=ids)
+    position = Case(
+        *[When(pk=pk, then=Value(position)) for position, pk in enumerate(ids)],
+        default=Value(len(ids)),
+        output_field=IntegerField(),
+    )
+    return queryset.filter(condition).annotate(search_position=position).order_by('search_position', *ordering)
+
+
+class SearchIndex(ABC):
+    """
+    Describes the weighted search document of one model
+    """
+    # Model label, e.g. 'app.content'
+    label = None
+    # FTS5 table used on SQLite
+    table = None
+    # Document parts in decreasing order of weight (A, B, C, D)
+    columns = ()
+    # bm25() column weights matching ``columns``
+    bm25_weights = ()
+    # Model fields scanned by the icontains fallback
+    fallback_fields = ()
+    # HTML field used for highlighted snippets
+    body_field = None
+    # Fallback ordering used alongside the rank
+    ordering = ('-pk',)
+
+    @abstractmethod
+    def document(self, instance):
+        """Return ``{column: text}`` for an instance"""
+
+    def snippet_source(self, instance):
+        """Plain text used when the backend can't build a snippet itself"""
+        return html_to_text(getattr(instance, self.body_field))
+
+
+class ContentSearchIndex(SearchIndex):
+    label = 'app.content'
+    table = 'app_content_search'
+    columns = ('title', 'excerpt', 'taxonomy', 'body')
+    bm25_weights = (10.0, 5.0, 3.0, 1.0)
+    fallback_fields = ('title', 'excerpt', 'content')
+    body_field = 'content'
+    ordering = ('-published_at', '-pk')
+
+    def document(self, content):
+        taxonomy = []
+        if content.pk:
+            taxonomy.extend(content.categories.values_list('name', flat=True))
+            taxonomy.extend(content.states.values_list('name', flat=True))
+            taxonomy.extend(content.tags.values_list('name', flat=True))
+
+        return {
+            'title': content.title or '',
+            'excerpt': content.excerpt or '',
+            'taxonomy': ' '.join(taxonomy),
+            'body': html_to_text(content.content),
+        }
+
+    def snippet_source(self, content):
+        return content.excerpt or html_to_text(content.content)
+
+
+class RevisionSearchIndex(SearchIndex):
+    label = 'app.contentrevision'
+    table = 'app_contentrevision_search'
+    columns = ('title', 'comment', 'editor', 'body')
+    bm25_weights = (10.0, 5.0, 3.0, 1.0)
+    # Settled revisions store a delta, only full bodies are matched and highlighted in SQL
+    fallback_fields = ('title', 'revision_comment', 'editor__username', 'body')
+    body_field = 'body'
+    ordering = ('-created_at', '-pk')
+
+    def document(self, revision):
+        editor = revision.editor.username if revision.editor_id else ''
+        return {
+            'title': revision.title or '',
+            'comment': revision.revision_comment or '',
+            'editor': editor,
+            'body': html_to_text(revision.content_text),
+        }
+
+    def snippet_source(self, revision):
+        return html_to_text(revision.content_text)
+
+
+CONTENT_INDEX = ContentSearchIndex()
+REVISION_INDEX = RevisionSearchIndex()
+
+SEARCH_INDEXES = {index.label: index for index in (CONTENT_INDEX, REVISION_INDEX)}
+
+# Kept for code that refers to the article FTS table directly
+SEARCH_INDEX_TABLE = CONTENT_INDEX.table
+
+
+def get_search_index(model):
+    """Return the SearchIndex for a model class (historical models work too)"""
+    return SEARCH_INDEXES[model._meta.label_lower]
+
+
+def build_search_document(content):
+    """Build the weighted search document for a Content instance"""
+    return CONTENT_INDEX.document(content)
+
+
+class BaseSearchBackend:
+    """
+    Plain ``icontains`` search used when no full-text index is available
+    """
+    name = 'basic'
+
+    def __init__(self, alias, index):
+        self.alias = alias
+        self.index = index
+
+    @property
+    def connection(self):
+        return connections[self.alias]
+
+    def update(self, instance):
+        """Store the search document for a single instance"""
+
+    def remove(self, pk):
+        """Drop a row from the index"""
+
+    def rebuild(self, model, batch_size=500):
+        """Reindex every row of ``model``, returning the number indexed"""
+        count = 0
+        queryset = model._default_manager.using(self.alias).order_by('pk')
+        for instance in queryset.iterator(chunk_size=batch_size):
+            self.update(instance)
+            count += 1
+        return count
+
+    def search(self, queryset, query, prefix=False, also=None):
+        """
+        Filter ``queryset`` down to matches for ``query`` ordered by relevance.
+        Rows matching the ``also`` condition are kept too, after the matches.
+        """
+        tokens = tokenize_query(query)
+        if not tokens:
+            return queryset.filter(also) if also is not None else queryset.none()
+
+        condition = Q()
+        for token in tokens:
+            token_condition = Q()
+            for field in self.index.fallback_fields:
+                token_condition |= Q(**{f'{field}__icontains': token})
+            condition &= token_condition
+        if also is not None:
+            condition |= also
+        return queryset.filter(condition)
+
+    def highlight(self, objects, query):
+        """Attach a highlighted ``search_snippet`` to each object"""
+        tokens = tokenize_query(query)
+        pattern = re.compile(
+            r'\b(' + '|'.join(re.escape(token) for token in tokens) + r')',
+            re.IGNORECASE,
+        ) if tokens else None
+
+        for obj in objects:
+            text = self.index.snippet_source(obj)
+            match = pattern.search(text) if pattern else None
+            if match:
+                start = max(0, match.start() - 60)
+                window = text[start:start + 200]
+                window = pattern.sub(lambda m: f'{HIGHLIGHT_START}{m.group(0)}{HIGHLIGHT_STOP}', window)
+                if start > 0:
+                    window = '…' + window
+                if start + 200 < len(text):
+                    window += '…'
+            else:
+                window = text[:200]
+            obj.search_snippet = render_snippet(window)
+        return objects
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    PostgreSQL tsvector search backed by a GIN index on ``search_vector``
+    """
+    name = 'postgresql'
+
+    def _vector(self, document):
+        from django.contrib.postgres.search import SearchVector
+
+        vector = None
+        for column, weight in zip(self.index.columns, 'ABCD'):
+            part_vector = SearchVector(
+                Value(document[column], output_field=TextField()),
+                weight=weight,
+                config=SEARCH_CONFIG,
+            )
+            vector = part_vector if vector is None else vector + part_vector
+        return vector
+
+    def _query(self, tokens, prefix):
+        from django.contrib.postgres.search import SearchQuery
+
+        terms = list(tokens)
+        if prefix:
+            terms[-1] = f'{terms[-1]}:*'
+        return SearchQuery(' & '.join(terms), search_type='raw', config=SEARCH_CONFIG)
+
+    def update(self, instance):
+        document = self.index.document(instance)
+        type(instance)._default_manager.using(self.alias).filter(pk=instance.pk).update(
+            search_vector=self._vector(document)
+        )
+
+    def search(self, queryset, query, prefix=False, also=None):
+        from django.contrib.postgres.search import SearchRank
+
+        tokens = tokenize_query(query)
+        if not tokens:
+            return super().search(queryset, query, prefix=prefix, also=also)
+
+        search_query = self._query(tokens, prefix)
+        condition = Q(search_vector=search_query)
+        if also is not None:
+            # Rows only matching ``also`` rank 0 and sort last
+            condition |= also
+        return queryset.filter(condition).annotate(
+            search_rank=SearchRank(F('search_vector'), search_query)
+        ).order_by('-search_rank', *self.index.ordering)
+
+    def highlight(self, objects, query):
+        from django.contrib.postgres.search import SearchHeadline
+
+        tokens = tokenize_query(query)
+        objects = list(objects)
+        if not tokens or not objects:
+            return super().highlight(objects, query)
+
+        model = type(objects[0])
+        plain_text = Func(
+            F(self.index.body_field), Value('<[^>]+>'), Value(' '), Value('g'),
+            function='regexp_replace',
+            output_field=TextField(),
+        )
+        headlines = dict(
+            model._default_manager.using(self.alias)
+            .filter(pk__in=[obj.pk for obj in objects])
+            .annotate(headline=SearchHeadline(
+                plain_text,
+                self._query(tokens, prefix=True),
+                config=SEARCH_CONFIG,
+                start_sel=HIGHLIGHT_START,
+                stop_sel=HIGHLIGHT_STOP,
+                max_words=35,
+                min_words=15,
+            ))
+            .values_list('pk', 'headline')
+        )
+        missing = []
+        for obj in objects:
+            if headlines.get(obj.pk):
+                obj.search_snippet = render_snippet(html.unescape(headlines[obj.pk]))
+            else:
+                missing.append(obj)
+        # Bodies stored as deltas have no text to highlight in SQL
+        super().highlight(missing, query)
+        return objects
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """
+    SQLite FTS5 search over the index's virtual table
+    """
+    name = 'sqlite'
+
+    def _match(self, tokens, prefix):
+        terms = ['"%s"' % token for token in tokens]
+        if prefix:
+            terms[-1] += '*'
+        return ' '.join(terms)
+
+    def update(self, instance):
+        document = self.index.document(instance)
+        columns = ', '.join(self.index.columns)
+        placeholders = ', '.join(['%s'] * len(self.index.columns))
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.index.table} WHERE rowid = %s', [instance.pk])
+            cursor.execute(
+                f'INSERT INTO {self.index.table} (rowid, {columns}) VALUES (%s, {placeholders})',
+                [instance.pk] + [document[column] for column in self.index.columns],
+            )
+
+    def remove(self, pk):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.index.table} WHERE rowid = %s', [pk])
+
+    def rebuild(self, model, batch_size=500):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.index.table}')
+        return super().rebuild(model, batch_size=batch_size)
+
+    def ranked_ids(self, query, prefix=False, queryset=None, limit=None):
+        """
+        Return ids matching ``query``, best match first, at most ``limit``
+        (``SEARCH_MAX_RESULTS`` by default) and only those in ``queryset``
+        """
+        tokens = tokenize_query(query)
+        if not tokens:
+            return []
+        table = self.index.table
+        weights = ', '.join(str(weight) for weight in self.index.bm25_weights)
+        sql = f'SELECT rowid FROM {table} WHERE {table} MATCH %s'
+        params = [self._match(tokens, prefix)]
+        if queryset is not None:
+            subquery, subquery_params = (
+                queryset.order_by().values('pk').query.get_compiler(self.alias).as_sql()
+            )
+            # The unary + keeps FTS5 from probing the index once per row of the subquery
+            sql += f' AND +rowid IN ({subquery})'
+            params.extend(subquery_params)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'{sql} ORDER BY bm25({table}, {weights}) LIMIT %s',
+                [*params, limit or SEARCH_MAX_RESULTS],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def search(self, queryset, query, prefix=False, also=None):
+        tokens = tokenize_query(query)
+        if not tokens:
+            return super().search(queryset, query, prefix=prefix, also=also)
+
+        ids = self.ranked_ids(query, prefix=prefix, queryset=queryset)
+        condition = None
+        if len(ids) == SEARCH_MAX_RESULTS:
+            # Keep every match beyond the ranked ones, so counts and later pages stay right
+            table = self.index.table
+            condition = Q(pk__in=RawSQL(
+                f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [self._match(tokens, prefix)],
+            ))
+        if also is not None:
+            condition = (condition if condition is not None else Q(pk__in=ids)) | also
+        return _preserve_order(queryset, ids, condition, self.index.ordering)
+
+    def highlight(self, objects, query):
+        tokens = tokenize_query(query)
+        objects = list(objects)
+        if not tokens or not objects:
+            return super().highlight(objects, query)
+
+        table = self.index.table
+        ids = [obj.pk for obj in objects]
+        placeholders = ', '.join(['%s'] * len(ids))
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, snippet({table}, -1, %s, %s, '…', 24) "
+                f'FROM {table} WHERE {table} MATCH %s AND rowid IN ({placeholders})',
+                [HIGHLIGHT_START, HIGHLIGHT_STOP, self._match(tokens, prefix=True)] + ids,
+            )
+            snippets = dict(cursor.fetchall())
+        for obj in objects:
+            obj.search_snippet = render_snippet(snippets.get(obj.pk, ''))
+        return objects
+
+
+def sqlite_has_search_table(connection, index=CONTENT_INDEX):
+    """Check whether an FTS5 search table has been created"""
+    return index.table in connection.introspection.table_names()
+
+
+_backends = {}
+
+
+def get_search_backend(using=None, index=CONTENT_INDEX):
+    """
+    Return the search backend for a database alias and index, picked by vendor
+    """
+    if using is None:
+        from django.apps import apps
+        using = router.db_for_read(apps.get_model(index.label))
+
+    backend = _backends.get((using, index.label))
+    if backend is not None:
+        return backend
+
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        backend = PostgresSearchBackend(using, index)
+    elif connection.vendor == 'sqlite' and sqlite_has_search_table(connection, index):
+        backend = SQLiteSearchBackend(using, index)
+    else:
+        # Don't cache the fallback, the FTS table may simply not be migrated yet
+        return BaseSearchBackend(using, index)
+
+    _backends[(using, index.label)] = backend
+    return backend
+
+
+def search(queryset, query, prefix=False, also=None):
+    """
+    Filter a queryset of any searchable model down to full-text matches for
+    ``query``, ordered by relevance. Rows matching the ``also`` Q object
+    are kept too and listed after the matches.
+    """
+    index = get_search_index(queryset.model)
+    return get_search_backend(queryset.db, index).search(queryset, query, prefix=prefix, also=also)
+
+
+def search_content(queryset, query, prefix=False, also=None):
+    """
+    Filter a Content queryset down to full-text matches for ``query``,
+    ordered by relevance. Use ``prefix=True`` for as-you-type search.
+    """
+    return search(queryset, query, prefix=prefix, also=also)
+
+
+def search_revisions(queryset, query, prefix=False, also=None):
+    """
+    Filter a ContentRevision queryset down to full-text matches for
+    ``query``, ordered by relevance. Used by the review queue and patrol.
+    """
+    return search(queryset, query, prefix=prefix, also=also)
+
+
+def highlight_results(objects, query):
+    """Attach a highlighted ``search_snippet`` to each object in ``objects``"""
+    objects = list(objects)
+    if not objects:
+        return objects
+    index = get_search_index(type(objects[0]))
+    return get_search_backend(objects[0]._state.db, index).highlight(objects, query)
+
+
+def update_search_index(instance):
+    """Refresh the search document for a single Content or ContentRevision"""
+    if instance.pk is None:
+        return
+    index = get_search_index(type(instance))
+    get_search_backend(instance._state.db, index).update(instance)
+
+
+def remove_from_search_index(model, pk, using=None):
+    """Remove a deleted row from its search index"""
+    get_search_backend(using, get_search_index(model)).remove(pk)
+
+
+def rebuild_search_index(model=None, using=None, batch_size=500):
+    """Rebuild the search index of ``model`` (Content by default)"""
+    if model is None:
+        from .models import Content
+        model = Content
+    return get_search_backend(using, get_search_index(model)).rebuild(model, batch_size=batch_size)
+
+
+def create_search_index(connection, index=CONTENT_INDEX):
+    """
+    Create the database-specific search structures for an index.
+    Called from the migrations that add the ``search_vector`` columns.
+    """
+    if connection.vendor == 'postgresql':
+        db_table = index.label.replace('.', '_')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {db_table}_search_vector_gin '
+                f'ON {db_table} USING GIN (search_vector)'
+            )
+    elif connection.vendor == 'sqlite':
+        from django.db import OperationalError
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {index.table} USING fts5("
+                    f"{', '.join(index.columns)}, tokenize = 'porter unicode61 remove_diacritics 2')"
+                )
+        except OperationalError:
+            # SQLite built without FTS5, search falls back to icontains
+            pass
+    _backends.pop((connection.alias, index.label), None)
+
+
+def drop_search_index(connection, index=CONTENT_INDEX):
+    """Drop the structures created by ``create_search_index``"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            db_table = index.label.replace('.', '_')
+            cursor.execute(f'DROP INDEX IF EXISTS {db_table}_search_vector_gin')
+        elif connection.vendor == 'sqlite':
+            cursor.execute(f'DROP TABLE IF EXISTS {index.table}')
+    _backends.pop((connection.alias, index.label), None)
@@ -0,0 +1,88 @@
+"""
+Search result cache
+
+Popular queries are answered from the cache instead of re-running full-text
+search. Each entry holds only the ordered Content ids of one result page
+plus its cursors and count, keyed by the normalized query, filters and
+cursor. Keys embed the global content generation counter
+(``CONTENT_VERSION``), which is bumped whenever content is published,
+unpublished, edited or has a revision applied, so stale entries are simply
+never read again and no key scanning is needed.
+
+Hit and miss totals are kept in the cache too; see
+``python manage.py search_cache_stats``.
+"""
+from django.core.cache import cache
+
+from .caching import CONTENT_VERSION, get_version
+from .facets import filter_signature
+from .pagination import CursorPage, CursorPaginator
+from .search import search_content
+
+SEARCH_CACHE_TIMEOUT = 60 * 30
+
+HITS_KEY = 'stats:search_cache:hits'
+MISSES_KEY = 'stats:search_cache:misses'
+
+
+def _increment(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_stats():
+    """Return hit/miss totals and the hit ratio"""
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+    }
+
+
+def reset_stats():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
+
+
+def search_cache_key(query, cursor=None, per_page=None, **filters):
+    signature = filter_signature(q=query, cursor=cursor, per_page=per_page, **filters)
+    return f'search:{get_version(CONTENT_VERSION)}:{signature}'
+
+
+def cached_search_page(queryset, query, per_page, cursor=None, **filters):
+    """
+    Return one CursorPage of full-text results for ``query`` within ``queryset``.
+
+    ``filters`` are the request filters that shaped ``queryset`` and only
+    contribute to the cache key.
+    """
+    key = search_cache_key(query, cursor=cursor, per_page=per_page, **filters)
+    entry = cache.get(key)
+
+    if entry is not None:
+        _increment(HITS_KEY)
+        paginator = CursorPaginator(queryset, per_page, count_mode='approximate')
+        # Prime the cached count so the header doesn't trigger a query
+        paginator.count = entry['count']
+        paginator.count_is_approximate = entry['count_is_approximate']
+
+        objects = queryset.filter(pk__in=entry['ids']).in_bulk()
+        rows = [objects[pk] for pk in entry['ids'] if pk in objects]
+        return CursorPage(rows, paginator, entry['next'], entry['previous'])
+
+    _increment(MISSES_KEY)
+    paginator = CursorPaginator(search_content(queryset, query), per_page, count_mode='approximate')
+    page = paginator.get_page(cursor)
+    cache.set(key, {
+        'ids': [obj.pk for obj in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+        'count': paginator.count,
+        'count_is_approximate': paginator.count_is_approximate,
+    }, SEARCH_CACHE_TIMEOUT)
+    return page
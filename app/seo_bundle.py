@@ -0,0 +1,481 @@
+"""
+Precomputed SEO metadata
+
+The article page used to derive its titles, descriptions, keywords, reading
+time, mentions and schema.org types in a dozen template tags, each
+lowercasing or regex-stripping the body and re-reading the categories,
+states and tags. ``build_bundle`` computes all of them once and the result
+is stored as JSON in ``Content.seo_bundle``::
+
+    {
+        "version": 1,
+        "titles": {"detail": ..., "list": ...},
+        "descriptions": {"155": ..., "200": ...},
+        "social_keywords": "...",
+        "keywords": [...],
+        "reading_time": 3,
+        "cultural_context": [...],
+        "mentions": {"people": [...], "places": [...], ...},
+        "schema_types": ["Article", ...]
+    }
+
+The bundle is rebuilt when an article is saved (including applied
+revisions) or its categories, tags or states change, after the
+classification (see app/signals.py). Renaming a category, tag or state
+empties the bundles of its articles. The template tags read the bundle with
+``lookup`` and compute the value on the fly when it is missing or was built
+by an older ``SEO_BUNDLE_VERSION``; bump the version whenever a builder
+below changes. Fill missing bundles with
+``python manage.py build_seo_bundles``.
+"""
+import re
+
+from django.apps import apps as global_apps
+from django.db.models import Q, prefetch_related_objects
+
+from . import classification
+
+SEO_BUNDLE_VERSION = 1
+
+# Content fields the bundle reads, besides the categories, states and tags
+BUNDLE_FIELDS = {'title', 'content', 'excerpt'}
+
+TITLE_CONTEXTS = ('detail', 'list')
+
+# Description lengths used by the meta, Open Graph and Twitter tags
+DESCRIPTION_LENGTHS = (155, 200)
+
+_TAG_RE = re.compile(r'<[^>]+>')
+
+CULTURAL_INDICATORS = {
+    'festivals': ['festival', 'celebration', 'ceremony'],
+    'arts': ['art', 'craft', 'painting', 'sculpture'],
+    'music': ['music', 'song', 'instrument', 'dance'],
+    'traditions': ['tradition', 'custom', 'ritual', 'practice'],
+    'cuisine': ['food', 'cuisine', 'dish', 'recipe'],
+    'language': ['language', 'dialect', 'literature'],
+    'attire': ['dress', 'costume', 'attire', 'clothing']
+}
+
+# Common Northeast India personalities (example)
+NE_PERSONALITIES = [
+    'bhupen hazarika', 'mary kom', 'irom sharmila', 'bishnu prasad rabha',
+    'mamang dai', 'temsula ao', 'robin s sharma'
+]
+
+# Common places in Northeast India
+NE_PLACES = [
+    'guwahati', 'shillong', 'imphal', 'kohima', 'aizawl', 'agartala',
+    'itanagar', 'gangtok', 'kaziranga', 'cherrapunji', 'tawang'
+]
+
+SCHEMA_TYPES = {
+    'Person': ['Article', 'Person'],
+    'Place': ['Article', 'Place', 'TouristDestination'],
+    'Event': ['Article', 'Event', 'Festival'],
+    'Cultural': ['Article', 'CreativeWork', 'VisualArtwork']
+}
+
+
+def content_type(article):
+    return article.detected_type or classification.detect_type(article)
+
+
+def reading_time(article):
+    """Calculate estimated reading time for an article"""
+    if not article.content:
+        return 0
+    word_count = len(_TAG_RE.sub('', article.content).split())
+    # Average reading speed is 200-250 words per minute
+    return max(1, round(word_count / 225))
+
+
+def cultural_context(article):
+    """Extract cultural context and significance from article"""
+    all_terms = [cat.name.lower() for cat in article.categories.all()]
+    all_terms += [tag.name.lower() for tag in article.tags.all()]
+    return [
+        category for category, keywords in CULTURAL_INDICATORS.items()
+        if any(keyword in term for term in all_terms for keyword in keywords)
+    ]
+
+
+def content_keywords(article):
+    """Generate comprehensive keywords for the article based on content analysis"""
+    keywords = {
+        'Northeast India',
+        'Seven Sisters states',
+        'Northeast Indian culture',
+        'Indian heritage',
+        'Tribal culture',
+        'Indigenous traditions',
+    }
+
+    for state in article.states.all():
+        keywords.add(state.name)
+        keywords.add(f"{state.name} culture")
+        if state.capital:
+            keywords.add(state.capital)
+
+    for category in article.categories.all():
+        keywords.add(category.name)
+        keywords.add(f"Northeast India {category.name}")
+
+    for tag in article.tags.all():
+        keywords.add(tag.name)
+
+    detected = content_type(article)
+    if detected == 'Person':
+        keywords.update(['Northeast India personality', 'Indian leader', 'cultural figure'])
+    elif detected == 'Place':
+        keywords.update(['Northeast India tourism', 'tourist destination', 'travel guide'])
+    elif detected == 'Event':
+        keywords.update(['Northeast India festival', 'cultural event', 'traditional celebration'])
+    elif detected == 'Cultural':
+        keywords.update(['traditional art', 'cultural heritage', 'indigenous practice'])
+
+    return sorted(keywords)
+
+
+def mentions(article):
+    """Extract mentions of notable entities from article content"""
+    content_lower = article.content.lower() if article.content else ''
+    return {
+        'people': [person.title() for person in NE_PERSONALITIES if person in content_lower],
+        'places': [place.title() for place in NE_PLACES if place in content_lower],
+        'organizations': [],
+        'events': [],
+    }
+
+
+def schema_types(article):
+    """Get the most appropriate Schema.org types for the article content"""
+    return SCHEMA_TYPES.get(content_type(article), ['Article'])
+
+
+def truncate_title(title, max_length=60):
+    """Truncate title to specified length while keeping it readable"""
+    if len(title) <= max_length:
+        return title
+
+    # Try to truncate at word boundary
+    truncated = title[:max_length].rsplit(' ', 1)[0]
+    if len(truncated) >= max_length - 10:  # If we get a reasonable length
+        return truncated + "..."
+    # If word boundary truncation is too short, just cut and add ellipsis
+    return title[:max_length-3] + "..."
+
+
+def profession(article):
+    """Stored profession, detected on the fly for unclassified articles"""
+    if article.detected_type:
+        return article.profession or None
+    return classification.detect_profession(article)
+
+
+def is_festival(article):
+    """Stored festival flag, detected on the fly for unclassified articles"""
+    if article.detected_type:
+        return article.detected_subtype == 'Festival'
+    return classification.is_festival(article)
+
+
+def cultural_type(article):
+    """Stored cultural element type, detected on the fly for unclassified articles"""
+    if article.detected_type:
+        return article.detected_subtype or None
+    return classification.detect_cultural_type(article)
+
+
+def optimized_title(article, context='detail'):
+    """
+    Generate SEO-optimized titles for articles with regional keywords
+    Keeps titles under 60 characters for optimal SEO
+    """
+    detected = content_type(article)
+    title = article.title
+
+    states = list(article.states.all())
+    primary_state = states[0].name if states else None
+
+    # Function to create and truncate titles
+    def make_title(base_title, max_length=60):
+        if len(base_title) <= max_length:
+            return base_title
+        # Try truncating the original article title first
+        truncated_title = truncate_title(title, max_length - (len(base_title) - len(title)))
+        return base_title.replace(title, truncated_title)
+
+    # Base title depending on content type and context
+    if context == 'detail':
+        if detected == 'Person':
+            if primary_state:
+                # Format: "Name - [Profession] from State | NE India"
+                profession_name = profession(article)
+                if profession_name and len(f"{title} - {profession_name} from {primary_state}") <= 45:
+                    return make_title(f"{title} - {profession_name} from {primary_state} | NE India")
+                elif len(f"{title} - {primary_state} Personality") <= 50:
+                    return make_title(f"{title} - {primary_state} Personality | NE India")
+                else:
+                    return make_title(f"{title} | Northeast India Personality")
+            else:
+                return make_title(f"{title} | Northeast India Personality")
+
+        elif detected == 'Event':
+            if primary_state:
+                if is_festival(article):
+                    if len(f"{title} - {primary_state} Festival") <= 45:
+                        return make_title(f"{title} - {primary_state} Festival | NE India")
+                    else:
+                        return make_title(f"{title} | Northeast India Festival")
+                else:
+                    if len(f"{title} in {primary_state}") <= 45:
+                        return make_title(f"{title} in {primary_state} | Northeast India")
+                    else:
+                        return make_title(f"{title} | Northeast India Event")
+            else:
+                return make_title(f"{title} | Northeast India Festival")
+
+        elif detected == 'Cultural':
+            if primary_state:
+                element_type = cultural_type(article)
+                if element_type and len(f"{title} - {primary_state} {element_type}") <= 45:
+                    return make_title(f"{title} - {primary_state} {element_type} | NE India")
+                elif len(f"{title} in {primary_state}") <= 45:
+                    return make_title(f"{title} in {primary_state} | NE India Heritage")
+                else:
+                    return make_title(f"{title} | Northeast India Heritage")
+            else:
+                return make_title(f"{title} | Northeast India Heritage")
+
+        elif detected == 'Place':
+            if primary_state:
+                if len(f"{title}, {primary_state}") <= 45:
+                    return make_title(f"{title}, {primary_state} | Seven Sisters Tourism")
+                else:
+                    return make_title(f"{title} | Northeast India Tourism")
+            else:
+                return make_title(f"{title} | Northeast India Tourism")
+
+        else:  # Default Article
+            if primary_state:
+                if len(f"{title} - {primary_state}") <= 40:
+                    return make_title(f"{title} - {primary_state} | Seven Sisters Wiki")
+                else:
+                    return make_title(f"{title} | Seven Sisters | NE India Wiki")
+            else:
+                return make_title(f"{title} | Seven Sisters | Northeast India Wiki")
+
+    elif context == 'list':
+        # Shorter titles for list views with more aggressive truncation
+        if detected == 'Person' and primary_state:
+            if len(f"{title} ({primary_state})") <= 50:
+                return make_title(f"{title} ({primary_state}) - NE India Personality", 58)
+            else:
+                return make_title(f"{title} - Northeast India Personality", 58)
+        elif detected == 'Event' and primary_state:
+            if len(f"{title} - {primary_state}") <= 45:
+                return make_title(f"{title} - {primary_state} Festival", 58)
+            else:
+                return make_title(f"{title} - Northeast India Festival", 58)
+        elif primary_state and len(f"{title} - {primary_state}") <= 45:
+            return make_title(f"{title} - {primary_state} | Northeast India", 58)
+        else:
+            return make_title(f"{title} | Northeast India", 58)
+
+    # Fallback
+    return make_title(f"{title} | Northeast India Wiki")
+
+
+def social_description(title, excerpt=None, states=None, max_length=155):
+    """
+    Generate optimized social media description with Northeast India context.
+    """
+    # Start with excerpt or generate from title
+    if excerpt:
+        base_description = excerpt.strip()
+    else:
+        base_description = f"Learn about {title}"
+
+    # Add regional context
+    regional_context = ""
+    if states:
+        if isinstance(states, str):
+            regional_context = f" from {states}"
+        else:
+            try:
+                state_list = list(states)[:2]  # Limit to 2 states
+                if len(state_list) == 1:
+                    regional_context = f" from {state_list[0].name}"
+                elif len(state_list) == 2:
+                    regional_context = f" from {state_list[0].name} and {state_list[1].name}"
+                else:
+                    regional_context = " from Northeast India"
+            except:
+                regional_context = " in Northeast India"
+    else:
+        regional_context = " in Northeast India"
+
+    # Add cultural context
+    cultural_suffix = " - Discover Seven Sisters states heritage"
+
+    # Build full description
+    full_description = f"{base_description}{regional_context}{cultural_suffix}"
+
+    # Truncate if too long
+    if len(full_description) > max_length:
+        # Try without cultural suffix
+        without_suffix = f"{base_description}{regional_context}"
+        if len(without_suffix) <= max_length:
+            full_description = without_suffix
+        else:
+            # Truncate base description
+            available_length = max_length - len(regional_context) - 3  # 3 for "..."
+            if available_length > 20:  # Ensure minimum meaningful length
+                full_description = f"{base_description[:available_length]}...{regional_context}"
+            else:
+                full_description = base_description[:max_length-3] + "..."
+
+    return full_description
+
+
+def social_keywords(title, categories=None, states=None, tags=None):
+    """
+    Generate comprehensive keywords for social media and SEO.
+    """
+    keywords = ['Northeast India', 'Seven Sisters states']
+
+    # Add important words from title
+    title_words = [word.strip() for word in title.split() if len(word) > 3 and word.lower() not in ['the', 'and', 'for', 'with']]
+    keywords.extend(title_words[:3])
+
+    # Add states
+    if states:
+        try:
+            keywords.extend([state.name for state in states])
+        except:
+            if isinstance(states, str):
+                keywords.append(states)
+
+    # Add categories
+    if categories:
+        try:
+            keywords.extend([cat.name for cat in categories])
+        except:
+            if isinstance(categories, str):
+                keywords.append(categories)
+
+    # Add tags (limit to avoid keyword stuffing)
+    if tags:
+        try:
+            keywords.extend([tag.name for tag in tags[:5]])
+        except:
+            pass
+
+    # Add cultural terms
+    cultural_terms = ['culture', 'heritage', 'traditions', 'tribal culture', 'indigenous']
+    keywords.extend(cultural_terms[:2])
+
+    # Remove duplicates while preserving order
+    seen = set()
+    unique_keywords = []
+    for keyword in keywords:
+        if keyword.lower() not in seen:
+            seen.add(keyword.lower())
+            unique_keywords.append(keyword)
+
+    return ', '.join(unique_keywords)
+
+
+def article_social_description(article, max_length=155):
+    return social_description(article.title, article.excerpt, article.states.all(), max_length)
+
+
+def article_social_keywords(article):
+    return social_keywords(article.title, article.categories.all(), article.states.all(), article.tags.all())
+
+
+def build_bundle(article):
+    """Compute the SEO bundle of an article, reading its categories, states and tags"""
+    return {
+        'version': SEO_BUNDLE_VERSION,
+        'titles': {context: optimized_title(article, context) for context in TITLE_CONTEXTS},
+        'descriptions': {
+            str(length): article_social_description(article, length) for length in DESCRIPTION_LENGTHS
+        },
+        'social_keywords': article_social_keywords(article),
+        'keywords': content_keywords(article),
+        'reading_time': reading_time(article),
+        'cultural_context': cultural_context(article),
+        'mentions': mentions(article),
+        'schema_types': schema_types(article),
+    }
+
+
+def lookup(article, *path):
+    """
+    Value at ``path`` in the stored bundle, or None when the bundle is
+    missing, outdated or not loaded (a deferred field is never fetched)
+    """
+    if 'seo_bundle' in article.get_deferred_fields():
+        return None
+    value = article.seo_bundle
+    if not value or value.get('version') != SEO_BUNDLE_VERSION:
+        return None
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(str(key))
+    return value
+
+
+def refresh_bundle(content, using=None):
+    """Rebuild and store the bundle of ``content`` if it changed, without save signals"""
+    # Each builder reads the relations, load them once
+    prefetch_related_objects([content], 'categories', 'tags', 'states')
+    bundle = build_bundle(content)
+    if bundle != content.seo_bundle:
+        content.seo_bundle = bundle
+        type(content)._default_manager.using(using or content._state.db).filter(pk=content.pk).update(
+            seo_bundle=bundle
+        )
+    return bundle
+
+
+def build_all(apps=global_apps, using=None, batch_size=500, only_missing=False):
+    """
+    Build the bundle of every article (or only missing and outdated ones) in
+    batches and return how many rows changed
+    """
+    Content = apps.get_model('app', 'Content')
+    manager = Content._default_manager.db_manager(using)
+    articles = manager.order_by('pk')
+    if only_missing:
+        # A missing key compares as NULL, so ``exclude()`` alone would skip empty bundles
+        articles = articles.filter(
+            Q(seo_bundle__version__isnull=True) | ~Q(seo_bundle__version=SEO_BUNDLE_VERSION)
+        )
+
+    changed = 0
+    last_pk = 0
+    while True:
+        # Keyset batches, rows built in one batch may leave the filter
+        batch = list(
+            articles.filter(pk__gt=last_pk)
+            .only(
+                'pk', 'title', 'content', 'excerpt', 'seo_bundle',
+                *classification.CLASSIFICATION_FIELDS,
+            )
+            .prefetch_related('categories', 'tags', 'states')[:batch_size]
+        )
+        if not batch:
+            return changed
+        stale = []
+        for article in batch:
+            bundle = build_bundle(article)
+            if bundle != article.seo_bundle:
+                article.seo_bundle = bundle
+                stale.append(article)
+        manager.bulk_update(stale, ['seo_bundle'])
+        changed += len(stale)
+        last_pk = batch[-1].pk
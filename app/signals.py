@@ -0,0 +1,522 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .caching import CONTENT_VERSION, TAXONOMY_VERSION, bump_version
+from .models import Category, Content, ContentRevision, State, Tag
+from .search import remove_from_search_index, update_search_index
+from . import canonical, classification, counters, fragments, page_cache, redirects, revision_storage, seo_bundle, suggestions, typeahead
+
+# Content fields that feed the search document
+SEARCH_FIELDS = {'title', 'excerpt', 'content'}
+
+# ContentRevision fields that feed the reviewer search document
+REVISION_SEARCH_FIELDS = {'title', 'revision_comment', 'editor', 'body', 'body_delta'}
+
+# Content fields the SEO bundle is derived from, including the classification
+SEO_BUNDLE_FIELDS = seo_bundle.BUNDLE_FIELDS.union(classification.CLASSIFICATION_FIELDS)
+
+# Content fields the in-memory redirect map is built from, slug and path first
+REDIRECT_COLUMNS = ('slug', 'canonical_path', 'published', 'content_type')
+REDIRECT_FIELDS = set(REDIRECT_COLUMNS)
+
+# Content fields copied into the in-memory typeahead index
+TYPEAHEAD_FIELDS = {'title', 'slug', 'excerpt', 'featured_image', 'published', 'published_at', 'review_status'}
+
+
+@receiver(post_save, sender=Content)
+def index_content_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Keep the full-text search document in sync with the article
+    """
+    if raw:
+        return
+    if update_fields is not None and not SEARCH_FIELDS.intersection(update_fields):
+        return
+    update_search_index(instance)
+
+
+@receiver(post_delete, sender=Content)
+def remove_content_from_index(sender, instance, **kwargs):
+    """
+    Drop deleted articles from the search index
+    """
+    remove_from_search_index(Content, instance.pk, using=instance._state.db)
+
+
+@receiver(post_save, sender=ContentRevision)
+def index_revision_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Keep the revision search document used by the review queue in sync
+    """
+    if raw:
+        return
+    if update_fields is not None and not REVISION_SEARCH_FIELDS.intersection(update_fields):
+        return
+    update_search_index(instance)
+
+
+@receiver(post_delete, sender=ContentRevision)
+def remove_revision_from_index(sender, instance, **kwargs):
+    remove_from_search_index(ContentRevision, instance.pk, using=instance._state.db)
+
+
+@receiver(pre_delete, sender=ContentRevision)
+def materialize_delta_dependents(sender, instance, **kwargs):
+    """
+    Store the revisions whose delta is based on this one in full before it goes
+    """
+    revision_storage.materialize_dependents(instance)
+
+
+@receiver(post_save, sender=Content)
+def invalidate_title_indexes_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Tell every worker to rebuild its typeahead and suggestion indexes
+    """
+    if update_fields is not None and not TYPEAHEAD_FIELDS.intersection(update_fields):
+        return
+    bump_version(typeahead.VERSION_NAME)
+    bump_version(suggestions.VERSION_NAME)
+
+
+@receiver(post_delete, sender=Content)
+def invalidate_title_indexes_on_delete(sender, instance, **kwargs):
+    bump_version(typeahead.VERSION_NAME)
+    bump_version(suggestions.VERSION_NAME)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=State)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=State)
+def invalidate_suggestions_on_taxonomy_change(sender, instance, **kwargs):
+    """
+    Category, tag and state names are offered as spelling suggestions and
+    listed in the cached taxonomy directories
+    """
+    bump_version(suggestions.VERSION_NAME)
+    bump_version(TAXONOMY_VERSION)
+
+
+@receiver(m2m_changed, sender=Content.categories.through)
+@receiver(m2m_changed, sender=Content.tags.through)
+@receiver(m2m_changed, sender=Content.states.through)
+def remember_cleared_articles(sender, instance, action, reverse, **kwargs):
+    """
+    Clearing from the category, tag or state side sends no pk_set, note the
+    linked articles for the post_clear receivers below
+    """
+    if reverse and action == 'pre_clear':
+        relation = {Category: 'categories', Tag: 'tags', State: 'states'}[type(instance)]
+        instance._cleared_article_ids = list(Content.objects.filter(**{relation: instance}).values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=State)
+def remember_linked_articles(sender, instance, **kwargs):
+    """
+    Deleting unlinks articles without m2m_changed, note them for the
+    post_delete receivers below
+    """
+    relation = {Category: 'categories', Tag: 'tags', State: 'states'}[sender]
+    instance._deleted_article_ids = list(Content.objects.filter(**{relation: instance}).values_list('pk', flat=True))
+
+
+def _changed_article_ids(instance, pk_set):
+    """Articles of a reverse link change, pk_set or the ids noted before a clear"""
+    return pk_set if pk_set is not None else getattr(instance, '_cleared_article_ids', ())
+
+
+@receiver(m2m_changed, sender=Content.categories.through)
+@receiver(m2m_changed, sender=Content.tags.through)
+@receiver(m2m_changed, sender=Content.states.through)
+def index_content_on_taxonomy_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Category, tag and state names are part of the search document
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        update_search_index(instance)
+        return
+    for content in Content.objects.filter(pk__in=_changed_article_ids(instance, pk_set)):
+        update_search_index(content)
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=State)
+def index_content_on_taxonomy_delete(sender, instance, **kwargs):
+    """
+    Drop a deleted category, tag or state name from its articles' documents
+    """
+    for content in Content.objects.filter(pk__in=getattr(instance, '_deleted_article_ids', ())):
+        update_search_index(content)
+
+
+@receiver(post_save, sender=Content)
+def classify_content_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Store the detected content type so templates never scan the article body
+    """
+    if raw:
+        return
+    if update_fields is not None and not classification.CLASSIFIED_FIELDS.intersection(update_fields):
+        return
+    classification.classify_content(instance)
+
+
+@receiver(m2m_changed, sender=Content.categories.through)
+@receiver(m2m_changed, sender=Content.tags.through)
+def classify_content_on_taxonomy_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Category and tag names take part in the classification
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        classification.classify_content(instance)
+        return
+    articles = Content.objects.filter(pk__in=_changed_article_ids(instance, pk_set))
+    for content in articles.prefetch_related('categories', 'tags'):
+        classification.classify_content(content)
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Tag)
+def classify_content_on_taxonomy_delete(sender, instance, **kwargs):
+    """
+    Reclassify the articles of a deleted category or tag
+    """
+    articles = Content.objects.filter(pk__in=getattr(instance, '_deleted_article_ids', ()))
+    for content in articles.prefetch_related('categories', 'tags'):
+        classification.classify_content(content)
+
+
+@receiver(post_save, sender=Content)
+def build_seo_bundle_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Precompute the SEO metadata, after the classification it reads
+    """
+    if raw:
+        return
+    if update_fields is not None and not SEO_BUNDLE_FIELDS.intersection(update_fields):
+        return
+    seo_bundle.refresh_bundle(instance)
+
+
+@receiver(m2m_changed, sender=Content.categories.through)
+@receiver(m2m_changed, sender=Content.tags.through)
+@receiver(m2m_changed, sender=Content.states.through)
+def build_seo_bundle_on_taxonomy_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Category, tag and state names take part in the SEO metadata
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        seo_bundle.refresh_bundle(instance)
+        return
+    for content in Content.objects.filter(pk__in=_changed_article_ids(instance, pk_set)):
+        seo_bundle.refresh_bundle(content)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=State)
+def clear_seo_bundles_on_taxonomy_save(sender, instance, created=False, raw=False, **kwargs):
+    """
+    Renamed categories, tags and states leave their articles' bundles
+    outdated, drop them so the tags compute the values until the next
+    build_seo_bundles run or article save
+    """
+    if raw or created:
+        return
+    relation = {Category: 'categories', Tag: 'tags', State: 'states'}[sender]
+    Content.objects.filter(**{relation: instance}).exclude(seo_bundle={}).update(seo_bundle={})
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=State)
+def clear_seo_bundles_on_taxonomy_delete(sender, instance, **kwargs):
+    """
+    Deleting unlinks articles without m2m_changed, drop the bundles naming it
+    """
+    relation = {Category: 'categories', Tag: 'tags', State: 'states'}[sender]
+    Content.objects.filter(**{relation: instance}).exclude(seo_bundle={}).update(seo_bundle={})
+
+
+@receiver(m2m_changed, sender=Content.categories.through)
+@receiver(m2m_changed, sender=Content.states.through)
+def refresh_canonical_on_taxonomy_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Pick new primary categories and states when links change
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        articles = [instance]
+    elif pk_set is not None:
+        articles = Content.objects.filter(pk__in=pk_set)
+    else:
+        # Cleared from the category or state side, only its primaries change
+        relation = {Category: 'primary_category', State: 'primary_state'}[type(instance)]
+        articles = Content.objects.filter(**{relation: instance})
+    changed = [canonical.refresh_canonical(content) for content in articles]
+    if any(changed):
+        bump_version(redirects.VERSION_NAME)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=State)
+def refresh_canonical_on_taxonomy_save(sender, instance, created=False, raw=False, **kwargs):
+    """
+    A changed category or state slug moves the articles using it as primary
+    """
+    if raw or created:
+        return
+    relation = {Category: 'primary_category', State: 'primary_state'}[sender]
+    if canonical.refresh_paths(Content.objects.filter(**{relation: instance})):
+        bump_version(redirects.VERSION_NAME)
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=State)
+def remember_primary_articles(sender, instance, **kwargs):
+    """
+    Deleting unlinks articles without m2m_changed, note whose primary it was
+    """
+    relation = {Category: 'primary_category', State: 'primary_state'}[sender]
+    instance._primary_article_ids = list(Content.objects.filter(**{relation: instance}).values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=State)
+def refresh_canonical_on_taxonomy_delete(sender, instance, **kwargs):
+    articles = Content.objects.filter(pk__in=getattr(instance, '_primary_article_ids', ()))
+    changed = [canonical.refresh_canonical(content) for content in articles]
+    if any(changed):
+        bump_version(redirects.VERSION_NAME)
+
+
+@receiver(pre_save, sender=Content)
+def remember_previous_slug(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Record the stored slug, canonical path, published flag and type, so
+    post_save can tell renames and changes to the redirect map
+    """
+    instance._previous_slug = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not REDIRECT_FIELDS.intersection(update_fields):
+        return
+    instance._previous_slug = (
+        Content.objects.using(instance._state.db)
+        .filter(pk=instance.pk)
+        .values_list(*REDIRECT_COLUMNS)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Content)
+def record_slug_history(sender, instance, created=False, raw=False, **kwargs):
+    """
+    Keep renamed articles reachable at their former URLs
+    """
+    if raw:
+        return
+    previous = getattr(instance, '_previous_slug', None)
+    renamed = previous is not None and previous[0] != instance.slug
+    if renamed:
+        redirects.record_slug_change(instance, *previous[:2])
+    if created or renamed:
+        redirects.release_slug(instance)
+
+
+@receiver(post_save, sender=Content)
+def invalidate_redirect_map_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Tell every worker to rebuild its redirect map when a slug, path,
+    published flag or type actually changed
+    """
+    if update_fields is not None and not REDIRECT_FIELDS.intersection(update_fields):
+        return
+    current = tuple(getattr(instance, field) for field in REDIRECT_COLUMNS)
+    if not raw and getattr(instance, '_previous_slug', None) == current:
+        return
+    bump_version(redirects.VERSION_NAME)
+
+
+@receiver(post_delete, sender=Content)
+def invalidate_redirect_map_on_delete(sender, instance, **kwargs):
+    bump_version(redirects.VERSION_NAME)
+
+
+@receiver(pre_save, sender=Content)
+def remember_counted_state(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Record whether the stored article was counted, so post_save can tell
+    publishes and unpublishes apart
+    """
+    instance._was_counted = None
+    if raw:
+        return
+    if update_fields is not None and not counters.COUNTED_FIELDS.intersection(update_fields):
+        return
+    instance._was_counted = instance.pk is not None and counters.counted_articles(
+        using=instance._state.db
+    ).filter(pk=instance.pk).exists()
+
+
+@receiver(post_save, sender=Content)
+def update_counters_on_save(sender, instance, raw=False, **kwargs):
+    """
+    Adjust the published counters when an article is published or unpublished
+    """
+    was_counted = getattr(instance, '_was_counted', None)
+    if raw or was_counted is None:
+        return
+    is_counted = counters.is_counted(instance)
+    if is_counted != was_counted:
+        counters.adjust_for_content(instance.pk, 1 if is_counted else -1, using=instance._state.db)
+
+
+@receiver(pre_delete, sender=Content)
+def update_counters_on_delete(sender, instance, **kwargs):
+    """
+    Links are deleted without m2m_changed, so uncount the article up front
+    """
+    if counters.counted_articles(using=instance._state.db).filter(pk=instance.pk).exists():
+        counters.adjust_for_content(instance.pk, -1, using=instance._state.db)
+
+
+@receiver(m2m_changed, sender=Content.categories.through)
+@receiver(m2m_changed, sender=Content.tags.through)
+@receiver(m2m_changed, sender=Content.states.through)
+def update_counters_on_taxonomy_change(sender, instance, action, reverse, pk_set, using, **kwargs):
+    """
+    Adjust the published counters for added and removed links
+    """
+    field = counters.through_field(sender)
+    if action == 'post_add':
+        pairs = counters.counted_link_pairs(field, instance, reverse, pk_set, using=using)
+        counters.adjust_for_links(field, pairs, 1, using=using)
+    elif action in ('pre_remove', 'pre_clear'):
+        # Resolve the links before they are gone
+        pairs = counters.counted_link_pairs(field, instance, reverse, pk_set, using=using)
+        if action == 'pre_remove':
+            pairs = counters.existing_link_pairs(field, pairs, using=using)
+        instance._uncounted_links = pairs
+    elif action in ('post_remove', 'post_clear'):
+        pairs = getattr(instance, '_uncounted_links', [])
+        instance._uncounted_links = []
+        counters.adjust_for_links(field, pairs, -1, using=using)
+
+
+@receiver(post_save, sender=Content)
+@receiver(post_delete, sender=Content)
+@receiver(m2m_changed, sender=Content.categories.through)
+@receiver(m2m_changed, sender=Content.tags.through)
+@receiver(m2m_changed, sender=Content.states.through)
+def bump_content_version(sender, action=None, **kwargs):
+    """
+    Invalidate cached listings derived from published content
+    """
+    if action is not None and action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    bump_version(CONTENT_VERSION)
+
+
+@receiver(post_save, sender=Content)
+@receiver(post_delete, sender=Content)
+def invalidate_fragments_on_save(sender, instance, raw=False, **kwargs):
+    """
+    Saves, including applied revisions, make the article's cached fragments stale
+    """
+    fragments.invalidate_article(instance.pk)
+
+
+@receiver(m2m_changed, sender=Content.categories.through)
+@receiver(m2m_changed, sender=Content.tags.through)
+@receiver(m2m_changed, sender=Content.states.through)
+def invalidate_fragments_on_taxonomy_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Category, tag and state links are rendered in the article fragments
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        fragments.invalidate_article(instance.pk)
+        return
+    for pk in _changed_article_ids(instance, pk_set):
+        fragments.invalidate_article(pk)
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=State)
+def invalidate_fragments_on_taxonomy_delete(sender, instance, **kwargs):
+    """
+    Deleted categories, tags and states leave the article fragments
+    """
+    for pk in getattr(instance, '_deleted_article_ids', ()):
+        fragments.invalidate_article(pk)
+
+
+@receiver(post_save, sender=Content)
+def purge_pages_on_save(sender, instance, raw=False, **kwargs):
+    """
+    Purge the cached pages showing a published, edited or unpublished article
+    """
+    if raw:
+        return
+    page_cache.purge_content(instance.pk, using=instance._state.db)
+
+
+@receiver(pre_delete, sender=Content)
+def purge_pages_on_delete(sender, instance, **kwargs):
+    """
+    Links are deleted with the article, purge while they can still be read
+    """
+    page_cache.purge_content(instance.pk, using=instance._state.db)
+
+
+@receiver(m2m_changed, sender=Content.categories.through)
+@receiver(m2m_changed, sender=Content.tags.through)
+@receiver(m2m_changed, sender=Content.states.through)
+def purge_pages_on_taxonomy_change(sender, instance, action, reverse, pk_set, using, **kwargs):
+    """
+    Purge the article and category, state or tag pages of changed links
+    """
+    relation = counters.through_field(sender)
+    if action in ('post_add', 'post_remove'):
+        page_cache.purge_links(relation, instance, reverse, pk_set, using=using)
+    elif action == 'pre_clear':
+        # Clearing sends no pk_set, read the links before they are gone
+        links = sender.objects.using(using)
+        related_column = page_cache.RELATION_KEYS[relation][0]
+        if reverse:
+            pk_set = links.filter(**{related_column: instance.pk}).values_list('content_id', flat=True)
+        else:
+            pk_set = links.filter(content_id=instance.pk).values_list(related_column, flat=True)
+        page_cache.purge_links(relation, instance, reverse, set(pk_set), using=using)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=State)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=State)
+def purge_pages_on_taxonomy_save(sender, instance, raw=False, **kwargs):
+    """
+    Renamed or deleted categories, tags and states purge every page showing names
+    """
+    if raw:
+        return
+    prefix = {Category: 'category', Tag: 'tag', State: 'state'}[sender]
+    page_cache.purge(f'{prefix}-{instance.pk}', page_cache.TAXONOMY_KEY, page_cache.LISTINGS_KEY)
@@ -8,7 +8,17 @@ helping search engines efficiently discover and index Northeast India cultural c
 from django.contrib.sitemaps import Sitemap
 from django.urls import reverse
 from django.utils import timezone
-from .models import Content, Category, Tag, State
+from .caching import CONTENT_VERSION, TAXONOMY_VERSION
+from .conditional import stamps
+from .models import Content, Category, Tag, State, StateCategoryCount
+
+# Content columns the sitemaps read, the URL is stored in canonical_path and
+# rebuilt from the joined primary category and state while it is still empty
+SITEMAP_CONTENT_FIELDS = (
+    'slug', 'content_type', 'canonical_path', 'review_status', 'published_at', 'updated_at',
+    'primary_category__slug', 'primary_state__slug',
+)
+SITEMAP_RELATED = ('primary_category', 'primary_state')
 
 
 class StaticViewSitemap(Sitemap):
@@ -66,7 +76,7 @@ class ArticleSitemap(Sitemap):
             content_type='article',
             published=True,
             review_status__in=['approved', 'featured']
-        ).select_related('author').order_by('-published_at')
+        ).select_related(*SITEMAP_RELATED).only(*SITEMAP_CONTENT_FIELDS).order_by('-published_at')
 
     def lastmod(self, obj):
         """Return the last modification time"""
@@ -200,7 +210,7 @@ class PersonalitySitemap(Sitemap):
             content_type='personality',
             published=True,
             review_status__in=['approved', 'featured']
-        ).order_by('-published_at')
+        ).select_related(*SITEMAP_RELATED).only(*SITEMAP_CONTENT_FIELDS).order_by('-published_at')
 
     def lastmod(self, obj):
         """Return the last modification time"""
@@ -234,7 +244,7 @@ class CulturalElementSitemap(Sitemap):
             content_type='cultural',
             published=True,
             review_status__in=['approved', 'featured']
-        ).order_by('-published_at')
+        ).select_related(*SITEMAP_RELATED).only(*SITEMAP_CONTENT_FIELDS).order_by('-published_at')
 
     def lastmod(self, obj):
         """Return the last modification time"""
@@ -295,33 +305,24 @@ class SEOCategorySitemap(Sitemap):
     def items(self):
         """Return category-state combinations that have published articles"""
         categories = ['personalities', 'culture', 'festivals', 'places', 'heritage', 'traditional-crafts']
-        states = State.objects.all()
-        combinations = []
+        cells = StateCategoryCount.objects.filter(
+            category__slug__in=categories,
+            count__gt=0,
+        ).select_related('category', 'state').order_by('state__name')
         
+        # Keep the combinations grouped in the order of the category list
+        combinations = []
         for category_slug in categories:
-            try:
-                category = Category.objects.get(slug=category_slug)
-                for state in states:
-                    # Check if this combination has published articles
-                    article_count = Content.objects.filter(
-                        content_type='article',
-                        categories=category,
-                        states=state,
-                        published=True,
-                        review_status__in=['approved', 'featured']
-                    ).count()
-                    
-                    if article_count > 0:
-                        combinations.append({
-                            'category_slug': category_slug,
-                            'state_slug': state.slug,
-                            'state_name': state.name,
-                            'category_name': category.name,
-                            'article_count': article_count,
-                            'last_updated': timezone.now()
-                        })
-            except Category.DoesNotExist:
-                continue
+            for cell in cells:
+                if cell.category.slug == category_slug:
+                    combinations.append({
+                        'category_slug': category_slug,
+                        'state_slug': cell.state.slug,
+                        'state_name': cell.state.name,
+                        'category_name': cell.category.name,
+                        'article_count': cell.count,
+                        'last_updated': timezone.now()
+                    })
                 
         return combinations
     
@@ -373,4 +374,9 @@ SITEMAPS = {
     # until their corresponding views and URL patterns are implemented
     # 'personalities': PersonalitySitemap,
     # 'cultural-elements': CulturalElementSitemap,
-}
\ No newline at end of file
+}
+
+
+def sitemap_validator(request, *args, **kwargs):
+    """Conditional GET validator of the sitemap views, see app/conditional.py"""
+    return stamps(CONTENT_VERSION, TAXONOMY_VERSION)
@@ -0,0 +1,198 @@
+"""
+"Did you mean" spelling suggestions
+
+Misspelled searches ("Megalaya", "Hornbil") are matched against article
+titles and category, tag and state names by trigram similarity. PostgreSQL
+uses pg_trgm with GIN trigram indexes, so one indexed query returns the
+ranked suggestions. Other databases use an in-process n-gram index that is
+rebuilt lazily when the ``suggestions`` version stamp is bumped.
+"""
+import threading
+from collections import Counter, namedtuple
+
+from django.db import connections, router
+
+from .caching import get_version
+from .typeahead import normalize
+
+VERSION_NAME = 'suggestions'
+
+# Minimum similarity for a term to be offered as a suggestion
+SIMILARITY_THRESHOLD = 0.3
+
+# Candidates re-scored in Python after the trigram pre-filter
+MAX_CANDIDATES = 50
+
+Suggestion = namedtuple('Suggestion', ['text', 'kind', 'score'])
+
+
+def trigrams(text):
+    """Return the pg_trgm style trigram set for a piece of text"""
+    grams = set()
+    for word in normalize(text).split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(query_grams, term_grams):
+    """Jaccard similarity between two trigram sets"""
+    if not query_grams or not term_grams:
+        return 0.0
+    shared = len(query_grams & term_grams)
+    return shared / (len(query_grams) + len(term_grams) - shared)
+
+
+def _vocabulary_sources():
+    from .models import Category, Content, State, Tag
+
+    return [
+        ('article', Content.objects.filter(published=True, review_status='approved'), 'title'),
+        ('category', Category.objects.all(), 'name'),
+        ('tag', Tag.objects.all(), 'name'),
+        ('state', State.objects.all(), 'name'),
+    ]
+
+
+class TrigramIndex:
+    """
+    Pure-Python trigram index over the suggestion vocabulary
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._data = ([], {})
+
+    def _load(self):
+        terms = []
+        postings = {}
+        seen = set()
+        for kind, queryset, field in _vocabulary_sources():
+            for text in queryset.values_list(field, flat=True).distinct():
+                key = normalize(text)
+                if not key or key in seen:
+                    continue
+                seen.add(key)
+
+                term_id = len(terms)
+                words = [trigrams(word) for word in key.split()]
+                terms.append((text, kind, trigrams(text), words))
+                for gram in trigrams(text):
+                    postings.setdefault(gram, []).append(term_id)
+        return terms, postings
+
+    def _ensure_current(self):
+        version = get_version(VERSION_NAME)
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            self._data = self._load()
+            self._version = version
+
+    def suggest(self, query, limit=5):
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+
+        self._ensure_current()
+        terms, postings = self._data
+
+        # Count shared trigrams using the posting lists, then score the best candidates
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(postings.get(gram, ()))
+
+        normalized_query = normalize(query)
+        suggestions = []
+        for term_id, _ in shared.most_common(MAX_CANDIDATES):
+            text, kind, term_grams, word_grams = terms[term_id]
+            if normalize(text) == normalized_query:
+                continue
+            # Score against the whole term and its single words, so a one-word
+            # typo still matches a long article title
+            score = max([similarity(query_grams, term_grams)] +
+                        [similarity(query_grams, grams) for grams in word_grams])
+            if score >= SIMILARITY_THRESHOLD:
+                suggestions.append(Suggestion(text, kind, round(score, 3)))
+
+        suggestions.sort(key=lambda suggestion: (-suggestion.score, len(suggestion.text)))
+        return suggestions[:limit]
+
+
+trigram_index = TrigramIndex()
+
+
+def _postgres_suggestions(connection, query, limit):
+    from .models import Category, Content, State, Tag
+
+    sources = [
+        (Content._meta.db_table, 'title', 'article', "published AND review_status = 'approved' AND "),
+        (Category._meta.db_table, 'name', 'category', ''),
+        (Tag._meta.db_table, 'name', 'tag', ''),
+        (State._meta.db_table, 'name', 'state', ''),
+    ]
+    # "query <% column" is answered by the GIN trigram indexes
+    union = ' UNION ALL '.join(
+        f"SELECT {column} AS term, '{kind}' AS kind, word_similarity(%s, {column}) AS score "
+        f'FROM {table} WHERE {condition}%s <%% {column}'
+        for table, column, kind, condition in sources
+    )
+    sql = (
+        f'SELECT term, kind, MAX(score) AS score FROM ({union}) AS terms '
+        'WHERE lower(term) <> lower(%s) '
+        'GROUP BY term, kind ORDER BY score DESC, length(term) LIMIT %s'
+    )
+    params = [query, query] * len(sources) + [query, limit]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [Suggestion(term, kind, round(score, 3)) for term, kind, score in cursor.fetchall()]
+
+
+def get_suggestions(query, limit=5):
+    """
+    Return ranked spelling suggestions for a search query
+    """
+    if not normalize(query):
+        return []
+
+    from .models import Content
+
+    connection = connections[router.db_for_read(Content)]
+    if connection.vendor == 'postgresql':
+        return _postgres_suggestions(connection, query, limit)
+    return trigram_index.suggest(query, limit=limit)
+
+
+TRIGRAM_INDEXES = [
+    ('app_content_title_trgm', 'app_content', 'title'),
+    ('app_category_name_trgm', 'app_category', 'name'),
+    ('app_tag_name_trgm', 'app_tag', 'name'),
+    ('app_state_name_trgm', 'app_state', 'name'),
+]
+
+
+def create_trigram_indexes(connection):
+    """
+    Enable pg_trgm and create GIN trigram indexes (PostgreSQL only).
+    Called from the migration that introduces suggestions.
+    """
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for name, table, column in TRIGRAM_INDEXES:
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING GIN ({column} gin_trgm_ops)'
+            )
+
+
+def drop_trigram_indexes(connection):
+    """Drop the indexes created by ``create_trigram_indexes``"""
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for name, _, _ in TRIGRAM_INDEXES:
+            cursor.execute(f'DROP INDEX IF EXISTS {name}')
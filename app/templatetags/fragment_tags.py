@@ -0,0 +1,47 @@
+from django import template
+
+from .. import fragments
+
+register = template.Library()
+
+
+class ArticleFragmentNode(template.Node):
+    def __init__(self, nodelist, article, name, vary_on):
+        self.nodelist = nodelist
+        self.article = article
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        article = self.article.resolve(context)
+        if article is None or article.pk is None:
+            return self.nodelist.render(context)
+        name = self.name.resolve(context)
+        vary_on = [variable.resolve(context) for variable in self.vary_on]
+        return fragments.article_fragment(article, name, lambda: self.nodelist.render(context), vary_on=vary_on)
+
+
+@register.tag('article_fragment')
+def do_article_fragment(parser, token):
+    """
+    Cache the enclosed block per article until the article or the taxonomy
+    changes, see app/fragments.py. Only wrap markup that is the same for
+    every reader; extra arguments are added to the cache key.
+
+    Usage::
+
+        {% article_fragment article 'schema' request.get_host %}
+            ...
+        {% endarticle_fragment %}
+    """
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires at least two arguments.")
+    nodelist = parser.parse(('endarticle_fragment',))
+    parser.delete_first_token()
+    return ArticleFragmentNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        parser.compile_filter(bits[2]),
+        [parser.compile_filter(bit) for bit in bits[3:]],
+    )
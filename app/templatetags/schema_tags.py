@@ -6,69 +6,19 @@ from ..utils import (
     get_canonical_url, get_article_canonical_url, get_category_canonical_url,
     get_tag_canonical_url, get_home_canonical_url, get_search_canonical_url
 )
+from ..category_tree import breadcrumbs as category_breadcrumbs
+from .. import autolink, classification, seo_bundle
 
 register = template.Library()
 
-# Northeast India specific content type detection keywords
-PERSON_KEYWORDS = [
-    'biography', 'personality', 'leader', 'artist', 'writer', 'politician', 
-    'musician', 'dancer', 'activist', 'freedom fighter', 'chief minister',
-    'governor', 'poet', 'author', 'singer', 'actor', 'filmmaker'
-]
-
-PLACE_KEYWORDS = [
-    'city', 'town', 'village', 'district', 'state', 'river', 'mountain',
-    'hill', 'valley', 'lake', 'park', 'sanctuary', 'temple', 'monastery',
-    'palace', 'fort', 'archaeological', 'tourist', 'destination', 'capital'
-]
-
-EVENT_KEYWORDS = [
-    'festival', 'celebration', 'ceremony', 'tradition', 'ritual', 'dance',
-    'music', 'cultural', 'harvest', 'spring', 'new year', 'religious',
-    'tribal', 'community', 'annual', 'seasonal'
-]
-
-CULTURAL_KEYWORDS = [
-    'art', 'craft', 'cuisine', 'food', 'dish', 'recipe', 'attire', 'dress',
-    'costume', 'language', 'dialect', 'literature', 'folklore', 'legend',
-    'tradition', 'custom', 'belief', 'practice', 'heritage'
-]
 
 @register.simple_tag
 def detect_content_type(article):
     """
-    Detect the primary content type of an article based on categories, tags, and content
+    Primary content type of an article, stored at save time by
+    app/classification.py. Unclassified articles are scanned on the fly.
     """
-    title_lower = article.title.lower()
-    content_lower = article.content.lower() if article.content else ''
-    excerpt_lower = article.excerpt.lower() if article.excerpt else ''
-    
-    # Get categories and tags
-    categories = [cat.name.lower() for cat in article.categories.all()]
-    tags = [tag.name.lower() for tag in article.tags.all()]
-    
-    # Combine all text for analysis
-    all_text = f"{title_lower} {content_lower} {excerpt_lower} {' '.join(categories)} {' '.join(tags)}"
-    
-    # Score each content type
-    person_score = sum(1 for keyword in PERSON_KEYWORDS if keyword in all_text)
-    place_score = sum(1 for keyword in PLACE_KEYWORDS if keyword in all_text)
-    event_score = sum(1 for keyword in EVENT_KEYWORDS if keyword in all_text)
-    cultural_score = sum(1 for keyword in CULTURAL_KEYWORDS if keyword in all_text)
-    
-    # Determine primary type
-    scores = {
-        'Person': person_score,
-        'Place': place_score,
-        'Event': event_score,
-        'Cultural': cultural_score
-    }
-    
-    max_score = max(scores.values())
-    if max_score > 0:
-        return max(scores, key=scores.get)
-    
-    return 'Article'  # Default type
+    return article.detected_type or classification.detect_type(article)
 
 @register.simple_tag
 def is_person_article(article):
@@ -188,10 +138,17 @@ def generate_breadcrumb_data(page_type, request, **kwargs):
             'url': f"{request.scheme}://{request.get_host()}/categories/",
             'position': 2
         })
+        # Parent categories from the top-level one down, one query
+        for ancestor in category_breadcrumbs(category):
+            breadcrumbs.append({
+                'name': ancestor.name,
+                'url': request.build_absolute_uri(ancestor.get_absolute_url()),
+                'position': len(breadcrumbs) + 1
+            })
         breadcrumbs.append({
             'name': category.name,
             'url': request.build_absolute_uri(),
-            'position': 3,
+            'position': len(breadcrumbs) + 1,
             'is_current': True
         })
     
@@ -359,31 +316,14 @@ def jsonify(value):
 @register.simple_tag
 def get_article_reading_time(article):
     """Calculate estimated reading time for an article"""
-    if not article.content:
-        return 0
-    
-    # Remove HTML tags for word count
-    import re
-    text = re.sub(r'<[^>]+>', '', article.content)
-    word_count = len(text.split())
-    
-    # Average reading speed is 200-250 words per minute
-    reading_time = max(1, round(word_count / 225))
-    return reading_time
+    minutes = seo_bundle.lookup(article, 'reading_time')
+    return seo_bundle.reading_time(article) if minutes is None else minutes
 
 @register.simple_tag
 def get_schema_type_for_content(article):
     """Get the most appropriate Schema.org type for the article content"""
-    content_type = detect_content_type(article)
-    
-    schema_types = {
-        'Person': ['Article', 'Person'],
-        'Place': ['Article', 'Place', 'TouristDestination'],
-        'Event': ['Article', 'Event', 'Festival'],
-        'Cultural': ['Article', 'CreativeWork', 'VisualArtwork']
-    }
-    
-    return schema_types.get(content_type, ['Article'])
+    types = seo_bundle.lookup(article, 'schema_types')
+    return seo_bundle.schema_types(article) if types is None else types
 
 @register.simple_tag  
 def extract_geographical_info(article):
@@ -411,109 +351,20 @@ def extract_geographical_info(article):
 @register.simple_tag
 def get_cultural_context(article):
     """Extract cultural context and significance from article"""
-    categories = [cat.name.lower() for cat in article.categories.all()]
-    tags = [tag.name.lower() for tag in article.tags.all()]
-    
-    cultural_elements = []
-    
-    # Check for cultural categories and tags
-    cultural_indicators = {
-        'festivals': ['festival', 'celebration', 'ceremony'],
-        'arts': ['art', 'craft', 'painting', 'sculpture'],
-        'music': ['music', 'song', 'instrument', 'dance'],
-        'traditions': ['tradition', 'custom', 'ritual', 'practice'],
-        'cuisine': ['food', 'cuisine', 'dish', 'recipe'],
-        'language': ['language', 'dialect', 'literature'],
-        'attire': ['dress', 'costume', 'attire', 'clothing']
-    }
-    
-    all_terms = categories + tags
-    
-    for category, keywords in cultural_indicators.items():
-        if any(keyword in term for term in all_terms for keyword in keywords):
-            cultural_elements.append(category)
-    
-    return cultural_elements
+    context = seo_bundle.lookup(article, 'cultural_context')
+    return seo_bundle.cultural_context(article) if context is None else context
 
 @register.simple_tag
 def generate_content_keywords(article):
     """Generate comprehensive keywords for the article based on content analysis"""
-    keywords = set()
-    
-    # Add basic Northeast India keywords
-    keywords.update([
-        'Northeast India',
-        'Seven Sisters states', 
-        'Northeast Indian culture',
-        'Indian heritage',
-        'Tribal culture',
-        'Indigenous traditions'
-    ])
-    
-    # Add state-specific keywords
-    for state in article.states.all():
-        keywords.add(state.name)
-        keywords.add(f"{state.name} culture")
-        if state.capital:
-            keywords.add(state.capital)
-    
-    # Add category-based keywords
-    for category in article.categories.all():
-        keywords.add(category.name)
-        keywords.add(f"Northeast India {category.name}")
-    
-    # Add tag-based keywords
-    for tag in article.tags.all():
-        keywords.add(tag.name)
-    
-    # Add content-type specific keywords
-    content_type = detect_content_type(article)
-    if content_type == 'Person':
-        keywords.update(['Northeast India personality', 'Indian leader', 'cultural figure'])
-    elif content_type == 'Place':
-        keywords.update(['Northeast India tourism', 'tourist destination', 'travel guide'])
-    elif content_type == 'Event':
-        keywords.update(['Northeast India festival', 'cultural event', 'traditional celebration'])
-    elif content_type == 'Cultural':
-        keywords.update(['traditional art', 'cultural heritage', 'indigenous practice'])
-    
-    return sorted(list(keywords))
+    keywords = seo_bundle.lookup(article, 'keywords')
+    return seo_bundle.content_keywords(article) if keywords is None else keywords
 
 @register.simple_tag
 def get_article_mentions(article):
     """Extract mentions of notable entities from article content"""
-    mentions = {
-        'people': [],
-        'places': [],
-        'organizations': [],
-        'events': []
-    }
-    
-    # This is a simplified implementation
-    # In a production system, you might use NLP libraries for entity extraction
-    content_lower = article.content.lower() if article.content else ''
-    
-    # Common Northeast India personalities (example)
-    ne_personalities = [
-        'bhupen hazarika', 'mary kom', 'irom sharmila', 'bishnu prasad rabha',
-        'mamang dai', 'temsula ao', 'robin s sharma'
-    ]
-    
-    # Common places in Northeast India
-    ne_places = [
-        'guwahati', 'shillong', 'imphal', 'kohima', 'aizawl', 'agartala',
-        'itanagar', 'gangtok', 'kaziranga', 'cherrapunji', 'tawang'
-    ]
-    
-    for person in ne_personalities:
-        if person in content_lower:
-            mentions['people'].append(person.title())
-    
-    for place in ne_places:
-        if place in content_lower:
-            mentions['places'].append(place.title())
-    
-    return mentions
+    mentions = seo_bundle.lookup(article, 'mentions')
+    return seo_bundle.mentions(article) if mentions is None else mentions
 
 
 # Canonical URL template tags
@@ -560,108 +411,8 @@ def get_optimized_article_title(article, context='detail'):
     Generate SEO-optimized titles for articles with regional keywords
     Keeps titles under 60 characters for optimal SEO
     """
-    content_type = detect_content_type(article)
-    title = article.title
-    
-    # Get primary state if available
-    primary_state = None
-    states = list(article.states.all())
-    if states:
-        primary_state = states[0].name
-    
-    # Get primary category
-    primary_category = None
-    categories = list(article.categories.all())
-    if categories:
-        primary_category = categories[0].name
-    
-    # Function to create and truncate titles
-    def make_title(base_title, max_length=60):
-        if len(base_title) <= max_length:
-            return base_title
-        # Try truncating the original article title first
-        truncated_title = truncate_title(title, max_length - (len(base_title) - len(title)))
-        return base_title.replace(title, truncated_title)
-    
-    # Base title depending on content type and context
-    if context == 'detail':
-        if content_type == 'Person':
-            if primary_state:
-                # Format: "Name - [Profession] from State | NE India"
-                profession = _extract_profession_from_content(article)
-                if profession and len(f"{title} - {profession} from {primary_state}") <= 45:
-                    return make_title(f"{title} - {profession} from {primary_state} | NE India")
-                elif len(f"{title} - {primary_state} Personality") <= 50:
-                    return make_title(f"{title} - {primary_state} Personality | NE India")
-                else:
-                    return make_title(f"{title} | Northeast India Personality")
-            else:
-                return make_title(f"{title} | Northeast India Personality")
-                
-        elif content_type == 'Event':
-            if primary_state:
-                if _is_festival_article(article):
-                    if len(f"{title} - {primary_state} Festival") <= 45:
-                        return make_title(f"{title} - {primary_state} Festival | NE India")
-                    else:
-                        return make_title(f"{title} | Northeast India Festival")
-                else:
-                    if len(f"{title} in {primary_state}") <= 45:
-                        return make_title(f"{title} in {primary_state} | Northeast India")
-                    else:
-                        return make_title(f"{title} | Northeast India Event")
-            else:
-                return make_title(f"{title} | Northeast India Festival")
-                
-        elif content_type == 'Cultural':
-            if primary_state:
-                cultural_type = _get_cultural_type(article)
-                if cultural_type and len(f"{title} - {primary_state} {cultural_type}") <= 45:
-                    return make_title(f"{title} - {primary_state} {cultural_type} | NE India")
-                elif len(f"{title} in {primary_state}") <= 45:
-                    return make_title(f"{title} in {primary_state} | NE India Heritage")
-                else:
-                    return make_title(f"{title} | Northeast India Heritage")
-            else:
-                return make_title(f"{title} | Northeast India Heritage")
-                
-        elif content_type == 'Place':
-            if primary_state:
-                if len(f"{title}, {primary_state}") <= 45:
-                    return make_title(f"{title}, {primary_state} | Seven Sisters Tourism")
-                else:
-                    return make_title(f"{title} | Northeast India Tourism")
-            else:
-                return make_title(f"{title} | Northeast India Tourism")
-        
-        else:  # Default Article
-            if primary_state:
-                if len(f"{title} - {primary_state}") <= 40:
-                    return make_title(f"{title} - {primary_state} | Seven Sisters Wiki")
-                else:
-                    return make_title(f"{title} | Seven Sisters | NE India Wiki")
-            else:
-                return make_title(f"{title} | Seven Sisters | Northeast India Wiki")
-    
-    elif context == 'list':
-        # Shorter titles for list views with more aggressive truncation
-        if content_type == 'Person' and primary_state:
-            if len(f"{title} ({primary_state})") <= 50:
-                return make_title(f"{title} ({primary_state}) - NE India Personality", 58)
-            else:
-                return make_title(f"{title} - Northeast India Personality", 58)
-        elif content_type == 'Event' and primary_state:
-            if len(f"{title} - {primary_state}") <= 45:
-                return make_title(f"{title} - {primary_state} Festival", 58)
-            else:
-                return make_title(f"{title} - Northeast India Festival", 58)
-        elif primary_state and len(f"{title} - {primary_state}") <= 45:
-            return make_title(f"{title} - {primary_state} | Northeast India", 58)
-        else:
-            return make_title(f"{title} | Northeast India", 58)
-    
-    # Fallback
-    return make_title(f"{title} | Northeast India Wiki")
+    title = seo_bundle.lookup(article, 'titles', context)
+    return seo_bundle.optimized_title(article, context) if title is None else title
 
 
 @register.simple_tag  
@@ -711,80 +462,23 @@ def get_optimized_search_title(query=None, result_count=None):
 # Helper functions for title optimization
 def _extract_profession_from_content(article):
     """Extract profession/occupation from article content"""
-    content = article.content.lower() if article.content else ''
-    title = article.title.lower()
-    
-    professions = {
-        'politician': ['politician', 'chief minister', 'minister', 'mla', 'mp', 'leader'],
-        'artist': ['artist', 'painter', 'sculptor'],
-        'musician': ['musician', 'singer', 'composer'],
-        'writer': ['writer', 'author', 'poet', 'novelist'],
-        'actor': ['actor', 'actress', 'film'],
-        'activist': ['activist', 'social worker'],
-        'sportsperson': ['athlete', 'sports', 'player', 'boxer'],
-        'freedom fighter': ['freedom fighter', 'revolutionary'],
-        'educator': ['teacher', 'professor', 'educator']
-    }
-    
-    combined_text = f"{title} {content}"
-    
-    for profession, keywords in professions.items():
-        if any(keyword in combined_text for keyword in keywords):
-            return profession.title()
-    
-    return None
+    return seo_bundle.profession(article)
 
 
 def _is_festival_article(article):
     """Check if article is specifically about a festival"""
-    festival_keywords = ['festival', 'celebration', 'fest', 'puja', 'bihu', 'hornbill']
-    title_lower = article.title.lower()
-    categories = [cat.name.lower() for cat in article.categories.all()]
-    tags = [tag.name.lower() for tag in article.tags.all()]
-    
-    all_terms = [title_lower] + categories + tags
-    
-    return any(keyword in term for term in all_terms for keyword in festival_keywords)
+    return seo_bundle.is_festival(article)
 
 
 def _get_cultural_type(article):
     """Get specific cultural element type"""
-    cultural_types = {
-        'Tradition': ['tradition', 'custom', 'ritual'],
-        'Art': ['art', 'craft', 'handicraft', 'weaving'],
-        'Cuisine': ['food', 'dish', 'cuisine', 'recipe'],
-        'Dance': ['dance', 'dancing'],
-        'Music': ['music', 'song', 'instrument'],
-        'Attire': ['dress', 'costume', 'attire', 'clothing'],
-        'Language': ['language', 'dialect']
-    }
-    
-    title_lower = article.title.lower()
-    categories = [cat.name.lower() for cat in article.categories.all()]
-    tags = [tag.name.lower() for tag in article.tags.all()]
-    
-    all_terms = [title_lower] + categories + tags
-    
-    for cultural_type, keywords in cultural_types.items():
-        if any(keyword in term for term in all_terms for keyword in keywords):
-            return cultural_type
-    
-    return None
+    return seo_bundle.cultural_type(article)
 
 
 @register.filter
 def truncate_title(title, max_length=60):
     """Truncate title to specified length while keeping it readable"""
-    if len(title) <= max_length:
-        return title
-    
-    # Try to truncate at word boundary
-    truncated = title[:max_length].rsplit(' ', 1)[0]
-    if len(truncated) >= max_length - 10:  # If we get a reasonable length
-        return truncated + "..."
-    else:
-        # If word boundary truncation is too short, just cut and add ellipsis
-        return title[:max_length-3] + "..."
+    return seo_bundle.truncate_title(title, max_length)
 
 
 # Contextual Internal Linking Template Tags
@@ -824,14 +518,7 @@ def get_personality_articles_from_states(states, exclude_article=None, limit=3):
     ).exclude(id=exclude_article.id if exclude_article else None).distinct()
     
     # Filter to personality articles
-    personality_articles = []
-    for article in articles[:10]:  # Check top 10 for efficiency
-        if detect_content_type(article) == 'Person':
-            personality_articles.append(article)
-            if len(personality_articles) >= limit:
-                break
-    
-    return personality_articles
+    return list(articles.filter(detected_type='Person')[:limit])
 
 
 @register.simple_tag
@@ -850,68 +537,50 @@ def get_cultural_articles_by_category(categories, exclude_article=None, limit=3)
         review_status='approved'
     ).exclude(id=exclude_article.id if exclude_article else None).distinct()
     
-    cultural_articles = []
-    exclude_type = detect_content_type(exclude_article) if exclude_article else None
-    
-    for article in articles[:8]:
-        content_type = detect_content_type(article)
-        if content_type in ['Cultural', 'Event'] and content_type != exclude_type:
-            cultural_articles.append(article)
-            if len(cultural_articles) >= limit:
-                break
+    types = {'Cultural', 'Event'}
+    if exclude_article:
+        types.discard(detect_content_type(exclude_article))
     
-    return cultural_articles
+    return list(articles.filter(detected_type__in=types)[:limit])
 
 
 @register.simple_tag
 def get_random_articles_by_type(content_type, exclude_article=None, limit=3):
     """Get random articles of a specific content type"""
     from ..models import Content
+    from ..sampling import sample
     
     articles = Content.objects.filter(
         content_type='article',
         published=True,
-        review_status='approved'
-    ).exclude(id=exclude_article.id if exclude_article else None).order_by('?')
-    
-    typed_articles = []
-    for article in articles[:20]:  # Check top 20 random articles
-        if detect_content_type(article) == content_type:
-            typed_articles.append(article)
-            if len(typed_articles) >= limit:
-                break
+        review_status='approved',
+        detected_type=content_type
+    )
+    exclude = [exclude_article.id] if exclude_article else []
     
-    return typed_articles
+    return sample(articles, limit, f'published-articles:{content_type}', exclude=exclude)
 
 
 @register.simple_tag
 def suggest_related_categories(current_category, limit=4):
     """Suggest related categories based on hierarchy and co-occurrence"""
-    from ..models import Category, Content
+    from ..category_tree import tree_neighbours
     
     suggestions = []
+    neighbours = tree_neighbours(current_category)
     
     # Add parent and sibling categories
-    if current_category.parent:
-        suggestions.append(current_category.parent)
-        siblings = Category.objects.filter(
-            parent=current_category.parent
-        ).exclude(id=current_category.id)[:2]
-        suggestions.extend(siblings)
+    if neighbours.parent:
+        suggestions.append(neighbours.parent)
+        suggestions.extend(neighbours.siblings[:2])
     
     # Add child categories
-    children = Category.objects.filter(parent=current_category)[:2]
-    suggestions.extend(children)
+    suggestions.extend(neighbours.children[:2])
     
     # Add article counts to suggestions
     final_suggestions = []
     for category in suggestions[:limit]:
-        article_count = Content.objects.filter(
-            content_type='article',
-            categories=category,
-            published=True,
-            review_status='approved'
-        ).count()
+        article_count = category.published_count
         if article_count > 0:
             final_suggestions.append({
                 'category': category,
@@ -925,6 +594,7 @@ def suggest_related_categories(current_category, limit=4):
 @register.simple_tag
 def suggest_related_tags(current_tag, limit=5):
     """Suggest tags that co-occur with the current tag"""
+    from django.db.models import Count
     from ..models import Tag, Content
     
     # Get articles that have the current tag
@@ -935,32 +605,21 @@ def suggest_related_tags(current_tag, limit=5):
         review_status='approved'
     )
     
-    # Find other tags that appear in these articles
+    # Find other tags that appear in these articles, counting shared articles
     related_tags = Tag.objects.filter(
         content_items__in=articles_with_tag
-    ).exclude(id=current_tag.id).distinct()
+    ).exclude(id=current_tag.id).annotate(
+        shared_count=Count('content_items', distinct=True)
+    ).order_by('-shared_count', 'name')
     
     # Add article counts and co-occurrence info
     suggestions = []
     for tag in related_tags[:limit]:
-        article_count = Content.objects.filter(
-            content_type='article',
-            tags=tag,
-            published=True,
-            review_status='approved'
-        ).count()
-        
-        co_occurrence_count = Content.objects.filter(
-            content_type='article',
-            tags__in=[current_tag, tag],
-            published=True,
-            review_status='approved'
-        ).distinct().count()
-        
         suggestions.append({
             'tag': tag,
-            'article_count': article_count,
-            'co_occurrence_count': co_occurrence_count
+            'article_count': tag.published_count,
+            # Articles with either tag
+            'co_occurrence_count': current_tag.published_count + tag.published_count - tag.shared_count
         })
     
     # Sort by co-occurrence frequency
@@ -1047,52 +706,23 @@ def get_seasonal_content(current_month=None, limit=3):
 @register.filter
 def add_internal_links(content, current_article=None):
     """
-    Automatically add internal links to content for mentioned places, personalities, etc.
-    This is a basic implementation - in production, you'd want more sophisticated NLP.
+    Link the first mention of each state and short article title in
+    ``content``, see app/autolink.py
     """
     if not content:
         return content
-    
-    from ..models import Content, State
-    import re
-    
-    # Get potential link targets
-    states = State.objects.all()
-    articles = Content.objects.filter(
-        content_type='article',
-        published=True,
-        review_status='approved'
-    ).exclude(id=current_article.id if current_article else None)[:50]  # Limit for performance
-    
-    linked_content = content
-    
-    # Add state links
-    for state in states:
-        pattern = r'\b' + re.escape(state.name) + r'\b'
-        if re.search(pattern, linked_content, re.IGNORECASE):
-            replacement = f'<a href="/articles/?state={state.slug}" class="internal-link text-info">{state.name}</a>'
-            linked_content = re.sub(pattern, replacement, linked_content, count=1, flags=re.IGNORECASE)
-    
-    # Add personality/place links (limited to avoid over-linking)
-    for article in articles[:10]:  # Limit to top 10 to avoid performance issues
-        if len(article.title.split()) <= 3:  # Only link short titles to avoid false matches
-            pattern = r'\b' + re.escape(article.title) + r'\b'
-            if re.search(pattern, linked_content, re.IGNORECASE):
-                replacement = f'<a href="{article.get_absolute_url()}" class="internal-link text-primary">{article.title}</a>'
-                linked_content = re.sub(pattern, replacement, linked_content, count=1, flags=re.IGNORECASE)
-    
-    return mark_safe(linked_content)
+    return mark_safe(autolink.add_internal_links(content, exclude=current_article))
 
 
 # Helper functions for contextual linking
 
 def _get_category_relationship(current_category, related_category):
     """Determine the relationship between two categories"""
-    if related_category == current_category.parent:
+    if related_category.pk == current_category.parent_id:
         return "parent topic"
-    elif related_category.parent == current_category:
+    elif related_category.parent_id == current_category.pk:
         return "subtopic"
-    elif related_category.parent == current_category.parent:
+    elif related_category.parent_id == current_category.parent_id:
         return "related topic"
     else:
         return "related"
@@ -5,6 +5,8 @@ from django.utils.html import escape
 from urllib.parse import quote_plus
 import re
 
+from .. import seo_bundle
+
 register = template.Library()
 
 
@@ -47,52 +49,18 @@ def get_social_description(title, excerpt=None, categories=None, states=None, ma
     """
     Generate optimized social media description with Northeast India context.
     """
-    # Start with excerpt or generate from title
-    if excerpt:
-        base_description = excerpt.strip()
-    else:
-        base_description = f"Learn about {title}"
-    
-    # Add regional context
-    regional_context = ""
-    if states:
-        if isinstance(states, str):
-            regional_context = f" from {states}"
-        else:
-            try:
-                state_list = list(states)[:2]  # Limit to 2 states
-                if len(state_list) == 1:
-                    regional_context = f" from {state_list[0].name}"
-                elif len(state_list) == 2:
-                    regional_context = f" from {state_list[0].name} and {state_list[1].name}"
-                else:
-                    regional_context = " from Northeast India"
-            except:
-                regional_context = " in Northeast India"
-    else:
-        regional_context = " in Northeast India"
-    
-    # Add cultural context
-    cultural_suffix = " - Discover Seven Sisters states heritage"
-    
-    # Build full description
-    full_description = f"{base_description}{regional_context}{cultural_suffix}"
-    
-    # Truncate if too long
-    if len(full_description) > max_length:
-        # Try without cultural suffix
-        without_suffix = f"{base_description}{regional_context}"
-        if len(without_suffix) <= max_length:
-            full_description = without_suffix
-        else:
-            # Truncate base description
-            available_length = max_length - len(regional_context) - 3  # 3 for "..."
-            if available_length > 20:  # Ensure minimum meaningful length
-                full_description = f"{base_description[:available_length]}...{regional_context}"
-            else:
-                full_description = base_description[:max_length-3] + "..."
-    
-    return full_description
+    return seo_bundle.social_description(title, excerpt, states, max_length)
+
+
+@register.simple_tag
+def article_social_description(article, max_length=155):
+    """
+    Social media description of an article, read from its SEO bundle.
+    """
+    description = seo_bundle.lookup(article, 'descriptions', max_length)
+    if description is None:
+        return seo_bundle.article_social_description(article, max_length)
+    return description
 
 
 @register.simple_tag
@@ -100,48 +68,16 @@ def get_social_keywords(title, categories=None, states=None, tags=None):
     """
     Generate comprehensive keywords for social media and SEO.
     """
-    keywords = ['Northeast India', 'Seven Sisters states']
-    
-    # Add important words from title
-    title_words = [word.strip() for word in title.split() if len(word) > 3 and word.lower() not in ['the', 'and', 'for', 'with']]
-    keywords.extend(title_words[:3])
-    
-    # Add states
-    if states:
-        try:
-            keywords.extend([state.name for state in states])
-        except:
-            if isinstance(states, str):
-                keywords.append(states)
-    
-    # Add categories
-    if categories:
-        try:
-            keywords.extend([cat.name for cat in categories])
-        except:
-            if isinstance(categories, str):
-                keywords.append(categories)
-    
-    # Add tags (limit to avoid keyword stuffing)
-    if tags:
-        try:
-            keywords.extend([tag.name for tag in tags[:5]])
-        except:
-            pass
-    
-    # Add cultural terms
-    cultural_terms = ['culture', 'heritage', 'traditions', 'tribal culture', 'indigenous']
-    keywords.extend(cultural_terms[:2])
-    
-    # Remove duplicates while preserving order
-    seen = set()
-    unique_keywords = []
-    for keyword in keywords:
-        if keyword.lower() not in seen:
-            seen.add(keyword.lower())
-            unique_keywords.append(keyword)
-    
-    return ', '.join(unique_keywords)
+    return seo_bundle.social_keywords(title, categories, states, tags)
+
+
+@register.simple_tag
+def article_social_keywords(article):
+    """
+    Social media keywords of an article, read from its SEO bundle.
+    """
+    keywords = seo_bundle.lookup(article, 'social_keywords')
+    return seo_bundle.article_social_keywords(article) if keywords is None else keywords
 
 
 @register.simple_tag
@@ -1,8 +1,9 @@
-from django.test import TestCase
+from django.test import TestCase, modify_settings
 from django.urls import reverse
 from django.test import Client
 from django.contrib.auth.models import User
-from .models import Content, UserProfile, Category, Tag, State
+from .models import Content, Category, Tag, State, SlugHistory
+from accounts.models import UserProfile
 from .forms import ArticleForm
 
 
@@ -166,3 +167,1843 @@ class RobotsTxtTestCase(TestCase):
         
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
+
+
+class ContentSearchTestCase(TestCase):
+    """Test cases for the indexed full-text search"""
+    
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='searcher', password='testpass123')
+        self.category = Category.objects.create(name='Wildlife', slug='wildlife')
+        
+        self.title_match = Content.objects.create(
+            title='Hornbill Festival',
+            content='<p>An annual celebration held in Kohima.</p>',
+            content_type='article',
+            author=self.user,
+            published=True,
+            review_status='approved',
+        )
+        self.body_match = Content.objects.create(
+            title='Kisama Heritage Village',
+            content='<p>The village hosts the <strong>hornbill</strong> festival every December.</p>',
+            content_type='article',
+            author=self.user,
+            published=True,
+            review_status='approved',
+        )
+        self.unrelated = Content.objects.create(
+            title='Loktak Lake',
+            content='<p>A freshwater lake in Manipur.</p>',
+            content_type='article',
+            author=self.user,
+            published=True,
+            review_status='approved',
+        )
+    
+    def test_body_match_is_found_and_title_ranks_first(self):
+        """Test that body text is searchable and title matches rank higher"""
+        from .search import search_content
+        
+        results = list(search_content(Content.objects.all(), 'hornbill'))
+        self.assertEqual(results, [self.title_match, self.body_match])
+    
+    def test_taxonomy_names_are_indexed(self):
+        """Test that category names are part of the search document"""
+        from .search import search_content
+        
+        self.unrelated.categories.add(self.category)
+        results = list(search_content(Content.objects.all(), 'wildlife'))
+        self.assertEqual(results, [self.unrelated])
+    
+    def test_reverse_clear_and_delete_reindex(self):
+        """Test that clearing or deleting a category drops its name from the index"""
+        from .search import search_content
+    
+        self.unrelated.categories.add(self.category)
+        self.category.content_items.clear()
+        self.assertEqual(list(search_content(Content.objects.all(), 'wildlife')), [])
+    
+        self.unrelated.categories.add(self.category)
+        self.category.delete()
+        self.assertEqual(list(search_content(Content.objects.all(), 'wildlife')), [])
+    
+    def test_revision_apply_updates_index(self):
+        """Test that applying a revision reindexes the article"""
+        from .models import ContentRevision
+        from .search import search_content
+        
+        revision = ContentRevision.objects.create(
+            content=self.unrelated,
+            editor=self.user,
+            title='Loktak Lake',
+            content_text='<p>Home of the floating phumdis.</p>',
+            status='approved',
+        )
+        revision.apply_to_content()
+        
+        results = list(search_content(Content.objects.all(), 'phumdis'))
+        self.assertEqual(results, [self.unrelated])
+    
+    def test_queryset_filter_applies_before_the_ranking_cap(self):
+        """Test that matches excluded by the queryset don't crowd out the rest"""
+        from .search import SEARCH_MAX_RESULTS, rebuild_search_index, search_content
+        
+        Content.objects.bulk_create([
+            Content(
+                title=f'Hornbill draft {number}',
+                slug=f'hornbill-draft-{number}',
+                content='<p>Hornbill notes.</p>',
+                content_type='article',
+                author=self.user,
+                published=number % 20 == 0,
+            )
+            for number in range(SEARCH_MAX_RESULTS + 100)
+        ])
+        rebuild_search_index(Content)
+        
+        published = Content.objects.filter(published=True)
+        results = search_content(published, 'hornbill')
+        self.assertEqual(results.count(), 2 + (SEARCH_MAX_RESULTS + 100) // 20)
+        self.assertEqual(set(results), set(published.exclude(pk=self.unrelated.pk)))
+        
+        # More matches than are ranked, the rest still count and follow
+        results = search_content(Content.objects.all(), 'hornbill')
+        self.assertEqual(results.count(), SEARCH_MAX_RESULTS + 102)
+        self.assertEqual(len(list(results)), SEARCH_MAX_RESULTS + 102)
+    
+    def test_search_views_return_highlighted_results(self):
+        """Test that the search pages render ranked, highlighted results"""
+        response = self.client.get(reverse('app:article-list'), {'q': 'hornbill'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['page_obj'].paginator.count, 2)
+        self.assertIn('<mark>', str(response.context['page_obj'][1].search_snippet))
+        
+        response = self.client.get(reverse('app:article-search-htmx'), {'q': 'kis'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Kisama Heritage Village')
+
+
+class RevisionSearchTestCase(TestCase):
+    """Test cases for reviewer search in the review queue and patrol"""
+    
+    def setUp(self):
+        self.client = Client()
+        self.editor = User.objects.create_user(username='editor', password='testpass123')
+        UserProfile.objects.create(user=self.editor, role='editor')
+        self.contributor = User.objects.create_user(username='dzukoufan', password='testpass123')
+        
+        article = Content.objects.create(
+            title='Dzukou Valley',
+            content='<p>A valley on the Nagaland and Manipur border.</p>',
+            content_type='article',
+            author=self.editor,
+            published=True,
+            review_status='approved',
+        )
+        from .models import ContentRevision
+        self.comment_match = ContentRevision.objects.create(
+            content=article,
+            editor=self.contributor,
+            title='Dzukou Valley',
+            content_text='<p>A valley famous for its seasonal flowers.</p>',
+            revision_comment='Added the Dzukou lily',
+            status='pending_review',
+        )
+        self.body_match = ContentRevision.objects.create(
+            content=article,
+            editor=self.editor,
+            title='Dzukou Valley',
+            content_text='<p>The endemic lily blooms here in June.</p>',
+            status='pending_review',
+        )
+    
+    def test_revisions_are_ranked_by_field_weight(self):
+        """Test that comment matches outrank body matches"""
+        from .models import ContentRevision
+        from .search import search_revisions
+        
+        results = list(search_revisions(ContentRevision.objects.all(), 'lily'))
+        self.assertEqual(results, [self.comment_match, self.body_match])
+        
+        results = list(search_revisions(ContentRevision.objects.all(), 'dzukoufan'))
+        self.assertEqual(results, [self.comment_match])
+    
+    def test_edited_and_deleted_revisions_are_reindexed(self):
+        """Test that the revision index follows saves and deletes"""
+        from .models import ContentRevision
+        from .search import search_revisions
+        
+        self.body_match.revision_comment = 'Fixed the bloom season'
+        self.body_match.save()
+        results = list(search_revisions(ContentRevision.objects.all(), 'bloom season'))
+        self.assertEqual(results, [self.body_match])
+        
+        self.body_match.delete()
+        self.assertFalse(search_revisions(ContentRevision.objects.all(), 'bloom').exists())
+    
+    def test_review_queue_finds_pending_items_by_author_and_article(self):
+        """Test that reviewers find pending work behind settled matches, by author and by article title"""
+        from unittest import mock
+        from .models import ContentRevision
+        
+        shirui = Content.objects.create(
+            title='Shirui Hills',
+            content='<p>Hills in Ukhrul.</p>',
+            content_type='article',
+            author=self.contributor,
+            review_status='pending',
+        )
+        renamed = ContentRevision.objects.create(
+            content=shirui, editor=self.editor, title='Untitled edit',
+            content_text='<p>Notes.</p>', status='pending_review',
+        )
+        for number in range(3):
+            ContentRevision.objects.create(
+                content=shirui, editor=self.editor, title='Lily season',
+                content_text='<p>The lily, the lily and the lily.</p>', status='approved',
+            )
+        self.client.login(username='editor', password='testpass123')
+        
+        with mock.patch('app.search.SEARCH_MAX_RESULTS', 2):
+            response = self.client.get(reverse('app:article-review-queue'), {'q': 'lily'})
+        self.assertEqual(response.context['pending_revisions'], [self.comment_match, self.body_match])
+        
+        response = self.client.get(reverse('app:article-review-queue'), {'q': 'shirui'})
+        self.assertEqual(response.context['pending_revisions'], [renamed])
+        response = self.client.get(reverse('app:article-review-queue'), {'q': 'dzukoufan'})
+        self.assertEqual(list(response.context['pending_articles']), [shirui])
+    
+    def test_review_queue_and_patrol_show_highlighted_matches(self):
+        """Test that both reviewer pages search and highlight revisions"""
+        self.client.login(username='editor', password='testpass123')
+        
+        response = self.client.get(reverse('app:article-review-queue'), {'q': 'lily'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['sort'], 'relevance')
+        revisions = response.context['pending_revisions']
+        self.assertEqual(revisions, [self.comment_match, self.body_match])
+        self.assertIn('<mark>', str(revisions[1].search_snippet))
+        
+        response = self.client.get(reverse('app:recent-changes-patrol'), {'q': 'june'})
+        self.assertEqual(response.status_code, 200)
+        items = [entry['item'] for entry in response.context['patrol_queue']]
+        self.assertEqual(items, [self.body_match])
+        self.assertContains(response, '<mark>')
+
+
+class CategoryDirectoryTestCase(TestCase):
+    """Test cases for the cached category directory"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        
+        self.user = User.objects.create_user(username='writer', password='testpass123')
+        self.culture = Category.objects.create(name='Culture', slug='culture')
+        self.dance = Category.objects.create(name='Dance', slug='dance', parent=self.culture)
+        self.empty = Category.objects.create(name='Zoology', slug='zoology')
+        
+        for number in range(3):
+            article = Content.objects.create(
+                title=f'Bihu Dance {number}',
+                content='<p>Assamese folk dance.</p>',
+                content_type='article',
+                author=self.user,
+                published=True,
+                review_status='approved',
+            )
+            article.categories.add(self.culture, self.dance if number else self.culture)
+        draft = Content.objects.create(
+            title='Unpublished Draft',
+            content='<p>Draft.</p>',
+            content_type='article',
+            author=self.user,
+        )
+        draft.categories.add(self.culture)
+    
+    def test_directory_is_built_in_one_query(self):
+        """Test counts, subcategories, latest article and letter groups"""
+        from .directory import build_category_directory
+        
+        with self.assertNumQueries(1):
+            directory = build_category_directory()
+        
+        culture = directory.main_categories[0]
+        self.assertEqual([c.name for c in directory.main_categories], ['Culture', 'Zoology'])
+        self.assertEqual(culture.article_count, 3)
+        self.assertEqual([c.slug for c in culture.subcategories], ['dance'])
+        self.assertIsNotNone(culture.latest_article)
+        self.assertEqual([c.name for c in directory.popular_categories], ['Culture', 'Dance'])
+        self.assertEqual(directory.featured_category.slug, 'culture')
+        self.assertEqual([group['letter'] for group in directory.categories_by_letter], ['C', 'D', 'Z'])
+    
+    def test_directory_is_cached_until_categories_change(self):
+        """Test that the page reuses the cached directory until a category changes"""
+        from .directory import get_category_directory
+        
+        self.client.get(reverse('app:categories'))
+        with self.assertNumQueries(0):
+            get_category_directory()
+        
+        self.empty.name = 'Ancient Zoology'
+        self.empty.save()
+        response = self.client.get(reverse('app:categories'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Ancient Zoology')
+
+
+class PublishedCounterTestCase(TestCase):
+    """Test cases for the denormalized published-article counters"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='writer', password='testpass123')
+        self.culture = Category.objects.create(name='Culture', slug='culture')
+        self.food = Category.objects.create(name='Food', slug='food')
+        self.tag = Tag.objects.create(name='Traditional', slug='traditional')
+        self.state = State.objects.create(name='Nagaland', slug='nagaland', description='Nagaland', capital='Kohima')
+        
+        self.article = Content.objects.create(
+            title='Hornbill Festival',
+            content='<p>Festival of festivals.</p>',
+            content_type='article',
+            author=self.user,
+            published=True,
+            review_status='approved',
+        )
+        self.article.categories.add(self.culture)
+        self.article.tags.add(self.tag)
+        self.article.states.add(self.state)
+    
+    def assertCounts(self, culture, food, tag, state, matrix):
+        from .counters import state_category_counts
+        
+        self.culture.refresh_from_db()
+        self.food.refresh_from_db()
+        self.tag.refresh_from_db()
+        self.state.refresh_from_db()
+        self.assertEqual(
+            (self.culture.published_count, self.food.published_count,
+             self.tag.published_count, self.state.published_count),
+            (culture, food, tag, state),
+        )
+        self.assertEqual({c.slug: n for c, n in state_category_counts(self.state).items()}, matrix)
+    
+    def test_links_are_counted(self):
+        """Test forward and reverse m2m changes"""
+        self.assertCounts(1, 0, 1, 1, {'culture': 1})
+        
+        self.food.content_items.add(self.article)
+        self.assertCounts(1, 1, 1, 1, {'culture': 1, 'food': 1})
+        
+        self.article.categories.remove(self.culture, self.culture)
+        self.article.categories.remove(self.culture)
+        self.assertCounts(0, 1, 1, 1, {'food': 1})
+        
+        self.article.states.clear()
+        self.assertCounts(0, 1, 1, 0, {})
+    
+    def test_publish_unpublish_and_delete(self):
+        """Test that status changes and deletes move every counter"""
+        self.article.published = False
+        self.article.save()
+        self.assertCounts(0, 0, 0, 0, {})
+        
+        self.article.categories.add(self.food)
+        self.assertCounts(0, 0, 0, 0, {})
+        
+        self.article.published = True
+        self.article.save()
+        self.assertCounts(1, 1, 1, 1, {'culture': 1, 'food': 1})
+        
+        self.article.delete()
+        self.assertCounts(0, 0, 0, 0, {})
+    
+    def test_reconcile_repairs_drift(self):
+        """Test that the reconcile command fixes writes that bypass signals"""
+        from django.core.management import call_command
+        from io import StringIO
+        
+        Content.objects.filter(pk=self.article.pk).update(review_status='pending')
+        self.assertCounts(1, 0, 1, 1, {'culture': 1})
+        
+        output = StringIO()
+        call_command('reconcile_counts', stdout=output)
+        self.assertIn('corrected', output.getvalue())
+        self.assertCounts(0, 0, 0, 0, {})
+        
+        call_command('reconcile_counts', stdout=output)
+        self.assertIn('All counters are in sync', output.getvalue())
+
+
+class TagCloudTestCase(TestCase):
+    """Test cases for the cached tag cloud"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        
+        self.user = User.objects.create_user(username='writer', password='testpass123')
+        self.weaving = Tag.objects.create(name='Weaving', slug='weaving')
+        self.bamboo = Tag.objects.create(name='Bamboo', slug='bamboo')
+        for number in range(6):
+            article = Content.objects.create(
+                title=f'Loin Loom {number}',
+                content='<p>Weaving traditions.</p>',
+                content_type='article',
+                author=self.user,
+                published=True,
+                review_status='approved',
+            )
+            article.tags.add(self.weaving)
+    
+    def test_cloud_is_built_from_counters(self):
+        """Test size buckets, alphabet index, popular tags and stable colours"""
+        from .directory import build_tag_cloud, tag_color
+        
+        with self.assertNumQueries(1):
+            cloud = build_tag_cloud()
+        
+        self.assertEqual([(tag.slug, tag.count, tag.size) for tag in cloud.tags], [('bamboo', 0, 1), ('weaving', 6, 3)])
+        self.assertEqual([tag.slug for tag in cloud.popular_tags], ['weaving', 'bamboo'])
+        self.assertEqual([group['letter'] for group in cloud.tags_by_letter], ['B', 'W'])
+        self.assertEqual(len(cloud.alphabet), 26)
+        self.assertEqual(cloud.tags[1].color, tag_color('weaving'))
+        self.assertEqual(tag_color('weaving'), build_tag_cloud().tags[1].color)
+    
+    def test_tags_page_is_served_from_fragment_cache(self):
+        """Test that /tags/ costs one query cold, none warm, and refreshes on tag changes"""
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('app:article-tags'))
+        self.assertContains(response, 'Weaving')
+        
+        with self.assertNumQueries(0):
+            self.client.get(reverse('app:article-tags'))
+        
+        Tag.objects.create(name='Handloom', slug='handloom')
+        self.assertContains(self.client.get(reverse('app:article-tags')), 'Handloom')
+
+
+class PopularityTestCase(TestCase):
+    """Test cases for buffered page views and decayed popularity"""
+    
+    def setUp(self):
+        from .popularity import flush_views
+        flush_views()
+        
+        self.user = User.objects.create_user(username='writer', password='testpass123')
+        self.category = Category.objects.create(name='Harvest Festivals', slug='harvest-festivals')
+        self.articles = []
+        for title in ('Bihu', 'Wangala', 'Losar'):
+            article = Content.objects.create(
+                title=title,
+                content=f'<p>{title} festival.</p>',
+                content_type='article',
+                author=self.user,
+                published=True,
+                review_status='approved',
+            )
+            article.categories.add(self.category)
+            self.articles.append(article)
+    
+    def test_recent_views_outweigh_old_views(self):
+        """Test that a view one half-life later is worth two views now"""
+        from .popularity import HALF_LIFE, POPULARITY_EPOCH, add_views, decayed_views
+        
+        now = POPULARITY_EPOCH + HALF_LIFE * 10
+        old = add_views(0, 2, now)
+        recent = add_views(0, 1, now + HALF_LIFE)
+        self.assertAlmostEqual(old, recent)
+        self.assertAlmostEqual(decayed_views(add_views(old, 2, now), now), 4)
+        self.assertAlmostEqual(decayed_views(old, now + HALF_LIFE), 1)
+    
+    def test_views_are_buffered_then_flushed_in_batches(self):
+        """Test that article views don't write until the buffer is flushed"""
+        from .popularity import flush_views, pending_views
+        
+        bihu, wangala, losar = self.articles
+        for article, views in ((bihu, 1), (wangala, 3), (losar, 2)):
+            for _ in range(views):
+                self.client.get(reverse('app:article-detail', kwargs={'slug': article.slug}))
+        self.client.get(
+            reverse('app:article-detail', kwargs={'slug': bihu.slug}),
+            HTTP_USER_AGENT='Googlebot/2.1',
+        )
+        self.assertEqual(pending_views(), {bihu.pk: 1, wangala.pk: 3, losar.pk: 2})
+        bihu.refresh_from_db()
+        self.assertEqual(bihu.view_count, 0)
+        
+        self.assertEqual(flush_views(), 6)
+        self.assertEqual(pending_views(), {})
+        
+        response = self.client.get(
+            reverse('app:article-category', kwargs={'slug': self.category.slug}),
+            {'sort': 'popular'},
+        )
+        page = response.context['page_obj']
+        self.assertEqual([a.title for a in page], ['Wangala', 'Losar', 'Bihu'])
+        self.assertEqual([a.view_count for a in page], [3, 2, 1])
+    
+    def test_flush_purges_popular_pages(self):
+        """Test that a flush purges cached popularity-sorted pages only"""
+        from django.core.cache import cache
+        from .popularity import flush_views
+    
+        cache.clear()
+        url = reverse('app:article-category', kwargs={'slug': self.category.slug})
+        self.client.get(url, {'sort': 'popular'})
+        self.client.get(url, {'sort': 'az'})
+    
+        losar = self.articles[2]
+        self.client.get(reverse('app:article-detail', kwargs={'slug': losar.slug}))
+        self.assertEqual(flush_views(), 1)
+    
+        response = self.client.get(url, {'sort': 'popular'})
+        self.assertEqual(response.context['page_obj'][0], losar)
+        with self.assertNumQueries(0):
+            self.client.get(url, {'sort': 'az'})
+    
+    def test_failed_flush_keeps_the_page_and_the_views(self):
+        """Test that a database error while flushing does not fail the article page"""
+        from unittest import mock
+        from django.db import OperationalError
+        from . import popularity
+        
+        bihu = self.articles[0]
+        with mock.patch.object(popularity, 'FLUSH_THRESHOLD', 1), \
+                mock.patch('django.db.models.query.QuerySet.update', side_effect=OperationalError('database is locked')), \
+                self.assertLogs('app.popularity', level='ERROR'):
+            response = self.client.get(reverse('app:article-detail', kwargs={'slug': bihu.slug}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(popularity.pending_views(), {bihu.pk: 1})
+        
+        # Explicit flushes still raise
+        with mock.patch('django.db.models.query.QuerySet.update', side_effect=OperationalError('database is locked')):
+            with self.assertRaises(OperationalError):
+                popularity.flush_views()
+        self.assertEqual(popularity.flush_views(), 1)
+
+
+class RandomSamplingTestCase(TestCase):
+    """Test cases for the random sampler that replaces order_by('?')"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        
+        self.user = User.objects.create_user(username='writer', password='testpass123')
+        self.published = [
+            Content.objects.create(
+                title=f'Village {number}',
+                content='<p>Village life.</p>',
+                content_type='article',
+                author=self.user,
+                published=True,
+                review_status='approved',
+            )
+            for number in range(8)
+        ]
+        self.draft = Content.objects.create(
+            title='Draft Village',
+            content='<p>Draft.</p>',
+            content_type='article',
+            author=self.user,
+        )
+        self.queryset = Content.objects.filter(published=True)
+    
+    def test_sample_is_distinct_filtered_and_cached(self):
+        """Test that samples respect filters and exclusions and reuse the id array"""
+        from .sampling import sample
+        
+        picked = sample(self.queryset, 5, 'published', exclude=[self.published[0].pk])
+        self.assertEqual(len(picked), 5)
+        self.assertEqual(len({article.pk for article in picked}), 5)
+        self.assertNotIn(self.published[0], picked)
+        self.assertNotIn(self.draft, picked)
+        
+        with self.assertNumQueries(1):
+            self.assertEqual(len(sample(self.queryset, 20, 'published')), 8)
+    
+    def test_id_array_is_kept_in_process(self):
+        """Test that repeated samples skip the shared cache until the stamp moves"""
+        from unittest import mock
+        from .sampling import sample_ids
+        
+        sample_ids(self.queryset, 3, 'published-memo')
+        with mock.patch('app.sampling.cache') as shared:
+            self.assertEqual(len(sample_ids(self.queryset, 3, 'published-memo')), 3)
+        shared.get.assert_not_called()
+        
+        self.draft.published = True
+        self.draft.save()
+        self.assertEqual(len(sample_ids(self.queryset, 20, 'published-memo')), 9)
+    
+    def test_large_populations_are_probed(self):
+        """Test primary key probing when the id array would be too large"""
+        from unittest import mock
+        from .sampling import sample_ids
+        
+        with mock.patch('app.sampling.MAX_CACHED_IDS', 3):
+            picked = sample_ids(self.queryset, 4, 'published-probe')
+        self.assertTrue(1 <= len(picked) <= 4)
+        self.assertTrue(set(picked) <= {article.pk for article in self.published})
+
+
+class CategoryTreeTestCase(TestCase):
+    """Test cases for the nested set category hierarchy"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='writer', password='testpass123')
+        self.arts = Category.objects.create(name='Performing Arts', slug='performing-arts')
+        self.songs = Category.objects.create(name='Songs', slug='songs', parent=self.arts)
+        self.stagecraft = Category.objects.create(name='Stagecraft', slug='stagecraft', parent=self.arts)
+        self.folk_songs = Category.objects.create(name='Folk Songs', slug='folk-songs', parent=self.songs)
+        self.wildlife = Category.objects.create(name='Wildlife', slug='wildlife')
+        
+        self.articles = {}
+        for category in (self.arts, self.folk_songs, self.stagecraft, self.wildlife):
+            article = Content.objects.create(
+                title=f'{category.name} Article',
+                content='<p>Body.</p>',
+                content_type='article',
+                author=self.user,
+                published=True,
+                review_status='approved',
+            )
+            article.categories.add(category)
+            self.articles[category.slug] = article
+        # Linked to two categories of the same subtree, must be listed once
+        self.articles['folk-songs'].categories.add(self.songs)
+    
+    def test_subtree_articles_in_one_query(self):
+        """Test that a category lists the articles of all its subcategories"""
+        from .category_tree import subtree_articles
+        
+        self.arts.refresh_from_db()
+        with self.assertNumQueries(1):
+            titles = sorted(subtree_articles(self.arts).values_list('title', flat=True))
+        self.assertEqual(titles, ['Folk Songs Article', 'Performing Arts Article', 'Stagecraft Article'])
+        
+        self.songs.refresh_from_db()
+        self.assertEqual(list(subtree_articles(self.songs)), [self.articles['folk-songs']])
+    
+    def test_breadcrumbs_and_neighbours(self):
+        """Test ancestors, parent, siblings and children each cost one query"""
+        from .category_tree import breadcrumbs, tree_neighbours
+        
+        self.folk_songs.refresh_from_db()
+        with self.assertNumQueries(1):
+            self.assertEqual(breadcrumbs(self.folk_songs), [self.arts, self.songs])
+        
+        self.songs.refresh_from_db()
+        with self.assertNumQueries(1):
+            neighbours = tree_neighbours(self.songs)
+        self.assertEqual(neighbours.parent, self.arts)
+        self.assertEqual(neighbours.siblings, [self.stagecraft])
+        self.assertEqual(neighbours.children, [self.folk_songs])
+    
+    def test_tree_order_and_alphabetical_pickers(self):
+        """Test that querysets list the tree while pickers and sidebars list names"""
+        from .admin import CategoryAdmin
+        from .forms import ArticleForm
+        
+        tree = ['Performing Arts', 'Songs', 'Folk Songs', 'Stagecraft', 'Wildlife']
+        self.assertEqual([category.name for category in Category.objects.all()], tree)
+        article = self.articles['folk-songs']
+        self.assertEqual([category.name for category in article.categories.all()], ['Songs', 'Folk Songs'])
+        
+        alphabetical = sorted(tree)
+        self.assertEqual([category.name for category in ArticleForm().fields['categories'].queryset], alphabetical)
+        self.assertEqual(CategoryAdmin.ordering, ('name',))
+        
+        tag = Tag.objects.create(name='Oral Tradition', slug='oral-tradition')
+        for category in (self.wildlife, self.folk_songs, self.arts):
+            self.articles[category.slug].tags.add(tag)
+        response = self.client.get(reverse('app:article-tag', kwargs={'slug': tag.slug}))
+        self.assertEqual(
+            [category.name for category in response.context['categories']],
+            ['Folk Songs', 'Performing Arts', 'Songs', 'Wildlife'],
+        )
+    
+    def test_delete_keeps_children_and_rebuild_repairs_tree(self):
+        """Test that deleting a parent promotes its children and rebuilds are idempotent"""
+        from .category_tree import rebuild_category_tree, subtree_articles
+        
+        self.songs.refresh_from_db()
+        self.songs.delete()
+        self.folk_songs.refresh_from_db()
+        self.assertIsNone(self.folk_songs.parent)
+        self.assertTrue(self.folk_songs.is_root_node())
+        self.assertEqual(rebuild_category_tree(), 0)
+        
+        # Bypass MPTT, then repair the intervals from the parent links
+        Category.objects.filter(pk=self.folk_songs.pk).update(parent=self.wildlife)
+        self.assertGreater(rebuild_category_tree(), 0)
+        self.wildlife.refresh_from_db()
+        self.assertEqual(
+            sorted(subtree_articles(self.wildlife).values_list('title', flat=True)),
+            ['Folk Songs Article', 'Wildlife Article'],
+        )
+    
+    def test_category_page_includes_subcategories(self):
+        """Test that the category page lists subcategory articles"""
+        response = self.client.get(reverse('app:article-category', kwargs={'slug': 'performing-arts'}))
+        self.assertEqual(response.status_code, 200)
+        titles = {article.title for article in response.context['page_obj']}
+        self.assertEqual(titles, {'Performing Arts Article', 'Stagecraft Article', 'Folk Songs Article'})
+
+
+class StateBreakdownTestCase(TestCase):
+    """Test cases for the state x category breakdowns"""
+    
+    def setUp(self):
+        from django.utils import timezone
+        
+        self.user = User.objects.create_user(username='writer', password='testpass123')
+        self.crafts = Category.objects.create(name='Handicrafts', slug='handicrafts')
+        self.states = [
+            State.objects.create(name=name, slug=name.lower(), capital='Capital')
+            for name in ('Mizoram', 'Assam', 'Tripura')
+        ]
+        self.articles = []
+        for number in range(7):
+            article = Content.objects.create(
+                title=f'Craft {number}',
+                content='<p>Weaving.</p>',
+                content_type='article',
+                author=self.user,
+                published=True,
+                review_status='approved',
+            )
+            Content.objects.filter(pk=article.pk).update(
+                published_at=timezone.now() - timezone.timedelta(days=number)
+            )
+            article.categories.add(self.crafts)
+            # Assam gets four articles, Mizoram three, Tripura none
+            article.states.add(self.states[1] if number % 2 == 0 else self.states[0])
+            self.articles.append(article)
+    
+    def test_articles_by_state_in_constant_queries(self):
+        """Test that the latest articles per state come from two queries"""
+        from .breakdowns import articles_by_state
+        
+        queryset = Content.objects.filter(categories=self.crafts, published=True)
+        with self.assertNumQueries(2):
+            grouped = articles_by_state(queryset)
+            authors = [article.author.username for articles in grouped.values() for article in articles]
+        
+        self.assertEqual([state.name for state in grouped], ['Assam', 'Mizoram'])
+        self.assertEqual(
+            [article.title for article in grouped[self.states[1]]],
+            ['Craft 0', 'Craft 2', 'Craft 4'],
+        )
+        self.assertEqual(len(grouped[self.states[0]]), 3)
+        self.assertEqual(set(authors), {'writer'})
+    
+    def test_counts_come_from_matrix(self):
+        """Test the state and category counts read the maintained matrix"""
+        from .breakdowns import category_counts_for_state, state_counts_for_category
+        
+        with self.assertNumQueries(1):
+            counts = {state.name: count for state, count in state_counts_for_category(self.crafts).items()}
+        self.assertEqual(counts, {'Assam': 4, 'Mizoram': 3})
+        self.assertEqual(category_counts_for_state(self.states[1]), {self.crafts: 4})
+    
+    def test_state_detail_links_categories(self):
+        """Test that the state page renders its category breakdown"""
+        response = self.client.get(reverse('app:state-detail', kwargs={'state_slug': 'assam'}))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, reverse('app:state-category-articles', args=['assam', 'handicrafts']))
+
+
+class RelatedContentTestCase(TestCase):
+    """Test cases for the precomputed related articles"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='writer', password='testpass123')
+        self.state = State.objects.create(name='Meghalaya', slug='meghalaya', capital='Shillong')
+        self.other_state = State.objects.create(name='Sikkim', slug='sikkim', capital='Gangtok')
+        self.weaving = Category.objects.create(name='Weaving', slug='weaving')
+        self.loom = Tag.objects.create(name='Loom', slug='loom')
+        
+        def article(title, states=(), categories=(), tags=(), **kwargs):
+            content = Content.objects.create(
+                title=title,
+                content='<p>Plain text.</p>',
+                content_type='article',
+                author=self.user,
+                published=kwargs.get('published', True),
+                review_status='approved',
+            )
+            content.states.set(states)
+            content.categories.set(categories)
+            content.tags.set(tags)
+            return content
+        
+        self.article = article('Shawls', [self.state], [self.weaving], [self.loom])
+        self.close = article('Looms', [self.state], [self.weaving], [self.loom])
+        self.regional = article('Markets', [self.state])
+        self.topical = article('Textiles', [self.other_state], [self.weaving])
+        self.unrelated = article('Glaciers', [self.other_state])
+        self.draft = article('Draft Shawls', [self.state], [self.weaving], [self.loom], published=False)
+    
+    def test_refresh_ranks_by_shared_features(self):
+        """Test that neighbours are ranked like the page-view scorer"""
+        from .related import refresh_related_content, related_articles
+        
+        stats = refresh_related_content()
+        self.assertEqual(stats, {'articles': 5, 'changed': 5, 'refreshed': 5})
+        
+        with self.assertNumQueries(1):
+            related = related_articles(self.article)
+        self.assertEqual(related, [self.close, self.regional, self.topical])
+        self.assertNotIn(self.draft, related)
+    
+    def test_refresh_is_incremental(self):
+        """Test that only articles affected by a change are recomputed"""
+        from .related import refresh_related_content, related_articles
+        
+        refresh_related_content()
+        self.assertEqual(refresh_related_content()['refreshed'], 0)
+        
+        self.unrelated.categories.add(self.weaving)
+        stats = refresh_related_content()
+        self.assertEqual(stats['changed'], 1)
+        self.assertEqual(stats['refreshed'], 4)
+        self.assertIn(self.unrelated, related_articles(self.article))
+        
+        # Unpublished articles drop out of every list
+        self.close.published = False
+        self.close.save()
+        refresh_related_content()
+        self.assertNotIn(self.close, related_articles(self.article))
+    
+    def test_shared_state_waits_for_full_refresh(self):
+        """Test that a new state link does not recompute every article in the state"""
+        from .related import refresh_related_content, related_articles
+    
+        refresh_related_content()
+        self.unrelated.states.add(self.state)
+        stats = refresh_related_content()
+        self.assertEqual((stats['changed'], stats['refreshed']), (1, 2))
+        self.assertNotIn(self.unrelated, related_articles(self.regional))
+    
+        refresh_related_content(full=True)
+        self.assertIn(self.unrelated, related_articles(self.regional))
+    
+    def test_article_page_lists_related(self):
+        """Test that the article page renders the precomputed list"""
+        from .related import refresh_related_content
+        
+        refresh_related_content()
+        response = self.client.get(reverse('app:article-detail', kwargs={'slug': self.article.slug}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['related_articles'][0], self.close)
+
+
+class ContentClassificationTestCase(TestCase):
+    """Test cases for the persisted content-type classification"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='writer', password='testpass123')
+    
+    def create(self, title, body, **kwargs):
+        return Content.objects.create(
+            title=title,
+            content=body,
+            content_type='article',
+            author=self.user,
+            published=True,
+            review_status='approved',
+            **kwargs
+        )
+    
+    def test_classified_on_save_and_taxonomy_change(self):
+        """Test that saves and tag changes store type, sub-type and profession"""
+        person = self.create('Rongmei Leader', '<p>A poet and politician.</p>')
+        person.refresh_from_db()
+        self.assertEqual((person.detected_type, person.profession), ('Person', 'Politician'))
+        
+        event = self.create('Spring Gathering', '<p>An annual harvest celebration.</p>')
+        event.refresh_from_db()
+        self.assertEqual((event.detected_type, event.detected_subtype), ('Event', ''))
+        
+        event.tags.add(Tag.objects.create(name='Bihu', slug='bihu'))
+        event.refresh_from_db()
+        self.assertEqual(event.detected_subtype, 'Festival')
+    
+    def test_reverse_clear_and_delete_reclassify(self):
+        """Test that clearing or deleting a tag reclassifies its articles"""
+        event = self.create('Spring Gathering', '<p>An annual harvest celebration.</p>')
+        tag = Tag.objects.create(name='Bihu', slug='bihu')
+        event.tags.add(tag)
+    
+        tag.content_items.clear()
+        event.refresh_from_db()
+        self.assertEqual(event.detected_subtype, '')
+    
+        event.tags.add(tag)
+        tag.delete()
+        event.refresh_from_db()
+        self.assertEqual(event.detected_subtype, '')
+    
+    def test_template_tags_read_stored_values(self):
+        """Test that the schema tags read the columns instead of scanning"""
+        from .templatetags.schema_tags import _is_festival_article, detect_content_type
+        
+        article = self.create('Bamboo Craft', '<p>A weaving heritage.</p>')
+        article = Content.objects.only('pk', 'title', 'detected_type', 'detected_subtype', 'profession').get(pk=article.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(detect_content_type(article), 'Cultural')
+            self.assertFalse(_is_festival_article(article))
+    
+    def test_backfill_and_sql_type_filter(self):
+        """Test the batch backfill and filtering by stored type"""
+        from .classification import classify_all
+        from .templatetags.schema_tags import get_random_articles_by_type
+        
+        people = [self.create(f'Singer {number}', '<p>A folk singer.</p>') for number in range(3)]
+        self.create('Loktak Lake', '<p>A lake in a valley.</p>')
+        Content.objects.update(detected_type='', profession='')
+        
+        self.assertEqual(classify_all(batch_size=2, only_missing=True), 4)
+        self.assertEqual(classify_all(), 0)
+        
+        picked = get_random_articles_by_type('Person', exclude_article=people[0], limit=5)
+        self.assertEqual(sorted(article.pk for article in picked), [people[1].pk, people[2].pk])
+    
+    def test_migration_classifies_existing_articles(self):
+        """Test that the classification migration backfills articles saved before it"""
+        from importlib import import_module
+        from django.db import connection
+        from django.db.migrations.loader import MigrationLoader
+        from .templatetags.schema_tags import get_personality_articles_from_states
+        
+        state = State.objects.create(name='Manipur', slug='manipur')
+        person = self.create('Meitei Poet', '<p>A poet and writer.</p>')
+        person.states.add(state)
+        Content.objects.update(detected_type='', detected_subtype='', profession='')
+        
+        apps = MigrationLoader(connection).project_state(('app', '0024_content_classification')).apps
+        migration = import_module('app.migrations.0024_content_classification')
+        migration.classify_articles(apps, connection.schema_editor())
+        
+        self.assertEqual(get_personality_articles_from_states([state]), [person])
+
+
+class AutoLinkTestCase(TestCase):
+    """Test cases for the automatic internal links"""
+    
+    def setUp(self):
+        from .autolink import link_index
+        
+        self.user = User.objects.create_user(username='writer', password='testpass123')
+        self.state = State.objects.create(name='Nagaland', slug='nagaland', description='Nagaland', capital='Kohima')
+        self.article = self.create('Hornbill Festival')
+        self.longer = self.create('Hornbill Festival Kohima')
+        link_index.invalidate()
+    
+    def create(self, title):
+        return Content.objects.create(
+            title=title,
+            content='<p>Body</p>',
+            content_type='article',
+            author=self.user,
+            published=True,
+            review_status='approved'
+        )
+    
+    def test_links_first_whole_word_mention(self):
+        """Test that the longest match is linked once and partial words are not"""
+        from .autolink import add_internal_links
+        
+        html = add_internal_links(
+            '<p>The hornbill festival kohima is held in Nagaland. Nagalanders visit Nagaland.</p>'
+        )
+        self.assertIn(
+            f'<a href="{self.longer.get_absolute_url()}" class="internal-link text-primary">'
+            'hornbill festival kohima</a>', html
+        )
+        self.assertNotIn(self.article.get_absolute_url() + '"', html)
+        self.assertEqual(html.count('?state=nagaland'), 1)
+        self.assertIn('Nagalanders', html)
+    
+    def test_skips_links_code_and_current_article(self):
+        """Test that existing links, code and the rendered article are left alone"""
+        from .autolink import add_internal_links
+        
+        html = '<p><a href="/x">Nagaland</a> <code>Nagaland</code> Hornbill Festival</p>'
+        self.assertEqual(add_internal_links(html, exclude=self.article), html)
+    
+    def test_rebuilt_when_content_changes(self):
+        """Test that new articles become link targets without a restart"""
+        from .autolink import add_internal_links, link_index
+        
+        link_index.automaton
+        self.create('Dzukou Valley')
+        self.assertIn('internal-link text-primary', add_internal_links('<p>Dzukou Valley</p>'))
+
+
+class ArticleFragmentCacheTestCase(TestCase):
+    """Test cases for the rendered article fragment cache"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        
+        cache.clear()
+        self.user = User.objects.create_user(username='writer', password='testpass123')
+        self.article = Content.objects.create(
+            title='Loktak Lake',
+            slug='loktak-lake',
+            content='<p>The largest freshwater lake.</p>',
+            content_type='article',
+            author=self.user,
+            published=True,
+            review_status='approved'
+        )
+        self.url = reverse('app:article-detail', kwargs={'slug': self.article.slug})
+    
+    def test_revision_apply_and_tag_change_refresh_page(self):
+        """Test that applied revisions and new tags show up on the next view"""
+        from .models import ContentRevision
+        
+        self.assertContains(self.client.get(self.url), 'largest freshwater lake')
+        revision = ContentRevision.objects.create(
+            content=self.article,
+            editor=self.user,
+            title='Loktak Lake',
+            content_text='<p>Home of the floating phumdis.</p>',
+            status='approved',
+        )
+        revision.apply_to_content()
+        response = self.client.get(self.url)
+        self.assertContains(response, 'floating phumdis')
+        self.assertNotContains(response, 'largest freshwater lake')
+        
+        self.article.tags.add(Tag.objects.create(name='Wetlands', slug='wetlands'))
+        self.assertContains(self.client.get(self.url), '?tag=wetlands')
+    
+    def test_reverse_clear_and_delete_refresh_page(self):
+        """Test that clearing or deleting a tag invalidates its articles' fragments"""
+        from .caching import get_version
+        from .fragments import article_version_name
+    
+        tag = Tag.objects.create(name='Wetlands', slug='wetlands')
+        self.article.tags.add(tag)
+        self.assertContains(self.client.get(self.url), '?tag=wetlands')
+        tag.content_items.clear()
+        self.assertNotContains(self.client.get(self.url), '?tag=wetlands')
+    
+        self.article.tags.add(tag)
+        version = get_version(article_version_name(self.article.pk))
+        tag.delete()
+        self.assertNotEqual(get_version(article_version_name(self.article.pk)), version)
+    
+    def test_rendered_once_per_stamp(self):
+        """Test that a fragment is rendered again only when its stamp changes"""
+        from .fragments import get_or_render
+        
+        renders = []
+        
+        def render():
+            renders.append(1)
+            return f'<p>{len(renders)}</p>'
+        
+        self.assertEqual(get_or_render('fragment:test', 'v1', render), '<p>1</p>')
+        self.assertEqual(get_or_render('fragment:test', 'v1', render), '<p>1</p>')
+        self.assertEqual(get_or_render('fragment:test', 'v2', render), '<p>2</p>')
+        self.assertEqual(len(renders), 2)
+    
+    def test_concurrent_render_serves_previous_version(self):
+        """Test that requests arriving during a render do not render again"""
+        from django.core.cache import cache
+        from .fragments import get_or_render
+        
+        get_or_render('fragment:test', 'v1', lambda: 'old')
+        cache.add('fragment:test:lock', 'v2')
+        self.assertEqual(get_or_render('fragment:test', 'v2', lambda: 'new'), 'old')
+        cache.delete('fragment:test:lock')
+        self.assertEqual(get_or_render('fragment:test', 'v2', lambda: 'new'), 'new')
+
+
+class PageCacheTestCase(TestCase):
+    """Test cases for the anonymous full-page cache"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        
+        cache.clear()
+        self.user = User.objects.create_user(username='writer', password='testpass123')
+        self.lake = self.create('Loktak Lake')
+        self.peak = self.create('Dzukou Valley')
+    
+    def create(self, title):
+        return Content.objects.create(
+            title=title,
+            content=f'<p>About {title}.</p>',
+            content_type='article',
+            author=self.user,
+            published=True,
+            review_status='approved'
+        )
+    
+    def url(self, article):
+        return reverse('app:article-detail', kwargs={'slug': article.slug})
+    
+    def test_second_view_served_from_cache_with_validators(self):
+        """Test that repeat views skip the view and revalidate with a 304"""
+        first = self.client.get(self.url(self.lake))
+        self.assertIn(f'content-{self.lake.pk}', first['Surrogate-Key'].split())
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url(self.lake))
+        self.assertEqual(second.content, first.content)
+        
+        response = self.client.get(self.url(self.lake), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+    
+    def test_edit_purges_only_affected_pages(self):
+        """Test that editing an article purges its page but not unrelated ones"""
+        self.client.get(self.url(self.lake))
+        self.client.get(self.url(self.peak))
+        
+        self.lake.content = '<p>Home of the floating phumdis.</p>'
+        self.lake.save()
+        self.assertContains(self.client.get(self.url(self.lake)), 'floating phumdis')
+        with self.assertNumQueries(0):
+            self.client.get(self.url(self.peak))
+    
+    def test_authenticated_users_bypass_cache(self):
+        """Test that signed-in readers always get a freshly rendered page"""
+        self.client.get(self.url(self.lake))
+        self.client.login(username='writer', password='testpass123')
+        response = self.client.get(self.url(self.lake))
+        self.assertNotIn('ETag', response)
+
+
+class SeoBundleTestCase(TestCase):
+    """Test cases for the precomputed SEO metadata bundle"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='writer', password='testpass123')
+        self.state = State.objects.create(name='Manipur', slug='manipur', description='Manipur', capital='Imphal')
+        self.article = Content.objects.create(
+            title='Loktak Lake',
+            content='<p>A lake near Imphal with floating phumdis.</p>',
+            content_type='article',
+            author=self.user,
+            published=True,
+            review_status='approved'
+        )
+        self.article.states.add(self.state)
+    
+    def test_built_on_save_and_link_change(self):
+        """Test that saves and new links rebuild the stored bundle"""
+        from .seo_bundle import SEO_BUNDLE_VERSION
+        
+        self.article.refresh_from_db()
+        bundle = self.article.seo_bundle
+        self.assertEqual(bundle['version'], SEO_BUNDLE_VERSION)
+        self.assertEqual(bundle['reading_time'], 1)
+        self.assertEqual(bundle['mentions']['places'], ['Imphal'])
+        self.assertIn('Manipur culture', bundle['keywords'])
+        
+        self.article.tags.add(Tag.objects.create(name='Wetlands', slug='wetlands'))
+        self.article.refresh_from_db()
+        self.assertIn('Wetlands', self.article.seo_bundle['keywords'])
+    
+    def test_template_tags_read_bundle(self):
+        """Test that the SEO tags need no queries once the bundle is stored"""
+        from .templatetags.schema_tags import generate_content_keywords, get_optimized_article_title
+        from .templatetags.social_media_tags import article_social_description
+        
+        article = Content.objects.get(pk=self.article.pk)
+        with self.assertNumQueries(0):
+            self.assertIn('Manipur', get_optimized_article_title(article))
+            self.assertIn('from Manipur', article_social_description(article, 200))
+            self.assertIn('Imphal', generate_content_keywords(article))
+    
+    def test_rename_clears_bundles_until_rebuilt(self):
+        """Test that renamed states drop bundles and the command rebuilds them"""
+        from io import StringIO
+        from django.core.management import call_command
+        
+        self.state.name = 'Kangleipak'
+        self.state.save()
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.seo_bundle, {})
+        
+        call_command('build_seo_bundles', '--only-missing', stdout=StringIO())
+        self.article.refresh_from_db()
+        self.assertIn('Kangleipak', self.article.seo_bundle['keywords'])
+    
+    def test_reverse_clear_and_delete_drop_removed_names(self):
+        """Test that clearing a tag's articles or deleting a state updates their bundles"""
+        tag = Tag.objects.create(name='Wetlands', slug='wetlands')
+        self.article.tags.add(tag)
+        
+        tag.content_items.clear()
+        self.article.refresh_from_db()
+        self.assertNotIn('Wetlands', self.article.seo_bundle['keywords'])
+        
+        self.state.delete()
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.seo_bundle, {})
+
+
+class CanonicalPathTestCase(TestCase):
+    """Test cases for stored primary categories, states and canonical paths"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='writer', password='testpass123')
+        self.festivals = Category.objects.create(name='Festivals', slug='festivals', description='Festivals')
+        self.places = Category.objects.create(name='Places', slug='places', description='Places')
+        self.state = State.objects.create(name='Nagaland', slug='nagaland', description='Nagaland', capital='Kohima')
+        self.article = Content.objects.create(
+            title='Hornbill Festival',
+            content='<p>Held every December.</p>',
+            content_type='article',
+            author=self.user,
+            published=True,
+            review_status='approved'
+        )
+    
+    def test_path_follows_primary_links(self):
+        """Test that URLs come from the stored path and primaries stay put"""
+        self.assertEqual(self.article.get_absolute_url(), '/wiki/hornbill-festival/')
+        self.article.categories.add(self.festivals)
+        self.article.states.add(self.state)
+        self.article.categories.add(self.places)
+        
+        article = Content.objects.get(pk=self.article.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(article.get_absolute_url(), '/festivals/nagaland/hornbill-festival/')
+        self.assertEqual(article.primary_category, self.festivals)
+        
+        self.article.categories.remove(self.festivals)
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.canonical_path, '/places/nagaland/hornbill-festival/')
+        self.state.content_items.clear()
+        self.article.refresh_from_db()
+        self.assertIsNone(self.article.primary_state)
+        self.assertEqual(self.article.canonical_path, '/wiki/hornbill-festival/')
+    
+    def test_slug_and_taxonomy_changes_rewrite_paths(self):
+        """Test that slug edits and deleted categories update stored paths"""
+        self.article.categories.add(self.festivals)
+        self.article.states.add(self.state)
+        
+        self.state.slug = 'nagaland-state'
+        self.state.save()
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.canonical_path, '/festivals/nagaland-state/hornbill-festival/')
+        
+        self.article.slug = 'hornbill'
+        self.article.save(update_fields=['slug'])
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.canonical_path, '/festivals/nagaland-state/hornbill/')
+        
+        self.festivals.delete()
+        self.article.refresh_from_db()
+        self.assertIsNone(self.article.primary_category)
+        self.assertEqual(self.article.canonical_path, '/wiki/hornbill/')
+    
+    def test_backfill(self):
+        """Test that the backfill picks the first category in tree order and the first state"""
+        from .canonical import backfill
+        
+        self.article.categories.add(self.places, self.festivals)
+        self.article.states.add(self.state)
+        Content.objects.filter(pk=self.article.pk).update(
+            primary_category=None, primary_state=None, canonical_path=''
+        )
+        
+        self.assertEqual(backfill(batch_size=1), 1)
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.primary_category, self.festivals)
+        self.assertEqual(self.article.get_absolute_url(), '/festivals/nagaland/hornbill-festival/')
+    
+    def test_sitemap_and_command_handle_empty_paths(self):
+        """Test that sitemap entries without a stored path need no extra queries"""
+        from io import StringIO
+        from django.core.management import call_command
+        from .sitemaps import ArticleSitemap
+    
+        self.article.categories.add(self.festivals)
+        self.article.states.add(self.state)
+        Content.objects.filter(pk=self.article.pk).update(canonical_path='')
+    
+        with self.assertNumQueries(1):
+            locations = [ArticleSitemap().location(item) for item in ArticleSitemap().items()]
+        self.assertEqual(locations, ['/festivals/nagaland/hornbill-festival/'])
+    
+        out = StringIO()
+        call_command('refresh_canonical_paths', stdout=out)
+        self.assertIn('1 canonical paths refreshed', out.getvalue())
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.canonical_path, '/festivals/nagaland/hornbill-festival/')
+
+
+class SlugRedirectTestCase(TestCase):
+    """Test cases for slug history and the in-memory redirect map"""
+    
+    def setUp(self):
+        from .redirects import redirect_map
+        
+        self.client = Client()
+        self.user = User.objects.create_user(username='writer', password='testpass123')
+        self.article = Content.objects.create(
+            title='Ziro Valley',
+            slug='ziro-valley',
+            content='<p>Home of the Apatani.</p>',
+            content_type='article',
+            author=self.user,
+            published=True,
+            review_status='approved'
+        )
+        redirect_map.invalidate()
+    
+    def test_rename_records_history(self):
+        """Test that renaming a slug records the former slug and path"""
+        self.article.slug = 'ziro'
+        self.article.save()
+        
+        history = SlugHistory.objects.get(content=self.article)
+        self.assertEqual(history.old_slug, 'ziro-valley')
+        self.assertEqual(history.old_path, '/wiki/ziro-valley/')
+        
+        # Saves that keep the slug record nothing
+        self.article.title = 'Ziro'
+        self.article.save()
+        self.assertEqual(SlugHistory.objects.count(), 1)
+    
+    def test_former_and_legacy_urls_redirect(self):
+        """Test that former and /articles/ URLs get a 301 without queries"""
+        from .redirects import redirect_map
+        
+        self.article.slug = 'ziro'
+        self.article.save()
+        redirect_map.article_path('ziro')
+        
+        with self.assertNumQueries(0):
+            response = self.client.get('/wiki/ziro-valley/?ref=home')
+        self.assertEqual(response.status_code, 301)
+        self.assertEqual(response['Location'], '/wiki/ziro/?ref=home')
+        
+        with self.assertNumQueries(0):
+            response = self.client.get('/articles/ziro-valley/')
+        self.assertEqual(response['Location'], '/wiki/ziro/')
+        self.assertEqual(self.client.get('/articles/ziro/')['Location'], '/wiki/ziro/')
+    
+    def test_reclaimed_slug_is_released(self):
+        """Test that a new article using a former slug takes its URL back"""
+        self.article.slug = 'ziro'
+        self.article.save()
+        
+        Content.objects.create(
+            title='Ziro Valley',
+            slug='ziro-valley',
+            content='<p>A newer article.</p>',
+            content_type='article',
+            author=self.user,
+            published=True,
+            review_status='approved'
+        )
+        self.assertFalse(SlugHistory.objects.exists())
+        self.assertEqual(self.client.get('/wiki/ziro-valley/').status_code, 200)
+    
+    def test_only_redirect_changes_invalidate_the_map(self):
+        """Test that body edits keep the redirect map and renames rebuild it"""
+        from .caching import get_version
+        from .redirects import VERSION_NAME
+        
+        version = get_version(VERSION_NAME)
+        self.article.content = '<p>Home of the Apatani and their rice fields.</p>'
+        self.article.save()
+        self.assertEqual(get_version(VERSION_NAME), version)
+        
+        self.article.slug = 'ziro'
+        self.article.save()
+        self.assertNotEqual(get_version(VERSION_NAME), version)
+
+
+@modify_settings(MIDDLEWARE={'remove': 'app.middleware.PageCacheMiddleware'})
+class ConditionalGetTestCase(TestCase):
+    """Test cases for ETag and Last-Modified validators on read views"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        
+        cache.clear()
+        self.user = User.objects.create_user(username='writer', password='testpass123')
+        self.tag = Tag.objects.create(name='Weaving', slug='weaving')
+        self.article = Content.objects.create(
+            title='Loin Loom',
+            content='<p>Weaving on a backstrap loom.</p>',
+            content_type='article',
+            author=self.user,
+            published=True,
+            review_status='approved'
+        )
+        self.article.tags.add(self.tag)
+    
+    def test_unchanged_page_gets_304_without_queries(self):
+        """Test that a matching validator skips the view entirely"""
+        url = reverse('app:article-tag', kwargs={'slug': 'weaving'})
+        first = self.client.get(url)
+        self.assertTrue(first['ETag'].startswith('W/'))
+        
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], first['ETag'])
+        
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+    
+    def test_changes_and_sort_order_change_validators(self):
+        """Test that edits and popularity flushes produce new validators"""
+        from .popularity import flush_views, record_view
+        
+        url = reverse('app:article-tag', kwargs={'slug': 'weaving'})
+        etag = self.client.get(url)['ETag']
+        popular_etag = self.client.get(url, {'sort': 'popular'})['ETag']
+        self.assertNotEqual(etag, popular_etag)
+        
+        record_view(self.article.pk)
+        flush_views()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(url, {'sort': 'popular'}, HTTP_IF_NONE_MATCH=popular_etag).status_code, 200)
+        
+        self.article.title = 'Loin Loom Weaving'
+        self.article.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+    
+    def test_revalidated_article_counts_a_view(self):
+        """Test that a 304 for an article still counts the view"""
+        from django.core.cache import cache
+        from .popularity import flush_views, pending_views
+        
+        flush_views()
+        url = self.article.get_absolute_url()
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(pending_views().get(self.article.pk), 1)
+        
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(pending_views().get(self.article.pk), 2)
+        
+        # Without the remembered article, the view runs and counts itself
+        cache.delete(f'validator-view:{etag}')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(pending_views().get(self.article.pk), 3)
+    
+    def test_signed_in_and_static_pages(self):
+        """Test that signed-in readers are not validated and robots.txt is"""
+        robots = self.client.get(reverse('app:robots-txt'))
+        self.assertEqual(
+            self.client.get(reverse('app:robots-txt'), HTTP_IF_NONE_MATCH=robots['ETag']).status_code, 304
+        )
+        
+        self.client.login(username='writer', password='testpass123')
+        response = self.client.get(self.article.get_absolute_url(), HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class RevisionStorageTestCase(TestCase):
+    """Test cases for delta-compressed revision bodies"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='writer', password='testpass123')
+        self.article = Content.objects.create(
+            title='Majuli',
+            slug='majuli',
+            content='<p>A river island.</p>',
+            content_type='article',
+            author=self.user,
+            published=True,
+            review_status='approved'
+        )
+        self.paragraphs = [f'<p>Paragraph {n} about the satras and mask making of the island.</p>' for n in range(20)]
+    
+    def revise(self, number, status='approved'):
+        from .models import ContentRevision
+        
+        paragraphs = list(self.paragraphs)
+        paragraphs[number % 20] = f'<p>Edit number {number} of the island.</p>'
+        return ContentRevision.objects.create(
+            content=self.article,
+            editor=self.user,
+            title='Majuli',
+            content_text=''.join(paragraphs),
+            status=status,
+        )
+    
+    def test_settled_revisions_store_deltas(self):
+        """Test that approved revisions are deltas that read back exactly while drafts stay full"""
+        from .models import ContentRevision
+        
+        first, second = self.revise(1), self.revise(2)
+        draft = self.revise(3, status='draft')
+        stored = ContentRevision.objects.get(pk=second.pk)
+        self.assertEqual(stored.body, '')
+        self.assertEqual(stored.delta_base_id, first.pk)
+        self.assertEqual(stored.content_text, second.content_text)
+        self.assertEqual(ContentRevision.objects.get(pk=draft.pk).body, draft.content_text)
+        
+        # Approving a draft encodes it against the latest approved revision
+        draft.status = 'approved'
+        draft.save(update_fields=['status'])
+        stored = ContentRevision.objects.get(pk=draft.pk)
+        self.assertEqual(stored.delta_base_id, second.pk)
+        self.assertEqual(stored.content_text, draft.content_text)
+    
+    def test_chain_read_in_one_query_and_large_bodies_kept_full(self):
+        """Test that a deep delta is rebuilt from one query and oversized bodies are keyframes"""
+        from unittest import mock
+        from .models import ContentRevision
+        
+        revisions = [self.revise(number) for number in range(4)]
+        stored = ContentRevision.objects.get(pk=revisions[-1].pk)
+        self.assertEqual(stored.delta_depth, 3)
+        with self.assertNumQueries(1):
+            self.assertEqual(stored.content_text, revisions[-1].content_text)
+        
+        with mock.patch('app.revision_storage.MAX_DELTA_BLOCKS', 10):
+            large = self.revise(5)
+        self.assertIsNone(ContentRevision.objects.get(pk=large.pk).body_delta)
+    
+    def test_keyframes_and_changed_bases(self):
+        """Test that chains are cut by keyframes and survive their base changing or going"""
+        from .models import ContentRevision
+        from .revision_storage import KEYFRAME_INTERVAL
+        
+        revisions = [self.revise(number) for number in range(KEYFRAME_INTERVAL + 1)]
+        depths = [ContentRevision.objects.get(pk=revision.pk).delta_depth for revision in revisions]
+        self.assertEqual(depths, [*range(KEYFRAME_INTERVAL), 0])
+        
+        base, dependent = revisions[1], revisions[2]
+        base.content_text = '<p>Rewritten.</p>'
+        base.save()
+        self.assertEqual(ContentRevision.objects.get(pk=dependent.pk).content_text, dependent.content_text)
+        revisions[3].delete()
+        self.assertEqual(ContentRevision.objects.get(pk=revisions[4].pk).content_text, revisions[4].content_text)
+    
+    def test_status_changes_keep_chains_bounded(self):
+        """Test that re-encoding a base on a status change does not leave deeper chains behind"""
+        from .models import ContentRevision
+        
+        first = self.revise(0, status='draft')
+        keyframe, dependent = self.revise(1), self.revise(2)
+        first.status = 'approved'
+        first.save()
+        
+        # The keyframe becomes a delta on the first revision
+        keyframe.status = 'rejected'
+        keyframe.save()
+        self.assertEqual(ContentRevision.objects.get(pk=keyframe.pk).delta_base_id, first.pk)
+        for revision in ContentRevision.objects.select_related('delta_base'):
+            if revision.delta_base_id:
+                self.assertEqual(revision.delta_depth, revision.delta_base.delta_depth + 1)
+        self.assertEqual(ContentRevision.objects.get(pk=dependent.pk).content_text, dependent.content_text)
+        
+        stale = ContentRevision.objects.get(pk=dependent.pk)
+        stale.content_text
+        changed = ContentRevision.objects.get(pk=dependent.pk)
+        changed.content_text = '<p>Changed.</p>'
+        changed.save()
+        stale.refresh_from_db()
+        self.assertEqual(stale.content_text, '<p>Changed.</p>')
+    
+    def test_compact_command_converts_full_rows(self):
+        """Test that the command re-encodes full rows and reports the saving"""
+        from io import StringIO
+        from django.core.management import call_command
+        from .models import ContentRevision
+        
+        revisions = [self.revise(number) for number in range(4)]
+        ContentRevision.objects.update(body_delta=None, delta_base=None, delta_depth=0)
+        for revision in revisions:
+            ContentRevision.objects.filter(pk=revision.pk).update(body=revision.content_text)
+        
+        out = StringIO()
+        call_command('compact_revisions', stdout=out)
+        self.assertIn('3 revisions re-encoded', out.getvalue())
+        for revision in revisions:
+            self.assertEqual(ContentRevision.objects.get(pk=revision.pk).content_text, revision.content_text)
+        self.assertEqual(ContentRevision.objects.filter(body_delta__isnull=False).count(), 3)
+
+
+class TitleTypeaheadTestCase(TestCase):
+    """Test cases for the in-memory title typeahead"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='typist', password='testpass123')
+        self.festival = Content.objects.create(
+            title='Hornbill Festival',
+            content='<p>Kohima</p>',
+            content_type='article',
+            author=self.user,
+            published=True,
+            review_status='approved',
+        )
+    
+    def test_prefix_lookup_uses_no_queries(self):
+        """Test that title prefixes are answered from memory once built"""
+        from .typeahead import title_prefix_search
+        
+        self.assertEqual([entry.pk for entry in title_prefix_search('horn')], [self.festival.pk])
+        with self.assertNumQueries(0):
+            results = title_prefix_search('Fest')
+        self.assertEqual([entry.slug for entry in results], ['hornbill-festival'])
+    
+    def test_index_rebuilds_after_save(self):
+        """Test that new and unpublished articles are picked up after a save"""
+        from .typeahead import title_prefix_search
+        
+        self.assertEqual(title_prefix_search('sangai'), [])
+        Content.objects.create(
+            title='Sangai Festival',
+            content='<p>Manipur</p>',
+            content_type='article',
+            author=self.user,
+            published=True,
+            review_status='approved',
+        )
+        self.assertEqual([entry.title for entry in title_prefix_search('sangai')], ['Sangai Festival'])
+        
+        self.festival.published = False
+        self.festival.save()
+        self.assertEqual([entry.title for entry in title_prefix_search('festival')], ['Sangai Festival'])
+
+
+class SearchSuggestionTestCase(TestCase):
+    """Test cases for "did you mean" suggestions"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='speller', password='testpass123')
+        State.objects.create(name='Meghalaya', slug='meghalaya', description='Abode of clouds', capital='Shillong')
+        Content.objects.create(
+            title='Chapchar Kut',
+            content='<p>A spring festival of Mizoram.</p>',
+            content_type='article',
+            author=self.user,
+            published=True,
+            review_status='approved',
+        )
+    
+    def test_misspellings_are_suggested(self):
+        """Test that close misspellings of titles and names are suggested"""
+        from .suggestions import get_suggestions
+        
+        self.assertEqual(get_suggestions('Megalaya')[0].text, 'Meghalaya')
+        self.assertEqual(get_suggestions('chapcar kut')[0].text, 'Chapchar Kut')
+        self.assertEqual(get_suggestions('zzzz'), [])
+    
+    def test_search_page_shows_suggestions_when_empty(self):
+        """Test that article_search offers suggestions for empty results"""
+        response = self.client.get(reverse('app:article-search'), {'q': 'Megalaya'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Did you mean')
+        self.assertContains(response, '?q=Meghalaya')
+
+
+class FacetCountTestCase(TestCase):
+    """Test cases for faceted category/state/tag counts"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='faceter', password='testpass123')
+        self.culture = Category.objects.create(name='Culture', slug='culture')
+        self.food = Category.objects.create(name='Food', slug='food')
+        self.nagaland = State.objects.create(name='Nagaland', slug='nagaland', description='', capital='Kohima')
+        self.festival_tag = Tag.objects.create(name='Festival', slug='festival')
+        
+        for index in range(3):
+            article = Content.objects.create(
+                title=f'Article {index}',
+                content='<p>Body</p>',
+                content_type='article',
+                author=self.user,
+                published=True,
+                review_status='approved',
+            )
+            article.categories.add(self.culture)
+            if index == 0:
+                article.categories.add(self.food)
+                article.states.add(self.nagaland)
+                article.tags.add(self.festival_tag)
+    
+    def test_counts_in_single_query(self):
+        """Test that all facet groups are counted with one query"""
+        from .facets import compute_facets
+        
+        with self.assertNumQueries(1):
+            facets = compute_facets(Content.objects.filter(published=True))
+        
+        self.assertEqual([(f.slug, f.count) for f in facets['categories']], [('culture', 3), ('food', 1)])
+        self.assertEqual([(f.slug, f.count) for f in facets['states']], [('nagaland', 1)])
+        self.assertEqual([(f.slug, f.count) for f in facets['tags']], [('festival', 1)])
+    
+    def test_facets_are_cached_by_signature(self):
+        """Test that equivalent filters share a cache entry until content changes"""
+        from .facets import filter_signature, get_facets
+        
+        queryset = Content.objects.filter(categories=self.food)
+        self.assertEqual(filter_signature(q='Hornbill', tag=''), filter_signature(q='hornbill'))
+        
+        get_facets(queryset, filter_signature(category='food'))
+        with self.assertNumQueries(0):
+            get_facets(queryset, filter_signature(category='food'))
+        
+        Content.objects.get(title='Article 1').categories.add(self.food)
+        facets = get_facets(queryset, filter_signature(category='food'))
+        self.assertEqual(facets['categories'][0].count, 2)
+
+
+class CursorPaginationTestCase(TestCase):
+    """Test cases for keyset (cursor) pagination"""
+    
+    def setUp(self):
+        from django.utils import timezone
+        
+        self.user = User.objects.create_user(username='pager', password='testpass123')
+        now = timezone.now()
+        # One more than a page of the article list
+        for index in range(13):
+            article = Content.objects.create(
+                title=f'Paged Article {index}',
+                content='<p>Body</p>',
+                content_type='article',
+                author=self.user,
+                published=True,
+                review_status='approved',
+            )
+            # Two articles share a timestamp to exercise the id tie-breaker
+            Content.objects.filter(pk=article.pk).update(
+                published_at=now - timezone.timedelta(minutes=min(index, 5))
+            )
+    
+    def test_walks_forward_and_back(self):
+        """Test that next/previous cursors cover every row exactly once"""
+        from .pagination import CursorPaginator, PUBLISHED_ORDERING
+        
+        queryset = Content.objects.order_by(*PUBLISHED_ORDERING)
+        expected = list(queryset.values_list('pk', flat=True))
+        paginator = CursorPaginator(queryset, 3)
+        
+        seen = []
+        pages = []
+        page = paginator.get_page()
+        while True:
+            pages.append([obj.pk for obj in page])
+            seen.extend(pages[-1])
+            if not page.has_next():
+                break
+            page = paginator.get_page(page.next_cursor)
+        self.assertEqual(seen, expected)
+        self.assertFalse(paginator.get_page().has_previous())
+        
+        previous = paginator.get_page(page.previous_cursor)
+        self.assertEqual([obj.pk for obj in previous], pages[-2])
+    
+    def test_invalid_cursor_returns_first_page(self):
+        """Test that tampered cursors fall back to the first page"""
+        from .pagination import CursorPaginator, PUBLISHED_ORDERING
+        
+        paginator = CursorPaginator(Content.objects.order_by(*PUBLISHED_ORDERING), 3)
+        self.assertEqual(list(paginator.get_page('not-a-cursor')), list(paginator.get_page()))
+    
+    def test_article_list_uses_cursors(self):
+        """Test that the article list links to the next page with a cursor"""
+        response = self.client.get(reverse('app:article-list'))
+        self.assertEqual(response.status_code, 200)
+        page_obj = response.context['page_obj']
+        self.assertTrue(page_obj.has_next())
+        self.assertContains(response, '?cursor=')
+        
+        response = self.client.get(reverse('app:article-list'), {'cursor': page_obj.next_cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['page_obj'].has_previous())
+
+
+class SearchResultCacheTestCase(TestCase):
+    """Test cases for the search result id cache"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        
+        cache.clear()
+        self.user = User.objects.create_user(username='cacher', password='testpass123')
+        self.article = Content.objects.create(
+            title='Bihu Dance',
+            content='<p>The folk dance of Assam.</p>',
+            content_type='article',
+            author=self.user,
+            published=True,
+            review_status='approved',
+        )
+    
+    def test_repeat_query_is_served_from_cache(self):
+        """Test that a repeated query hits the cache and skips the search"""
+        from .search_cache import cached_search_page, get_stats
+        
+        base = Content.objects.filter(published=True)
+        first = cached_search_page(base, 'bihu', 12)
+        with self.assertNumQueries(1):
+            second = cached_search_page(base, 'Bihu', 12)
+        
+        self.assertEqual(list(first), list(second))
+        self.assertEqual(get_stats()['hits'], 1)
+        self.assertEqual(get_stats()['misses'], 1)
+    
+    def test_publish_changes_invalidate_entries(self):
+        """Test that unpublishing an article bumps the generation and misses"""
+        from .search_cache import cached_search_page, get_stats
+        
+        base = Content.objects.filter(published=True)
+        self.assertEqual(len(cached_search_page(base, 'bihu', 12)), 1)
+        
+        self.article.published = False
+        self.article.save()
+        self.assertEqual(len(cached_search_page(Content.objects.filter(published=True), 'bihu', 12)), 0)
+        self.assertEqual(get_stats()['misses'], 2)
+
+
+class SearchBenchmarkCommandTestCase(TestCase):
+    """Test cases for the corpus generator and benchmark commands"""
+    
+    def test_corpus_is_reproducible_and_benchmarkable(self):
+        """Test that the same seed yields the same corpus and the benchmark runs"""
+        import json
+        from io import StringIO
+        from django.core.management import call_command
+        
+        call_command('generate_search_corpus', count=20, seed=7, batch_size=8, stdout=StringIO())
+        first = list(Content.objects.order_by('slug').values_list('slug', 'content'))
+        self.assertEqual(len(first), 20)
+        self.assertTrue(Content.objects.filter(categories__isnull=False).exists())
+        
+        call_command('generate_search_corpus', count=20, seed=7, clear=True, stdout=StringIO())
+        self.assertEqual(list(Content.objects.order_by('slug').values_list('slug', 'content')), first)
+        
+        output = StringIO()
+        call_command('benchmark_search', requests=3, json=True, stdout=output)
+        results = json.loads(output.getvalue())
+        self.assertEqual(set(results), {'article_search', 'article_list', 'article_search_htmx'})
+        self.assertLessEqual(results['article_search']['p50_ms'], results['article_search']['p99_ms'])
+    
+    def test_corpus_gets_the_derived_columns(self):
+        """Test that bulk-created articles are classified, routed, bundled and related"""
+        from io import StringIO
+        from django.core.management import call_command
+        from .models import RelatedContent
+    
+        call_command('generate_search_corpus', count=10, seed=7, stdout=StringIO())
+        articles = Content.objects.all()
+        self.assertFalse(articles.filter(detected_type='').exists())
+        self.assertFalse(articles.filter(primary_category__isnull=True).exists())
+        self.assertFalse(articles.filter(canonical_path='').exists())
+        self.assertFalse(articles.filter(seo_bundle={}).exists())
+        self.assertTrue(RelatedContent.objects.exists())
@@ -0,0 +1,131 @@
+"""
+In-memory title typeahead for the live search box
+
+Titles of published, approved articles are normalized and kept in a sorted
+array together with every word-start suffix ("hornbill festival" is also
+stored as "festival"), so a title-prefix lookup is a bisect plus a short
+scan and never touches the database. The index is rebuilt lazily whenever
+the ``typeahead`` version stamp is bumped by the Content signals.
+"""
+import re
+import heapq
+import threading
+import unicodedata
+from bisect import bisect_left
+
+from .caching import get_version
+
+VERSION_NAME = 'typeahead'
+
+_NON_WORD_RE = re.compile(r'[\W_]+', re.UNICODE)
+
+
+def normalize(text):
+    """Lowercase, strip accents and collapse punctuation to single spaces"""
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return _NON_WORD_RE.sub(' ', text.lower()).strip()
+
+
+class TypeaheadEntry:
+    """Lightweight stand-in for a Content row in the search results partial"""
+    __slots__ = ('pk', 'title', 'slug', 'excerpt', 'featured_image')
+
+    # The partial only falls back to the body when there is no excerpt
+    content = ''
+    search_snippet = None
+
+    def __init__(self, pk, title, slug, excerpt, featured_image):
+        self.pk = pk
+        self.title = title
+        self.slug = slug
+        self.excerpt = excerpt
+        self.featured_image = featured_image
+
+    @property
+    def id(self):
+        return self.pk
+
+
+class TitlePrefixIndex:
+    """
+    Sorted-array prefix index over normalized article titles
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._data = ([], [], {})
+
+    def _load(self):
+        from .models import Content
+
+        image_field = Content._meta.get_field('featured_image')
+        rows = (
+            Content.objects
+            .filter(published=True, review_status='approved')
+            .order_by('-published_at', '-created_at')
+            .values_list('pk', 'title', 'slug', 'excerpt', 'featured_image')
+        )
+
+        postings = []
+        entries = {}
+        for rank, (pk, title, slug, excerpt, image) in enumerate(rows):
+            image = image_field.attr_class(None, image_field, image) if image else None
+            entries[pk] = TypeaheadEntry(pk, title, slug, excerpt, image)
+
+            words = normalize(title).split()
+            for position in range(len(words)):
+                # Whole-title matches sort ahead of mid-title word matches
+                postings.append((' '.join(words[position:]), position > 0, rank, pk))
+
+        postings.sort()
+        keys = [posting[0] for posting in postings]
+        ranks = [(posting[1], posting[2], posting[3]) for posting in postings]
+        return keys, ranks, entries
+
+    def _ensure_current(self):
+        version = get_version(VERSION_NAME)
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            self._data = self._load()
+            self._version = version
+
+    def lookup(self, query, limit=10):
+        """Return up to ``limit`` entries whose title has a word starting with ``query``"""
+        prefix = normalize(query)
+        if not prefix:
+            return []
+
+        self._ensure_current()
+        keys, ranks, entries = self._data
+
+        # Keys are sorted alphabetically, so re-rank the matching slice by
+        # whole-title match first and then recency
+        start = bisect_left(keys, prefix)
+        end = bisect_left(keys, prefix + '\U0010ffff', lo=start)
+        best = {}
+        for is_mid_title, rank, pk in ranks[start:end]:
+            current = best.get(pk)
+            if current is None or (is_mid_title, rank) < current:
+                best[pk] = (is_mid_title, rank)
+
+        matches = heapq.nsmallest(limit, best.items(), key=lambda item: item[1])
+        return [entries[pk] for pk, _ in matches]
+
+    def invalidate(self):
+        """Force a rebuild on the next lookup in this process"""
+        self._version = None
+
+
+title_index = TitlePrefixIndex()
+
+
+def title_prefix_search(query, limit=10):
+    """Title-prefix matches for the typeahead, served from memory"""
+    return title_index.lookup(query, limit=limit)
@@ -74,4 +74,8 @@ urlpatterns = [
     path('states/<slug:state_slug>/', views.state_detail, name='state-detail'),
     path('states/<slug:state_slug>/culture/', views.state_category_articles, {'category_slug': 'culture'}, name='state-culture-articles'),
     path('states/<slug:state_slug>/places/', views.state_category_articles, {'category_slug': 'places'}, name='state-places-articles'),
+    path('states/<slug:state_slug>/personalities/', views.state_category_articles, {'category_slug': 'personalities'}, name='state-personalities'),
+    path('states/<slug:state_slug>/festivals/', views.state_category_articles, {'category_slug': 'festivals'}, name='state-festivals-articles'),
+    path('states/<slug:state_slug>/heritage/', views.state_category_articles, {'category_slug': 'heritage'}, name='state-heritage-articles'),
+    path('states/<slug:state_slug>/<slug:category_slug>/', views.state_category_articles, name='state-category-articles'),
 ]
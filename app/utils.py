@@ -228,181 +228,22 @@ def is_secure_connection(request):
 
 def get_enhanced_related_articles(article, limit=6):
     """
-    Get related articles using a sophisticated algorithm that prioritizes:
+    Get related articles, ranked by:
     1. Articles from the same state(s)  
     2. Articles of the same content type (Person, Cultural, Event, Place)
     3. Articles sharing categories
     4. Articles sharing tags
     5. Regional connections (Northeast India focus)
     
-    Returns articles with scores for better relevance ranking.
+    Scores are precomputed by `manage.py refresh_related_content`, see
+    app/related.py, so this is a single query.
     """
-    from .models import Content
-    from .templatetags.schema_tags import detect_content_type
+    from .related import related_articles
     
     if not article.published or article.review_status != 'approved':
         return []
     
-    # Get base queryset of published, approved articles excluding current article
-    base_queryset = Content.objects.filter(
-        content_type='article',
-        published=True, 
-        review_status='approved'
-    ).exclude(id=article.id)
-    
-    # Get article metadata for scoring
-    article_states = list(article.states.all())
-    article_categories = list(article.categories.all())
-    article_tags = list(article.tags.all())
-    article_content_type = detect_content_type(article)
-    
-    scored_articles = []
-    
-    # Evaluate each potential related article
-    for candidate in base_queryset.select_related('author').prefetch_related(
-        'states', 'categories', 'tags'
-    ):
-        score = 0
-        reasons = []
-        
-        # 1. Same state bonus (highest priority for Northeast India wiki)
-        candidate_states = list(candidate.states.all())
-        shared_states = set(s.id for s in article_states) & set(s.id for s in candidate_states)
-        if shared_states:
-            state_score = len(shared_states) * 50  # High score for state matches
-            score += state_score
-            state_names = [s.name for s in article_states if s.id in shared_states]
-            reasons.append(f"Same region: {', '.join(state_names)}")
-        
-        # 2. Same content type bonus (connects personalities to personalities, etc.)
-        candidate_content_type = detect_content_type(candidate)
-        if candidate_content_type == article_content_type and candidate_content_type != 'Article':
-            score += 30
-            reasons.append(f"Same type: {candidate_content_type}")
-        
-        # 3. Shared categories (strong thematic connection)
-        candidate_categories = list(candidate.categories.all())
-        shared_categories = set(c.id for c in article_categories) & set(c.id for c in candidate_categories)
-        if shared_categories:
-            category_score = len(shared_categories) * 20
-            score += category_score
-            category_names = [c.name for c in article_categories if c.id in shared_categories]
-            reasons.append(f"Similar topics: {', '.join(category_names)}")
-        
-        # 4. Shared tags (moderate thematic connection)
-        candidate_tags = list(candidate.tags.all())
-        shared_tags = set(t.id for t in article_tags) & set(t.id for t in candidate_tags)
-        if shared_tags:
-            tag_score = len(shared_tags) * 10
-            score += tag_score
-            if len(shared_tags) <= 3:  # Only show tag names if not too many
-                tag_names = [t.name for t in article_tags if t.id in shared_tags]
-                reasons.append(f"Related: {', '.join(tag_names)}")
-        
-        # 5. Special Northeast India content bonuses
-        score += _calculate_regional_connection_bonus(article, candidate)
-        
-        # 6. Recency bonus (slight preference for newer content)
-        import datetime
-        if candidate.published_at and candidate.published_at > (
-            datetime.datetime.now() - datetime.timedelta(days=365)
-        ).replace(tzinfo=candidate.published_at.tzinfo):
-            score += 5
-            reasons.append("Recent")
-        
-        # Only include articles with meaningful connections
-        if score > 0:
-            scored_articles.append({
-                'article': candidate,
-                'score': score,
-                'reasons': reasons,
-                'shared_states': len(shared_states) if shared_states else 0,
-                'content_type_match': candidate_content_type == article_content_type
-            })
-    
-    # Sort by score (highest first), then by publication date for ties
-    scored_articles.sort(key=lambda x: (-x['score'], -x['article'].published_at.timestamp() if x['article'].published_at else 0))
-    
-    # Return top articles, ensuring diversity
-    return _ensure_related_articles_diversity(scored_articles, limit)
-
-
-def _calculate_regional_connection_bonus(article, candidate):
-    """
-    Calculate bonus points for regional connections specific to Northeast India.
-    """
-    from .templatetags.schema_tags import detect_content_type
-    
-    bonus = 0
-    
-    # Personality to cultural/event connections
-    article_type = detect_content_type(article)
-    candidate_type = detect_content_type(candidate)
-    
-    # Cross-type connections that make sense for Northeast India content
-    meaningful_connections = {
-        ('Person', 'Cultural'): 15,  # Personalities connected to cultural practices
-        ('Person', 'Event'): 12,     # Personalities connected to festivals/events  
-        ('Cultural', 'Event'): 20,   # Cultural practices connected to festivals
-        ('Place', 'Cultural'): 18,   # Places connected to cultural practices
-        ('Place', 'Event'): 15,      # Places connected to festivals/events
-        ('Event', 'Cultural'): 20,   # Events connected to cultural practices
-    }
-    
-    connection_key = (article_type, candidate_type)
-    reverse_key = (candidate_type, article_type)
-    
-    if connection_key in meaningful_connections:
-        bonus += meaningful_connections[connection_key]
-    elif reverse_key in meaningful_connections:
-        bonus += meaningful_connections[reverse_key]
-    
-    return bonus
-
-
-def _ensure_related_articles_diversity(scored_articles, limit):
-    """
-    Ensure diversity in the final selection of related articles.
-    Prioritizes different content types and states for better user experience.
-    """
-    from .templatetags.schema_tags import detect_content_type
-    if len(scored_articles) <= limit:
-        return [item['article'] for item in scored_articles]
-    
-    final_articles = []
-    used_content_types = set()
-    used_states = set()
-    
-    # First pass: Pick highest scoring articles with unique content types and states
-    for item in scored_articles:
-        if len(final_articles) >= limit:
-            break
-            
-        article = item['article']
-        content_type = detect_content_type(article)
-        article_states = set(s.id for s in article.states.all())
-        
-        # Prefer articles with unique content types or states (up to limit/2)
-        if len(final_articles) < limit // 2:
-            if (content_type not in used_content_types or 
-                not article_states.intersection(used_states)):
-                final_articles.append(article)
-                used_content_types.add(content_type)
-                used_states.update(article_states)
-                continue
-        
-        # Second half: Add remaining highest-scoring articles regardless of diversity
-        if len(final_articles) >= limit // 2:
-            final_articles.append(article)
-    
-    # Fill remaining slots with top-scored articles if we're under the limit
-    for item in scored_articles:
-        if len(final_articles) >= limit:
-            break
-        if item['article'] not in final_articles:
-            final_articles.append(item['article'])
-    
-    return final_articles[:limit]
+    return related_articles(article, limit=limit)
 
 
 def get_contextual_links_data(article):
@@ -451,15 +292,8 @@ def get_contextual_links_data(article):
             review_status='approved'
         ).exclude(id=article.id)
         
-        # Filter to likely personality articles
-        personality_articles = []
-        for art in related_personalities[:10]:  # Check top 10 for efficiency
-            if detect_content_type(art) == 'Person':
-                personality_articles.append(art)
-                if len(personality_articles) >= 3:
-                    break
-        
-        data['related_personalities'] = personality_articles
+        # Filter to personality articles by their stored type
+        data['related_personalities'] = list(related_personalities.filter(detected_type='Person').distinct()[:3])
     
     # Cultural connections (festivals to traditions, arts to crafts, etc.)
     if content_type in ['Cultural', 'Event'] and article_categories:
@@ -471,15 +305,8 @@ def get_contextual_links_data(article):
             review_status='approved'
         ).exclude(id=article.id)
         
-        cultural_connections = []
-        for art in cultural_articles[:8]:
-            art_type = detect_content_type(art)
-            if art_type in ['Cultural', 'Event'] and art_type != content_type:
-                cultural_connections.append(art)
-                if len(cultural_connections) >= 3:
-                    break
-        
-        data['cultural_connections'] = cultural_connections
+        other_types = {'Cultural', 'Event'} - {content_type}
+        data['cultural_connections'] = list(cultural_articles.filter(detected_type__in=other_types).distinct()[:3])
     
     return data
 
@@ -489,7 +316,8 @@ def get_discover_more_suggestions(context_type, context_object, limit=5):
     Get discovery suggestions based on context (category page, tag page, etc.).
     Helps users discover related content they might not find otherwise.
     """
-    from .models import Content, Category, Tag
+    from .models import Content, Tag
+    from .category_tree import tree_neighbours
     from .templatetags.schema_tags import detect_content_type
     
     suggestions = []
@@ -498,22 +326,16 @@ def get_discover_more_suggestions(context_type, context_object, limit=5):
         category = context_object
         
         # Find related categories (parent/child relationships)
+        neighbours = tree_neighbours(category)
         related_categories = []
-        if category.parent:
-            related_categories.append(category.parent)
-            siblings = Category.objects.filter(parent=category.parent).exclude(id=category.id)[:3]
-            related_categories.extend(siblings)
+        if neighbours.parent:
+            related_categories.append(neighbours.parent)
+            related_categories.extend(neighbours.siblings[:3])
         else:
-            children = Category.objects.filter(parent=category)[:4]
-            related_categories.extend(children)
+            related_categories.extend(neighbours.children[:4])
         
         for related_cat in related_categories:
-            article_count = Content.objects.filter(
-                content_type='article',
-                categories=related_cat,
-                published=True,
-                review_status='approved'
-            ).count()
+            article_count = related_cat.published_count
             if article_count > 0:
                 suggestions.append({
                     'type': 'category',
@@ -538,16 +360,10 @@ def get_discover_more_suggestions(context_type, context_object, limit=5):
         ).exclude(id=tag.id).distinct()[:limit]
         
         for related_tag in related_tags:
-            article_count = Content.objects.filter(
-                content_type='article',
-                tags=related_tag,
-                published=True,
-                review_status='approved'
-            ).count()
             suggestions.append({
                 'type': 'tag',
                 'object': related_tag,
-                'article_count': article_count,
+                'article_count': related_tag.published_count,
                 'reason': 'Often mentioned together'
             })
     
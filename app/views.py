@@ -7,6 +7,7 @@ from django.contrib.auth.models import User
 from django.core.paginator import Paginator
 from django.db.models import Q
 from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
 from django.utils.text import slugify
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
@@ -24,6 +25,42 @@ from accounts.models import UserProfile
 # Create alias for backward compatibility since views use Article extensively
 Article = Content
 from .forms import ArticleForm
+from .search import search_content, search_revisions, highlight_results
+from .typeahead import title_prefix_search
+from .suggestions import get_suggestions
+from .facets import filter_signature, get_facets
+from .pagination import CursorPaginator, PUBLISHED_ORDERING
+from .search_cache import cached_search_page
+from .directory import DIRECTORY_CACHE_TIMEOUT, build_tag_cloud, directory_cache_version, get_category_directory
+from .popularity import POPULAR_ORDERING, is_countable, popular_articles, record_view
+from .popularity import VERSION_NAME as POPULARITY_VERSION
+from .caching import CONTENT_VERSION, TAXONOMY_VERSION
+from .conditional import conditional, stamps
+from .sampling import sample
+from .category_tree import subtree_articles, subtree_filter, tree_neighbours
+from .breakdowns import articles_by_state, category_counts_for_state, state_counts_for_category
+from .related import related_articles
+from .page_cache import (
+    LISTINGS_KEY, POPULAR_KEY, TAXONOMY_KEY, add_surrogate_keys, article_keys, category_key, content_key,
+    count_view, state_key, tag_key,
+)
+
+# robots.txt has no stamp, bump when editing its rules
+ROBOTS_TXT_REVISION = 1
+
+
+def listing_validator(request, *args, **kwargs):
+    """Validator of article listings, some sortable by popularity"""
+    names = [CONTENT_VERSION, TAXONOMY_VERSION]
+    if request.GET.get('sort') == 'popular':
+        names.append(POPULARITY_VERSION)
+    return stamps(*names)
+
+
+def landing_validator(request, *args, **kwargs):
+    """Validator of landing pages, built from published articles and taxonomy names"""
+    return stamps(CONTENT_VERSION, TAXONOMY_VERSION)
+
 
 # Notification utility functions
 def create_notification(user, notification_type, message, content_type='', object_id=None):
@@ -72,14 +109,19 @@ def home(request):
         profile__isnull=False
     ).select_related('profile').order_by('-date_joined')[:5]
     
+    # Trending articles by decayed page views
+    trending_articles = popular_articles(limit=5)
+    
     context = {
         'latest_articles': latest_articles,
+        'trending_articles': trending_articles,
         'total_articles': total_articles,
         'total_contributors': total_contributors,
         'recent_contributors': recent_contributors,
     }
     
-    return render(request, 'home.html', context)
+    response = render(request, 'home.html', context)
+    return add_surrogate_keys(response, LISTINGS_KEY, POPULAR_KEY)
 
 
 
@@ -91,7 +133,9 @@ def article_list(request):
     """
     List all published articles with filtering options
     """
-    articles = Article.objects.filter(content_type='article', published=True, review_status='approved')
+    articles = Article.objects.filter(
+        content_type='article', published=True, review_status='approved'
+    ).order_by(*PUBLISHED_ORDERING)
     
     # Filtering by category, tag, state, or search query
     category_slug = request.GET.get('category')
@@ -111,63 +155,70 @@ def article_list(request):
         state = get_object_or_404(State, slug=state_slug)
         articles = articles.filter(states=state)
     
-    if query:
-        articles = articles.filter(
-            Q(title__icontains=query) | 
-            Q(content__icontains=query) | 
-            Q(excerpt__icontains=query)
-        )
-    
     # Pagination
-    paginator = Paginator(articles, 12)  # 12 articles per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    cursor = request.GET.get('cursor')
+    filters = {'category': category_slug, 'tag': tag_slug, 'state': state_slug}
+    if query:
+        # Ranked result ids are cached per query, filters and page
+        page_obj = cached_search_page(articles, query, 12, cursor=cursor, view='article_list', **filters)
+        page_obj.object_list = highlight_results(page_obj.object_list, query)
+        facet_source = lambda: search_content(articles, query)
+    else:
+        paginator = CursorPaginator(articles, 12, count_mode='approximate')  # 12 articles per page
+        page_obj = paginator.get_page(cursor)
+        facet_source = articles
     
-    # Get categories for sidebar
-    categories = Category.objects.all()
+    # Per-category/state/tag counts for the current filters, for the sidebar
+    facets = get_facets(facet_source, filter_signature(view='article_list', q=query, **filters))
     
     context = {
         'page_obj': page_obj,
-        'categories': categories,
+        'facets': facets,
         'category_slug': category_slug,
         'tag_slug': tag_slug,
         'state_slug': state_slug,
         'query': query,
     }
     
-    return render(request, 'articles/article_list.html', context)
+    response = render(request, 'articles/article_list.html', context)
+    if query:
+        # Search result pages are cached by cached_search_page instead
+        return response
+    return add_surrogate_keys(response, LISTINGS_KEY, TAXONOMY_KEY)
 
 def article_search(request):
     """
     Handle article search with enhanced UI
     """
     query = request.GET.get('q', '')
-    articles = Article.objects.filter(content_type='article', published=True, review_status='approved')
-    
-    if query:
-        # Search in title, content and excerpt across all content types
-        articles = articles.filter(
-            Q(title__icontains=query) | 
-            Q(content__icontains=query) | 
-            Q(excerpt__icontains=query)
-        )
+    articles = Article.objects.filter(
+        content_type='article', published=True, review_status='approved'
+    ).order_by(*PUBLISHED_ORDERING)
     
     # Pagination
-    paginator = Paginator(articles, 12)  # 12 articles per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    cursor = request.GET.get('cursor')
+    suggestions = []
+    if query:
+        # Ranked full-text search over title, excerpt, taxonomy and body,
+        # with the result ids of each page cached until content changes
+        page_obj = cached_search_page(articles, query, 12, cursor=cursor, view='article_search')
+        page_obj.object_list = highlight_results(page_obj.object_list, query)
+        if not page_obj.object_list:
+            suggestions = get_suggestions(query)
+        facet_source = lambda: search_content(articles, query)
+    else:
+        paginator = CursorPaginator(articles, 12, count_mode='approximate')  # 12 articles per page
+        page_obj = paginator.get_page(cursor)
+        facet_source = articles
     
-    # Get categories and states for sidebar
-    categories = Category.objects.all()
-    states = State.objects.all()
-    tags = Tag.objects.all()[:12]  # Get top 12 tags
+    # Result counts per category, state and tag for the sidebar
+    facets = get_facets(facet_source, filter_signature(view='article_search', q=query))
     
     context = {
         'page_obj': page_obj,
-        'categories': categories,
-        'states': states,
-        'tags': tags,
+        'facets': facets,
         'query': query,
+        'suggestions': suggestions,
     }
     
     return render(request, 'articles/article_search.html', context)
@@ -180,14 +231,17 @@ def article_search_htmx(request):
     articles = None
     
     if query:
-        # Search in title, content and excerpt across all content types
-        articles = Article.objects.filter(
-            Q(title__icontains=query) | 
-            Q(content__icontains=query) | 
-            Q(excerpt__icontains=query),
-            published=True, 
-            review_status='approved'
-        )[:10]  # Limit to top 10 results for performance
+        # Title prefixes are answered from the in-memory typeahead index
+        articles = title_prefix_search(query, limit=10)
+        
+        if not articles:
+            # Fall back to full-text search for body matches
+            articles = search_content(
+                Article.objects.filter(published=True, review_status='approved'),
+                query,
+                prefix=True,
+            )[:10]  # Limit to top 10 results for performance
+            articles = highlight_results(articles, query)
     
     context = {
         'articles': articles,
@@ -196,6 +250,11 @@ def article_search_htmx(request):
     
     return render(request, 'articles/search_results_partial.html', context)
 
+def article_detail_validator(request, slug, state_slug=None):
+    # Related articles and automatic links depend on other articles too
+    return stamps(CONTENT_VERSION, TAXONOMY_VERSION)
+
+@conditional(article_detail_validator)
 def article_detail(request, slug, state_slug=None):
     """
     Display a single article
@@ -241,6 +300,10 @@ def article_detail(request, slug, state_slug=None):
     if not is_visible_to_user:
         raise Http404("Article not found or not published.")
     
+    # Count public views, buffered and written in batches
+    if article.published and is_countable(request):
+        record_view(article.pk)
+    
     # Check if there's a pending edit for this article (optimized)
     has_pending_edit = hasattr(article, 'pending_edit')
     
@@ -258,8 +321,12 @@ def article_detail(request, slug, state_slug=None):
             }
         # Add more state coordinates as needed
     
+    # Precomputed by refresh_related_content, one query
+    related = related_articles(article) if article.published else []
+    
     context = {
         'article': article,
+        'related_articles': related,
         'has_edit_permission': has_edit_permission,
         'has_review_permission': has_review_permission,
         'has_pending_edit': has_pending_edit,
@@ -268,7 +335,11 @@ def article_detail(request, slug, state_slug=None):
         'json_data': article.info_box_data if article.info_box_data else {},
     }
     
-    return render(request, 'articles/article_detail.html', context)
+    response = render(request, 'articles/article_detail.html', context)
+    if not article.published:
+        return response
+    add_surrogate_keys(response, *article_keys(article), *(content_key(other.pk) for other in related))
+    return count_view(response, article.pk)
 
 @login_required
 def article_create(request):
@@ -789,60 +860,19 @@ def category_list(request):
     """
     Display all categories
     """
-    # Get all parent categories (main categories)
-    main_categories = Category.objects.filter(parent__isnull=True)
-    
-    # Add article count to each category
-    for category in main_categories:
-        category.article_count = Article.objects.filter(content_type='article', categories=category, published=True).count()
-        category.subcategories = Category.objects.filter(parent=category)
-        
-        # Get the most recent article in this category
-        latest_article = Article.objects.filter(content_type='article', categories=category, published=True).order_by('-published_at').first()
-        category.latest_article = latest_article
-    
-    # Get popular categories based on article count
-    popular_categories = []
-    for category in Category.objects.all():
-        category.article_count = Article.objects.filter(content_type='article', categories=category, published=True).count()
-        if category.article_count > 0:
-            popular_categories.append(category)
-    
-    popular_categories = sorted(popular_categories, key=lambda x: x.article_count, reverse=True)[:8]
-    
-    # Create alphabetical listing
-    categories_by_letter = []
-    import string
-    
-    for letter in string.ascii_uppercase:
-        categories = Category.objects.filter(name__istartswith=letter)
-        
-        # Add article count to each category
-        for category in categories:
-            category.article_count = Article.objects.filter(content_type='article', categories=category, published=True).count()
-        
-        if categories.exists():
-            categories_by_letter.append({
-                'letter': letter,
-                'categories': categories
-            })
-    
-    # Find a featured category (most articles or manually set)
-    featured_category = None
-    if popular_categories:
-        featured_category = popular_categories[0]
-        featured_category.article_count = Article.objects.filter(content_type='article', categories=featured_category, published=True).count()
-        featured_category.subcategories = Category.objects.filter(parent=featured_category)
+    directory = get_category_directory()
     
     context = {
-        'main_categories': main_categories,
-        'popular_categories': popular_categories,
-        'categories_by_letter': categories_by_letter,
-        'featured_category': featured_category,
+        'main_categories': directory.main_categories,
+        'popular_categories': directory.popular_categories,
+        'categories_by_letter': directory.categories_by_letter,
+        'featured_category': directory.featured_category,
     }
     
-    return render(request, 'articles/categories.html', context)
+    response = render(request, 'articles/categories.html', context)
+    return add_surrogate_keys(response, LISTINGS_KEY, TAXONOMY_KEY)
 
+@conditional(listing_validator)
 def category_articles(request, slug):
     """
     Display articles for a specific category
@@ -856,12 +886,12 @@ def category_articles(request, slug):
     date_from = request.GET.get('date_from')
     date_to = request.GET.get('date_to')
     
-    # Start with all published articles in this category
-    articles = Article.objects.filter(content_type='article', categories=category, published=True)
+    # Start with all published articles in this category or its subcategories
+    articles = subtree_articles(category, Article.objects.filter(content_type='article', published=True))
     
     # Filter by subcategories if selected
     if selected_subcategories:
-        subcategory_objects = Category.objects.filter(id__in=selected_subcategories)
+        subcategory_objects = Category.objects.filter(id__in=selected_subcategories).order_by('name')
         articles = articles.filter(categories__in=subcategory_objects).distinct()
         selected_subcategories_names = [cat.name for cat in subcategory_objects]
     else:
@@ -890,56 +920,54 @@ def category_articles(request, slug):
     
     # Apply sorting
     if sort == 'newest':
-        articles = articles.order_by('-published_at')
+        articles = articles.order_by(*PUBLISHED_ORDERING)
     elif sort == 'oldest':
-        articles = articles.order_by('published_at')
+        articles = articles.order_by('published_at', 'id')
     elif sort == 'az':
         articles = articles.order_by('title')
     elif sort == 'za':
         articles = articles.order_by('-title')
     elif sort == 'popular':
-        # If view count is tracked, use it for popularity
-        # For simplicity, we'll just use a random order here
-        articles = articles.order_by('?')
+        articles = articles.order_by(*POPULAR_ORDERING)
     
     # Check if any filters are applied
     is_filtered = bool(selected_subcategories or selected_tags or date_from or date_to or sort != 'newest')
     
-    # Get subcategories for filtering
-    subcategories = Category.objects.filter(parent=category)
+    # Parent, sibling and subcategories in one query
+    neighbours = tree_neighbours(category)
+    subcategories = neighbours.children
     
     # Get associated tags for this category's articles
-    tags = Tag.objects.filter(content_items__categories=category).distinct()
+    tags = Tag.objects.filter(subtree_filter(category, prefix='content_items__categories__')).distinct()
     
     # Get statistics for sidebar
     total_articles = articles.count()
-    contributors = User.objects.filter(content_items__categories=category).distinct()
+    contributors = User.objects.filter(subtree_filter(category, prefix='content_items__categories__')).distinct()
     contributors_count = contributors.count()
     last_updated = articles.order_by('-updated_at').values_list('updated_at', flat=True).first()
     
     # Get related categories (siblings) and cross-references
     from .utils import get_discover_more_suggestions
     related_categories = []
-    if category.parent:
-        related_categories = Category.objects.filter(parent=category.parent).exclude(id=category.id)[:5]
+    if category.parent_id:
+        related_categories = neighbours.siblings[:5]
     else:
         # If no parent, show some random categories
-        related_categories = Category.objects.exclude(id=category.id).order_by('?')[:5]
+        related_categories = sample(Category.objects.all(), 5, 'all', exclude=[category.id])
     
     # Get discovery suggestions for better cross-linking
     category_suggestions = get_discover_more_suggestions('category', category, limit=4)
     
     # Pagination
-    paginator = Paginator(articles, 10)  # Show 10 articles per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = CursorPaginator(articles, 10)  # Show 10 articles per page
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     
     context = {
         'category': category,
         'articles': page_obj,
         'subcategories': subcategories,
         'tags': tags,
-        'is_paginated': paginator.num_pages > 1,
+        'is_paginated': page_obj.has_other_pages(),
         'page_obj': page_obj,
         'total_articles': total_articles,
         'contributors_count': contributors_count,
@@ -956,60 +984,27 @@ def category_articles(request, slug):
         'is_filtered': is_filtered,
     }
     
-    return render(request, 'articles/category_articles.html', context)
+    response = render(request, 'articles/category_articles.html', context)
+    subtree = category.get_descendants(include_self=True).values_list('pk', flat=True)
+    if sort == 'popular':
+        add_surrogate_keys(response, POPULAR_KEY)
+    return add_surrogate_keys(response, TAXONOMY_KEY, *(category_key(pk) for pk in subtree))
 
 def tag_list(request):
     """
     Display all tags
     """
-    tags = Tag.objects.all()
-    
-    # Add article count and styling info to each tag
-    for tag in tags:
-        tag.count = Article.objects.filter(content_type='article', tags=tag, published=True).count()
-        
-        # Assign a size class based on count for the tag cloud
-        if tag.count == 0:
-            tag.size = 1
-        elif tag.count < 5:
-            tag.size = 2
-        elif tag.count < 10:
-            tag.size = 3
-        elif tag.count < 20:
-            tag.size = 4
-        else:
-            tag.size = 5
-            
-        # Assign a random color for variety in the tag cloud
-        colors = ['primary', 'secondary', 'success', 'info', 'warning']
-        import random
-        tag.color = random.choice(colors)
-    
-    # Create alphabetical listing
-    alphabet = []
-    tags_by_letter = []
-    import string
-    
-    for letter in string.ascii_uppercase:
-        tag_group = tags.filter(name__istartswith=letter)
-        if tag_group.exists():
-            alphabet.append({'letter': letter, 'has_tags': True})
-            tags_by_letter.append({'letter': letter, 'tags': tag_group})
-        else:
-            alphabet.append({'letter': letter, 'has_tags': False})
-    
-    # Popular tags
-    popular_tags = sorted(tags, key=lambda x: x.count, reverse=True)[:9]
-    
+    # The template caches the rendered cloud, so it is only built on a miss
     context = {
-        'tags': tags,
-        'alphabet': alphabet,
-        'tags_by_letter': tags_by_letter,
-        'popular_tags': popular_tags,
+        'tag_cloud': SimpleLazyObject(build_tag_cloud),
+        'tag_cloud_version': directory_cache_version(),
+        'tag_cloud_timeout': DIRECTORY_CACHE_TIMEOUT,
     }
     
-    return render(request, 'articles/article_tags.html', context)
+    response = render(request, 'articles/article_tags.html', context)
+    return add_surrogate_keys(response, LISTINGS_KEY, TAXONOMY_KEY)
 
+@conditional(listing_validator)
 def tag_articles(request, slug):
     """
     Display articles for a specific tag
@@ -1027,7 +1022,7 @@ def tag_articles(request, slug):
     
     # Filter by categories if selected
     if selected_categories:
-        category_objects = Category.objects.filter(id__in=selected_categories)
+        category_objects = Category.objects.filter(id__in=selected_categories).order_by('name')
         articles = articles.filter(categories__in=category_objects).distinct()
         selected_categories_names = [cat.name for cat in category_objects]
     else:
@@ -1048,23 +1043,21 @@ def tag_articles(request, slug):
     
     # Apply sorting
     if sort == 'newest':
-        articles = articles.order_by('-published_at')
+        articles = articles.order_by(*PUBLISHED_ORDERING)
     elif sort == 'oldest':
-        articles = articles.order_by('published_at')
+        articles = articles.order_by('published_at', 'id')
     elif sort == 'az':
         articles = articles.order_by('title')
     elif sort == 'za':
         articles = articles.order_by('-title')
     elif sort == 'popular':
-        # If view count is tracked, use it for popularity
-        # For simplicity, we'll just use a random order here
-        articles = articles.order_by('?')
+        articles = articles.order_by(*POPULAR_ORDERING)
     
     # Check if any filters are applied
     is_filtered = bool(selected_categories or date_from or date_to or sort != 'newest')
     
     # Get categories for filtering
-    categories = Category.objects.filter(content_items__tags=tag).distinct()
+    categories = Category.objects.filter(content_items__tags=tag).distinct().order_by('name')
     
     # Get statistics for sidebar
     total_articles = articles.count()
@@ -1077,18 +1070,18 @@ def tag_articles(request, slug):
     related_tags = Tag.objects.filter(content_items__id__in=article_ids).exclude(id=tag.id).distinct()[:10]
     
     # Get discovery suggestions for better cross-linking
+    from .utils import get_discover_more_suggestions
     tag_suggestions = get_discover_more_suggestions('tag', tag, limit=5)
     
     # Pagination
-    paginator = Paginator(articles, 10)  # Show 10 articles per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = CursorPaginator(articles, 10)  # Show 10 articles per page
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     
     context = {
         'tag': tag,
         'articles': page_obj,
         'categories': categories,
-        'is_paginated': paginator.num_pages > 1,
+        'is_paginated': page_obj.has_other_pages(),
         'page_obj': page_obj,
         'total_articles': total_articles,
         'contributors_count': contributors_count,
@@ -1103,7 +1096,10 @@ def tag_articles(request, slug):
         'is_filtered': is_filtered,
     }
     
-    return render(request, 'articles/tag_articles.html', context)
+    response = render(request, 'articles/tag_articles.html', context)
+    if sort == 'popular':
+        add_surrogate_keys(response, POPULAR_KEY)
+    return add_surrogate_keys(response, TAXONOMY_KEY, tag_key(tag.pk))
 
 
 
@@ -1153,33 +1149,24 @@ def article_review_queue(request):
     # Get search query
     query = request.GET.get('q')
     
-    # Get sort parameter
-    sort = request.GET.get('sort', 'newest')
+    # Get sort parameter, searches default to relevance
+    sort = request.GET.get('sort', 'relevance' if query else 'newest')
     
     # Get all pending articles and revisions
     pending_articles = Article.objects.filter(content_type='article', review_status='pending')
-    pending_revisions = ContentRevision.objects.filter(status='pending_review')
+    pending_revisions = ContentRevision.objects.filter(status='pending_review').select_related('content', 'editor')
     
-    # Apply search if provided
+    # Apply ranked full-text search if provided, plus author and article title matches
     if query:
-        pending_articles = pending_articles.filter(
-            Q(title__icontains=query) | 
-            Q(content__icontains=query) | 
-            Q(excerpt__icontains=query) |
-            Q(author__username__icontains=query)
-        )
-        pending_revisions = pending_revisions.filter(
-            Q(title__icontains=query) |
-            Q(content_text__icontains=query) |
-            Q(content__title__icontains=query) |
-            Q(editor__username__icontains=query)
-        )
+        pending_articles = search_content(pending_articles, query, also=Q(author__username__icontains=query))
+        pending_revisions = search_revisions(pending_revisions, query, also=Q(content__title__icontains=query))
     
     # Apply sorting
     if sort == 'oldest':
         pending_articles = pending_articles.order_by('created_at')
         pending_revisions = pending_revisions.order_by('created_at')
-    else:  # Default to newest
+    elif sort == 'newest' or not query:
+        sort = 'newest'
         pending_articles = pending_articles.order_by('-created_at')
         pending_revisions = pending_revisions.order_by('-created_at')
     
@@ -1195,9 +1182,15 @@ def article_review_queue(request):
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
+    # Show latest (or best matching) 10 revisions
+    pending_revisions = list(pending_revisions[:10])
+    if query:
+        page_obj.object_list = highlight_results(page_obj.object_list, query)
+        pending_revisions = highlight_results(pending_revisions, query)
+    
     context = {
         'pending_articles': page_obj,
-        'pending_revisions': pending_revisions[:10],  # Show latest 10 revisions
+        'pending_revisions': pending_revisions,
         'page_obj': page_obj,
         'sort': sort,
         'query': query,
@@ -1527,21 +1520,21 @@ def notification_list(request):
     """
     View all user notifications
     """
-    notifications = Notification.objects.filter(user=request.user).order_by('-created_at')
-    
-    # Enhance notifications with additional context for articles
-    for notification in notifications:
-        if notification.content_type == 'article' and notification.object_id:
-            try:
-                article = Article.objects.get(id=notification.object_id)
-                notification.article_slug = article.slug
-            except Article.DoesNotExist:
-                notification.article_slug = None
+    notifications = Notification.objects.filter(user=request.user).order_by('-created_at', '-id')
     
     # Pagination
-    paginator = Paginator(notifications, 15)  # 15 notifications per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = CursorPaginator(notifications, 15)  # 15 notifications per page
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    
+    # Enhance notifications on this page with article slugs, in one query
+    article_ids = [
+        notification.object_id for notification in page_obj
+        if notification.content_type == 'article' and notification.object_id
+    ]
+    article_slugs = dict(Article.objects.filter(id__in=article_ids).values_list('id', 'slug'))
+    for notification in page_obj:
+        if notification.content_type == 'article' and notification.object_id:
+            notification.article_slug = article_slugs.get(notification.object_id)
     
     context = {
         'page_obj': page_obj,
@@ -1610,6 +1603,11 @@ def delete_all_notifications(request):
     return redirect('app:notification-list')
 
 
+def robots_txt_validator(request):
+    return [ROBOTS_TXT_REVISION]
+
+
+@conditional(robots_txt_validator)
 def robots_txt(request):
     """
     Generate robots.txt file for search engine crawlers
@@ -1743,9 +1741,11 @@ def state_list(request):
         'page_title': 'Northeast Indian States',
         'meta_description': 'Explore the eight states of Northeast India - Assam, Arunachal Pradesh, Manipur, Meghalaya, Mizoram, Nagaland, Sikkim, and Tripura.',
     }
-    return render(request, 'states/state_list.html', context)
+    response = render(request, 'states/state_list.html', context)
+    return add_surrogate_keys(response, LISTINGS_KEY, TAXONOMY_KEY)
 
 
+@conditional(landing_validator)
 def state_detail(request, state_slug):
     """
     Display detailed information about a specific state
@@ -1758,21 +1758,10 @@ def state_detail(request, state_slug):
         states=state,
         published=True,
         review_status='approved'
-    ).order_by('-published_at')[:10]
+    ).select_related('author').prefetch_related('categories', 'states').order_by('-published_at')[:10]
     
     # Get article counts by category for this state
-    categories = Category.objects.all()
-    category_counts = {}
-    for category in categories:
-        count = Article.objects.filter(
-            content_type='article',
-            states=state,
-            categories=category,
-            published=True,
-            review_status='approved'
-        ).count()
-        if count > 0:
-            category_counts[category] = count
+    category_counts = category_counts_for_state(state)
     
     context = {
         'state': state,
@@ -1781,7 +1770,8 @@ def state_detail(request, state_slug):
         'page_title': f'{state.name} - Northeast India',
         'meta_description': f'Discover {state.name}, one of the northeastern states of India. Learn about its culture, history, festivals, and notable personalities.',
     }
-    return render(request, 'states/state_detail.html', context)
+    response = render(request, 'states/state_detail.html', context)
+    return add_surrogate_keys(response, TAXONOMY_KEY, state_key(state.pk))
 
 
 @login_required
@@ -1821,46 +1811,69 @@ def recent_changes_patrol(request):
         content_type='article'
     ).select_related('author').order_by('-created_at')
     
+    pending_count = pending_revisions.count()
+    new_content_count = new_content.filter(review_status='pending').count()
+    
+    # Narrow the queue with ranked full-text search
+    query = request.GET.get('q', '').strip()
+    if query:
+        pending_revisions = search_revisions(pending_revisions, query, also=Q(content__title__icontains=query))
+        new_content = search_content(new_content, query, also=Q(author__username__icontains=query))
+    
     # Get content needing patrol (new and unreviewed)
     patrol_queue = []
     
     # Add pending revisions to patrol queue
-    for revision in pending_revisions:
+    for position, revision in enumerate(pending_revisions):
         patrol_queue.append({
             'type': 'revision',
             'item': revision,
             'content': revision.content,
             'user': revision.editor,
             'timestamp': revision.created_at,
-            'action': 'edit_pending'
+            'action': 'edit_pending',
+            'position': position,
         })
     
     # Add new content to patrol queue
-    for content in new_content:
-        if content.review_status == 'pending':
-            patrol_queue.append({
-                'type': 'content',
-                'item': content,
-                'content': content,
-                'user': content.author,
-                'timestamp': content.created_at,
-                'action': 'new_content'
-            })
-    
-    # Sort patrol queue by timestamp (newest first)
-    patrol_queue.sort(key=lambda x: x['timestamp'], reverse=True)
+    for position, content in enumerate(new_content.filter(review_status='pending')):
+        patrol_queue.append({
+            'type': 'content',
+            'item': content,
+            'content': content,
+            'user': content.author,
+            'timestamp': content.created_at,
+            'action': 'new_content',
+            'position': position,
+        })
+    
+    if query:
+        # Interleave both ranked lists, best matches of each first
+        patrol_queue.sort(key=lambda x: x['timestamp'], reverse=True)
+        patrol_queue.sort(key=lambda x: x['position'])
+    else:
+        # Sort patrol queue by timestamp (newest first)
+        patrol_queue.sort(key=lambda x: x['timestamp'], reverse=True)
     
     # Pagination
     paginator = Paginator(patrol_queue, 50)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
+    if query:
+        for item_type in ('revision', 'content'):
+            highlight_results(
+                [entry['item'] for entry in page_obj.object_list if entry['type'] == item_type],
+                query,
+            )
+    
     context = {
         'recent_revisions': recent_revisions[:10],  # Last 10 for overview
-        'pending_count': pending_revisions.count(),
-        'new_content_count': new_content.filter(review_status='pending').count(),
+        'pending_count': pending_count,
+        'new_content_count': new_content_count,
         'patrol_queue': page_obj,
         'total_items': len(patrol_queue),
+        'query': query,
     }
     
     return render(request, 'articles/recent_changes_patrol.html', context)
@@ -2052,26 +2065,14 @@ def category_articles_list(request, category_slug):
         categories=category,
         published=True,
         review_status='approved'
-    ).order_by('-published_at')
+    ).order_by(*PUBLISHED_ORDERING)
     
     # Pagination
-    paginator = Paginator(articles, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = CursorPaginator(articles, 20)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     
     # Get state counts for this category
-    states = State.objects.all()
-    state_counts = {}
-    for state in states:
-        count = Article.objects.filter(
-            content_type='article',
-            categories=category,
-            states=state,
-            published=True,
-            review_status='approved'
-        ).count()
-        if count > 0:
-            state_counts[state] = count
+    state_counts = state_counts_for_category(category)
     
     context = {
         'category': category,
@@ -2096,12 +2097,11 @@ def state_category_articles(request, state_slug, category_slug):
         states=state,
         published=True,
         review_status='approved'
-    ).order_by('-published_at')
+    ).order_by(*PUBLISHED_ORDERING)
     
     # Pagination
-    paginator = Paginator(articles, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = CursorPaginator(articles, 20)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     
     context = {
         'state': state,
@@ -2132,6 +2132,7 @@ def article_redirect(request, slug):
 
 
 # SEO Landing Page Views
+@conditional(landing_validator)
 def personalities_landing(request):
     """
     SEO-optimized landing page for personalities category
@@ -2142,24 +2143,17 @@ def personalities_landing(request):
     # Get personality category
     personality_category = get_object_or_404(Category, slug='personalities')
     
-    # Get featured personalities (latest published)
-    featured_personalities = Article.objects.filter(
+    personality_articles = Article.objects.filter(
         content_type='article',
         categories=personality_category,
         published=True
-    ).select_related('author').prefetch_related('categories', 'states')[:6]
+    )
     
-    # Get personalities by state
-    personalities_by_state = {}
-    for state in states:
-        state_personalities = Article.objects.filter(
-            content_type='article',
-            categories=personality_category,
-            states=state,
-            published=True
-        ).select_related('author')[:3]
-        if state_personalities.exists():
-            personalities_by_state[state] = state_personalities
+    # Get featured personalities (latest published)
+    featured_personalities = personality_articles.select_related('author').prefetch_related('categories', 'states')[:6]
+    
+    # Get personalities by state (ranked per state in one query)
+    personalities_by_state = articles_by_state(personality_articles)
     
     context = {
         'page_title': 'Notable Personalities of Northeast India',
@@ -2179,6 +2173,7 @@ def personalities_landing(request):
     return render(request, 'categories/personalities_landing.html', context)
 
 
+@conditional(landing_validator)
 def culture_landing(request):
     """
     SEO-optimized landing page for culture category
@@ -2186,24 +2181,17 @@ def culture_landing(request):
     states = State.objects.all().order_by('name')
     culture_category = get_object_or_404(Category, slug='culture')
     
-    # Get featured cultural articles
-    featured_culture = Article.objects.filter(
+    culture_articles = Article.objects.filter(
         content_type='article',
         categories=culture_category,
         published=True
-    ).select_related('author').prefetch_related('categories', 'states')[:6]
+    )
     
-    # Get culture articles by state
-    culture_by_state = {}
-    for state in states:
-        state_culture = Article.objects.filter(
-            content_type='article',
-            categories=culture_category,
-            states=state,
-            published=True
-        ).select_related('author')[:3]
-        if state_culture.exists():
-            culture_by_state[state] = state_culture
+    # Get featured cultural articles
+    featured_culture = culture_articles.select_related('author').prefetch_related('categories', 'states')[:6]
+    
+    # Get culture articles by state (ranked per state in one query)
+    culture_by_state = articles_by_state(culture_articles)
     
     context = {
         'page_title': 'Cultural Heritage of Northeast India',
@@ -2223,6 +2211,7 @@ def culture_landing(request):
     return render(request, 'categories/culture_landing.html', context)
 
 
+@conditional(landing_validator)
 def festivals_landing(request):
     """
     SEO-optimized landing page for festivals category
@@ -2230,24 +2219,17 @@ def festivals_landing(request):
     states = State.objects.all().order_by('name')
     festivals_category = get_object_or_404(Category, slug='festivals')
     
-    # Get featured festivals
-    featured_festivals = Article.objects.filter(
+    festivals_articles = Article.objects.filter(
         content_type='article',
         categories=festivals_category,
         published=True
-    ).select_related('author').prefetch_related('categories', 'states')[:6]
+    )
     
-    # Get festivals by state
-    festivals_by_state = {}
-    for state in states:
-        state_festivals = Article.objects.filter(
-            content_type='article',
-            categories=festivals_category,
-            states=state,
-            published=True
-        ).select_related('author')[:3]
-        if state_festivals.exists():
-            festivals_by_state[state] = state_festivals
+    # Get featured festivals
+    featured_festivals = festivals_articles.select_related('author').prefetch_related('categories', 'states')[:6]
+    
+    # Get festivals by state (ranked per state in one query)
+    festivals_by_state = articles_by_state(festivals_articles)
     
     context = {
         'page_title': 'Festivals of Northeast India',
@@ -2267,6 +2249,7 @@ def festivals_landing(request):
     return render(request, 'categories/festivals_landing.html', context)
 
 
+@conditional(landing_validator)
 def places_landing(request):
     """
     SEO-optimized landing page for places category
@@ -2274,24 +2257,17 @@ def places_landing(request):
     states = State.objects.all().order_by('name')
     places_category = get_object_or_404(Category, slug='places')
     
-    # Get featured places
-    featured_places = Article.objects.filter(
+    places_articles = Article.objects.filter(
         content_type='article',
         categories=places_category,
         published=True
-    ).select_related('author').prefetch_related('categories', 'states')[:6]
+    )
     
-    # Get places by state
-    places_by_state = {}
-    for state in states:
-        state_places = Article.objects.filter(
-            content_type='article',
-            categories=places_category,
-            states=state,
-            published=True
-        ).select_related('author')[:3]
-        if state_places.exists():
-            places_by_state[state] = state_places
+    # Get featured places
+    featured_places = places_articles.select_related('author').prefetch_related('categories', 'states')[:6]
+    
+    # Get places by state (ranked per state in one query)
+    places_by_state = articles_by_state(places_articles)
     
     context = {
         'page_title': 'Places to Visit in Northeast India',
@@ -2311,6 +2287,7 @@ def places_landing(request):
     return render(request, 'categories/places_landing.html', context)
 
 
+@conditional(landing_validator)
 def heritage_landing(request):
     """
     SEO-optimized landing page for heritage category
@@ -2318,24 +2295,17 @@ def heritage_landing(request):
     states = State.objects.all().order_by('name')
     heritage_category = get_object_or_404(Category, slug='heritage')
     
-    # Get featured heritage sites
-    featured_heritage = Article.objects.filter(
+    heritage_articles = Article.objects.filter(
         content_type='article',
         categories=heritage_category,
         published=True
-    ).select_related('author').prefetch_related('categories', 'states')[:6]
+    )
     
-    # Get heritage by state
-    heritage_by_state = {}
-    for state in states:
-        state_heritage = Article.objects.filter(
-            content_type='article',
-            categories=heritage_category,
-            states=state,
-            published=True
-        ).select_related('author')[:3]
-        if state_heritage.exists():
-            heritage_by_state[state] = state_heritage
+    # Get featured heritage sites
+    featured_heritage = heritage_articles.select_related('author').prefetch_related('categories', 'states')[:6]
+    
+    # Get heritage by state (ranked per state in one query)
+    heritage_by_state = articles_by_state(heritage_articles)
     
     context = {
         'page_title': 'Heritage Sites of Northeast India',
@@ -2362,17 +2332,19 @@ def seven_sisters(request):
     # Get the seven sister states (excluding Sikkim)
     sister_states = State.objects.exclude(slug='sikkim').order_by('name')
     
-    # Get overview articles for each state
-    state_overviews = {}
-    for state in sister_states:
-        # Get the most comprehensive article about this state
-        overview = Article.objects.filter(
+    # Get the latest overview article for each state in one ranked query
+    overviews = articles_by_state(
+        Article.objects.filter(
             content_type='article',
-            states=state,
+            states__in=sister_states,
             published=True
-        ).select_related('author').prefetch_related('categories').first()
-        if overview:
-            state_overviews[state] = overview
+        ).prefetch_related('categories'),
+        per_state=1,
+    )
+    state_overviews = {
+        state: articles[0] for state, articles in overviews.items()
+        if state.slug != 'sikkim'
+    }
     
     context = {
         'page_title': 'Seven Sister States of Northeast India',
@@ -2426,7 +2398,8 @@ def personalities_list(request):
         'meta_description': 'Discover notable personalities, leaders, and influential figures from Northeast India.',
     }
     
-    return render(request, 'articles/article_list.html', context)
+    response = render(request, 'articles/article_list.html', context)
+    return add_surrogate_keys(response, LISTINGS_KEY, TAXONOMY_KEY)
 
 
 def culture_list(request):
@@ -2465,7 +2438,8 @@ def culture_list(request):
         'meta_description': 'Explore the rich cultural heritage, traditions, and customs of Northeast India.',
     }
     
-    return render(request, 'articles/article_list.html', context)
+    response = render(request, 'articles/article_list.html', context)
+    return add_surrogate_keys(response, LISTINGS_KEY, TAXONOMY_KEY)
 
 
 def festivals_list(request):
@@ -2502,7 +2476,8 @@ def festivals_list(request):
         'meta_description': 'Discover the vibrant festivals and celebrations of Northeast India.',
     }
     
-    return render(request, 'articles/article_list.html', context)
+    response = render(request, 'articles/article_list.html', context)
+    return add_surrogate_keys(response, LISTINGS_KEY, TAXONOMY_KEY)
 
 
 def places_list(request):
@@ -2540,7 +2515,8 @@ def places_list(request):
         'meta_description': 'Explore beautiful places, destinations, and tourist attractions in Northeast India.',
     }
     
-    return render(request, 'articles/article_list.html', context)
+    response = render(request, 'articles/article_list.html', context)
+    return add_surrogate_keys(response, LISTINGS_KEY, TAXONOMY_KEY)
 
 
 def tribal_culture_list(request):
@@ -2565,7 +2541,8 @@ def tribal_culture_list(request):
         'meta_description': 'Learn about the diverse tribal cultures and communities of Northeast India.',
     }
     
-    return render(request, 'articles/article_list.html', context)
+    response = render(request, 'articles/article_list.html', context)
+    return add_surrogate_keys(response, LISTINGS_KEY, TAXONOMY_KEY)
 
 
 def csrf_failure(request, reason=""):
@@ -44,6 +44,8 @@ MIDDLEWARE = [
     # Custom SEO middleware for URL redirects and canonical URLs
     'app.middleware.SEORedirectMiddleware',
     'app.middleware.CanonicalURLMiddleware',
+    # Full-page cache for anonymous readers, keep after authentication and messages
+    'app.middleware.PageCacheMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
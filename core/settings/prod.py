@@ -62,6 +62,16 @@ else:
         }
     }
 
+# Cache
+# Shared between gunicorn workers so version stamps (typeahead index, etc.)
+# invalidate every process, not just the one that handled the write
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('DJANGO_CACHE_DIR', os.path.join(BASE_DIR, 'cache')),
+    }
+}
+
 # Security settings for production
 # SECURE_HSTS_SECONDS = 31536000  # 1 year
 # SECURE_HSTS_INCLUDE_SUBDOMAINS = True
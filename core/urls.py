@@ -19,7 +19,8 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib.sitemaps.views import sitemap, index
-from app.sitemaps import SITEMAPS
+from app.conditional import conditional
+from app.sitemaps import SITEMAPS, sitemap_validator
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -27,8 +28,8 @@ urlpatterns = [
     path('', include('accounts.urls', namespace='accounts')),
     
     # XML Sitemaps
-    path('sitemap.xml', index, {'sitemaps': SITEMAPS}, name='django.contrib.sitemaps.views.index'),
-    path('sitemap-<section>.xml', sitemap, {'sitemaps': SITEMAPS}, name='django.contrib.sitemaps.views.sitemap'),
+    path('sitemap.xml', conditional(sitemap_validator)(index), {'sitemaps': SITEMAPS}, name='django.contrib.sitemaps.views.index'),
+    path('sitemap-<section>.xml', conditional(sitemap_validator)(sitemap), {'sitemaps': SITEMAPS}, name='django.contrib.sitemaps.views.sitemap'),
 ]
 
 # Serve media files in development
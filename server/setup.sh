@@ -90,6 +90,15 @@ pip install -r "/home/ubuntu/$PROJECT_MAIN_DIR_NAME/requirements.txt"
 echo "Migrating..."
 python "/home/ubuntu/$PROJECT_MAIN_DIR_NAME/manage.py" migrate --settings=core.settings.prod
 
+# Schedule the related articles refresh (see app/related.py)
+echo "Scheduling related articles refresh..."
+REFRESH_RELATED="/home/ubuntu/$PROJECT_MAIN_DIR_NAME/venv/bin/python /home/ubuntu/$PROJECT_MAIN_DIR_NAME/manage.py refresh_related_content --settings=core.settings.prod"
+(
+    crontab -l 2>/dev/null | grep -v refresh_related_content
+    echo "*/5 * * * * $REFRESH_RELATED"
+    echo "30 3 * * * $REFRESH_RELATED --full"
+) | crontab -
+
 # Collect static (uncomment if needed)
 # echo "Collecting static files..."
 # python "/home/ubuntu/$PROJECT_MAIN_DIR_NAME/manage.py" collectstatic --settings=core.settings.prod